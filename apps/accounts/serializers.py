@@ -3,10 +3,12 @@ from __future__ import annotations
 
 from rest_framework import serializers
 
+from apps.common.fieldsets import SparseFieldsetSerializerMixin
+
 from .models import User
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for employee users with commission information."""
 
     full_name = serializers.SerializerMethodField()
@@ -4,11 +4,13 @@ from __future__ import annotations
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from apps.common.fieldsets import SparseFieldsetMixin
+
 from .models import User
 from .serializers import EmployeeSerializer
 
 
-class EmployeeViewSet(ReadOnlyModelViewSet):
+class EmployeeViewSet(SparseFieldsetMixin, ReadOnlyModelViewSet):
     """
     Read-only viewset for employees (users who can be assigned to policies).
     
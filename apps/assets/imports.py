@@ -0,0 +1,474 @@
+"""Bulk import of vehicles and drivers from CSV or JSON-lines uploads.
+
+The upload is parsed as a stream and processed in batches of ``batch_size`` rows. Each
+row is validated on its own (field formats, VIN pattern, vehicle type from the lookup
+cache); everything that needs the database is then checked once per batch: one ``IN``
+query each for clients, loss payees, garaging addresses and already registered VINs.
+Valid rows are inserted with ``bulk_create``; invalid ones are reported with their row
+number and errors, and do not stop the import.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.db import IntegrityError, transaction
+from django.db.models import Model
+from django.utils.functional import cached_property
+from rest_framework import serializers
+
+from apps.clients.models import Address, Client
+from apps.common.models import ActivityLog
+from apps.common.search_index import schedule_reindex
+from apps.common.services import log_activity
+from apps.lookups.cache import get_active_lookups
+from apps.lookups.models import LicenseClass, VehicleType
+from apps.lookups.serializers import LookupRelatedField
+
+from .models import Driver, LossPayee, Vehicle
+
+CSV_FORMAT = "csv"
+JSONL_FORMAT = "jsonl"
+FORMAT_EXTENSIONS = {
+    ".csv": CSV_FORMAT,
+    ".jsonl": JSONL_FORMAT,
+    ".ndjson": JSONL_FORMAT,
+}
+
+
+class ImportFileError(Exception):
+    """The upload cannot be read at all (unknown format, bad encoding, bad header)."""
+
+
+def detect_format(filename: str, requested: str | None = None) -> str:
+    if requested:
+        if requested not in (CSV_FORMAT, JSONL_FORMAT):
+            raise ImportFileError(f"Unsupported format '{requested}'; use csv or jsonl.")
+        return requested
+    for extension, file_format in FORMAT_EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return file_format
+    raise ImportFileError("Unsupported file type; upload a .csv or .jsonl file.")
+
+
+def iter_rows(upload, file_format: str) -> Iterator[tuple[int, Any]]:
+    """Yield ``(row number, row)`` from ``upload`` without reading it into memory.
+
+    Row numbers are 1-based data rows (the CSV header is not counted). A JSON-lines row
+    that cannot be decoded is yielded as its ``JSONDecodeError`` and reported per row.
+    """
+
+    stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    try:
+        if file_format == CSV_FORMAT:
+            reader = csv.DictReader(stream)
+            if not reader.fieldnames:
+                raise ImportFileError("The CSV file has no header row.")
+            for number, row in enumerate(reader, start=1):
+                yield number, row
+        else:
+            number = 0
+            for line in stream:
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield number, exc
+    except UnicodeDecodeError as exc:
+        raise ImportFileError("The file is not UTF-8 encoded.") from exc
+    finally:
+        # Leave the upload itself open for Django to clean up.
+        stream.detach()
+
+
+class VehicleImportRowSerializer(serializers.Serializer):
+    """Validates one import row without touching the database.
+
+    Related rows are validated per batch by ``VehicleImporter``; the vehicle type comes
+    from the lookup cache.
+    """
+
+    client_id = serializers.UUIDField()
+    vin = serializers.CharField(max_length=17)
+    unit_number = serializers.CharField(max_length=64, required=False, default="")
+    vehicle_type_id = LookupRelatedField(VehicleType, source="vehicle_type")
+    year = serializers.IntegerField(min_value=1900, max_value=2100)
+    make = serializers.CharField(max_length=128)
+    model = serializers.CharField(max_length=128)
+    gvw = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    pd_amount = serializers.DecimalField(
+        max_digits=12, decimal_places=2, required=False, allow_null=True
+    )
+    deductible = serializers.DecimalField(
+        max_digits=12, decimal_places=2, required=False, allow_null=True
+    )
+    loss_payee_id = serializers.UUIDField(required=False, allow_null=True)
+    garaging_address_id = serializers.UUIDField(required=False, allow_null=True)
+
+    def validate_vin(self, value: str) -> str:
+        value = value.upper()
+        Vehicle.VIN_VALIDATOR(value)
+        return value
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    rows: list[dict[str, Any]] = field(default_factory=list)
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    def add_outcome(self, row: int, status: str, pk: Any) -> None:
+        setattr(self, status, getattr(self, status) + 1)
+        self.rows.append({"row": row, "status": status, "id": pk})
+
+    def add_error(self, row: int, detail: Any) -> None:
+        self.errors.append({"row": row, "errors": detail})
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "created": self.created,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "rows": sorted(self.rows, key=lambda outcome: outcome["row"]),
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+        }
+
+
+Batch = list[tuple[int, dict[str, Any]]]
+
+
+class BatchImporter:
+    """Validates rows one by one and writes them in batches.
+
+    Subclasses provide the row serializer, the key rows must be unique on within one
+    upload, and ``import_batch``, which checks the batch against the database with a
+    fixed number of queries and writes it.
+    """
+
+    batch_size = 500
+    row_serializer_class: type[serializers.Serializer]
+    label: str  # ``app_label.model`` of the imported model
+    noun: str
+    created_action: str
+    duplicate_message: str
+
+    def __init__(self, *, user=None, defaults: dict[str, Any] | None = None) -> None:
+        self.user = user
+        self.defaults = defaults or {}
+        self.report = ImportReport()
+        self.row_serializer = self.row_serializer_class()
+        self.seen_keys: set[Any] = set()
+        self.written_per_client: dict[Any, Counter[str]] = {}
+
+    def row_key(self, row: dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+    def import_batch(self, batch: Batch) -> None:
+        raise NotImplementedError
+
+    def run(self, rows: Iterable[tuple[int, Any]]) -> ImportReport:
+        batch: Batch = []
+        for number, row in rows:
+            self.report.total += 1
+            validated = self.validate_row(number, row)
+            if validated is not None:
+                batch.append((number, validated))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        self.log_summary()
+        return self.report
+
+    def validate_row(self, number: int, row: Any) -> dict[str, Any] | None:
+        if isinstance(row, Exception):
+            self.report.add_error(number, {"non_field_errors": [f"Invalid JSON: {row}"]})
+            return None
+        if isinstance(row, dict):
+            # Empty CSV cells mean "not provided" and fall back to the upload's defaults.
+            row = {
+                **self.defaults,
+                **{key: value for key, value in row.items() if key and value not in ("", None)},
+            }
+        try:
+            validated = self.row_serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            self.report.add_error(number, exc.detail)
+            return None
+        key = self.row_key(validated)
+        if key in self.seen_keys:
+            self.report.add_error(number, self.duplicate_message)
+            return None
+        self.seen_keys.add(key)
+        return validated
+
+    def written(self, outcomes: list[tuple[int, str, Model]]) -> None:
+        """Record ``(row number, status, instance)`` outcomes of a committed batch."""
+
+        for number, status, instance in outcomes:
+            self.report.add_outcome(number, status, instance.pk)
+            if status != "skipped":
+                self.written_per_client.setdefault(instance.client_id, Counter())[status] += 1
+        # ``bulk_create`` sends no ``post_save``, so the search index is updated here.
+        schedule_reindex(
+            self.label, [instance.pk for _, status, instance in outcomes if status != "skipped"]
+        )
+
+    def insert(
+        self,
+        model: type[Model],
+        pending: list[tuple[int, str, Model]],
+        conflict_error: dict[str, list[str]],
+        **options: Any,
+    ) -> None:
+        """``bulk_create`` the pending ``(row number, status, instance)`` triples.
+
+        When a concurrent write makes the batch fail, rows are retried one by one and
+        the conflicting ones are reported with ``conflict_error``.
+        """
+
+        if not pending:
+            return
+        instances = [instance for _, _, instance in pending]
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(instances, batch_size=self.batch_size, **options)
+        except IntegrityError:
+            outcomes = []
+            for number, status, instance in pending:
+                try:
+                    with transaction.atomic():
+                        model.objects.bulk_create([instance], **options)
+                except IntegrityError:
+                    self.report.add_error(number, conflict_error)
+                else:
+                    outcomes.append((number, status, instance))
+            self.written(outcomes)
+            return
+        self.written(pending)
+
+    @staticmethod
+    def existing(model, pks: set[Any]) -> set[Any]:
+        pks.discard(None)
+        if not pks:
+            return set()
+        return set(model.objects.filter(pk__in=pks, is_active=True).values_list("pk", flat=True))
+
+    @staticmethod
+    def missing(field_name: str, pk: Any) -> dict[str, list[str]]:
+        return {field_name: [f'Invalid pk "{pk}" - object does not exist.']}
+
+    def log_summary(self) -> None:
+        """Write one timeline entry per client instead of one per row."""
+
+        for client_id, counts in self.written_per_client.items():
+            count = sum(counts.values())
+            log_activity(
+                self.created_action,
+                f"{self.noun.title()} Imported: {count}",
+                description=f"{count} {self.noun} were imported in bulk",
+                client_id=client_id,
+                performed_by=self.user,
+                metadata={
+                    "event": "bulk_import",
+                    **counts,
+                    "failed": self.report.failed,
+                    "total": self.report.total,
+                },
+            )
+
+
+class VehicleImporter(BatchImporter):
+    """Inserts new vehicles; rows whose VIN is already registered are rejected."""
+
+    row_serializer_class = VehicleImportRowSerializer
+    label = "assets.vehicle"
+    noun = "vehicles"
+    created_action = ActivityLog.ActionType.VEHICLE_CREATED
+    duplicate_message = {"vin": ["Duplicate VIN in this upload."]}
+    taken_message = {"vin": ["vehicle with this vin already exists."]}
+
+    def row_key(self, row: dict[str, Any]) -> str:
+        return row["vin"]
+
+    def import_batch(self, batch: Batch) -> None:
+        clients = self.existing(Client, {row["client_id"] for _, row in batch})
+        loss_payees = self.existing(LossPayee, {row.get("loss_payee_id") for _, row in batch})
+        addresses = self.existing(Address, {row.get("garaging_address_id") for _, row in batch})
+        taken = set(
+            Vehicle.objects.filter(vin__in=[row["vin"] for _, row in batch]).values_list(
+                "vin", flat=True
+            )
+        )
+
+        pending: list[tuple[int, str, Model]] = []
+        for number, row in batch:
+            errors: dict[str, list[str]] = {}
+            if row["client_id"] not in clients:
+                errors.update(self.missing("client_id", row["client_id"]))
+            if row.get("loss_payee_id") and row["loss_payee_id"] not in loss_payees:
+                errors.update(self.missing("loss_payee_id", row["loss_payee_id"]))
+            if row.get("garaging_address_id") and row["garaging_address_id"] not in addresses:
+                errors.update(self.missing("garaging_address_id", row["garaging_address_id"]))
+            if row["vin"] in taken:
+                errors.update(self.taken_message)
+            if errors:
+                self.report.add_error(number, errors)
+                continue
+            pending.append((number, "created", Vehicle(**row)))
+
+        self.insert(Vehicle, pending, self.taken_message)
+
+
+class DriverImportRowSerializer(serializers.Serializer):
+    """Validates one driver row without touching the database.
+
+    The license class may be given by id (``license_class_id``) or by name
+    (``license_class``, as found in MVR exports); names are resolved from the cached
+    lookup table. Optional columns have no defaults so that an upsert only overwrites
+    the columns a row provides; blank cells are left out.
+    """
+
+    client_id = serializers.UUIDField()
+    first_name = serializers.CharField(max_length=150)
+    middle_name = serializers.CharField(max_length=150, required=False, allow_blank=True)
+    last_name = serializers.CharField(max_length=150)
+    date_of_birth = serializers.DateField()
+    license_number = serializers.CharField(max_length=64)
+    license_state = serializers.CharField(min_length=2, max_length=2)
+    license_class_id = LookupRelatedField(LicenseClass, source="license_class", required=False)
+    issue_date = serializers.DateField(required=False, allow_null=True)
+    hire_date = serializers.DateField(required=False, allow_null=True)
+    violations = serializers.IntegerField(min_value=0, max_value=32767, required=False)
+    accidents = serializers.IntegerField(min_value=0, max_value=32767, required=False)
+
+    @cached_property
+    def license_classes_by_name(self) -> dict[str, LicenseClass]:
+        return {row.name.casefold(): row for row in get_active_lookups(LicenseClass)}
+
+    def to_internal_value(self, data):
+        # The ``license_class`` name column is resolved here rather than by a field,
+        # since ``license_class_id`` already writes the ``license_class`` attribute.
+        name = data.get("license_class") if isinstance(data, dict) else None
+        attrs = super().to_internal_value(data)
+        if "license_class" not in attrs:
+            if not name:
+                raise serializers.ValidationError({"license_class": ["This field is required."]})
+            license_class = self.license_classes_by_name.get(str(name).strip().casefold())
+            if license_class is None:
+                raise serializers.ValidationError(
+                    {"license_class": [f'Unknown license class "{name}".']}
+                )
+            attrs["license_class"] = license_class
+        return attrs
+
+    def validate_license_number(self, value: str) -> str:
+        return value.strip()
+
+    def validate_license_state(self, value: str) -> str:
+        return value.upper()
+
+
+class DriverImporter(BatchImporter):
+    """Creates drivers, resolving ``(client, license_number)`` collisions per ``on_conflict``.
+
+    * ``update`` (default): upsert, overwriting the provided columns of the existing
+      driver (and reactivating it) through ``INSERT ... ON CONFLICT DO UPDATE``;
+    * ``skip``: keep the existing driver and report the row as skipped;
+    * ``error``: reject the row.
+    """
+
+    UPDATE = "update"
+    SKIP = "skip"
+    ERROR = "error"
+    CONFLICT_MODES = (UPDATE, SKIP, ERROR)
+
+    row_serializer_class = DriverImportRowSerializer
+    label = "assets.driver"
+    noun = "drivers"
+    created_action = ActivityLog.ActionType.DRIVER_CREATED
+    duplicate_message = {
+        "license_number": ["Duplicate license number for this client in this upload."]
+    }
+    conflict_message = {
+        "license_number": ["Driver with this license number already exists for the client."]
+    }
+
+    def __init__(self, *, on_conflict: str = UPDATE, **kwargs: Any) -> None:
+        if on_conflict not in self.CONFLICT_MODES:
+            raise ImportFileError(f"on_conflict must be one of {', '.join(self.CONFLICT_MODES)}.")
+        super().__init__(**kwargs)
+        self.on_conflict = on_conflict
+
+    def row_key(self, row: dict[str, Any]) -> tuple[Any, str]:
+        return row["client_id"], row["license_number"]
+
+    def import_batch(self, batch: Batch) -> None:
+        clients = self.existing(Client, {row["client_id"] for _, row in batch})
+        # One query for every collision in the batch; soft-deleted drivers still hold
+        # their license number under the unique constraint.
+        existing = {
+            (client_id, license_number): pk
+            for client_id, license_number, pk in Driver.objects.filter(
+                client_id__in=clients,
+                license_number__in={row["license_number"] for _, row in batch},
+            ).values_list("client_id", "license_number", "pk")
+        }
+
+        pending: list[tuple[int, str, Model]] = []
+        # The columns each pending row provides; blank cells are left out of a row.
+        columns: list[frozenset[str]] = []
+        for number, row in batch:
+            if row["client_id"] not in clients:
+                self.report.add_error(number, self.missing("client_id", row["client_id"]))
+                continue
+            pk = existing.get(self.row_key(row))
+            if pk is None:
+                pending.append((number, "created", Driver(**row)))
+                columns.append(frozenset(row))
+            elif self.on_conflict == self.SKIP:
+                self.report.add_outcome(number, "skipped", pk)
+            elif self.on_conflict == self.ERROR:
+                self.report.add_error(number, self.conflict_message)
+            else:
+                pending.append((number, "updated", Driver(pk=pk, **row)))
+                columns.append(frozenset(row))
+
+        if self.on_conflict != self.UPDATE:
+            self.insert(Driver, pending, self.conflict_message)
+            return
+        # An upsert may only overwrite the columns its rows provide, so rows are
+        # written with one statement per distinct set of columns.
+        groups: dict[frozenset[str], list[tuple[int, str, Model]]] = {}
+        for provided, entry in zip(columns, pending, strict=True):
+            groups.setdefault(provided, []).append(entry)
+        for provided, entries in groups.items():
+            update_fields = sorted(
+                Driver._meta.get_field(name).name
+                for name in provided - {"client_id", "license_number"}
+            )
+            self.insert(
+                Driver,
+                entries,
+                self.conflict_message,
+                update_conflicts=True,
+                unique_fields=["client", "license_number"],
+                update_fields=[*update_fields, "is_active", "updated_at"],
+            )
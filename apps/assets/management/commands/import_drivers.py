@@ -0,0 +1,52 @@
+"""Import a driver roster (e.g. a carrier MVR export) from a CSV or JSON-lines file."""
+from __future__ import annotations
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.assets.imports import DriverImporter, ImportFileError, detect_format, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import drivers, upserting on (client, license_number) collisions by default."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON-lines file")
+        parser.add_argument("--client-id", help="Client for rows without a client_id column")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="Override the format detected from the extension",
+        )
+        parser.add_argument(
+            "--on-conflict",
+            choices=DriverImporter.CONFLICT_MODES,
+            default=DriverImporter.UPDATE,
+            help="What to do when the license number already exists for the client",
+        )
+        parser.add_argument("--batch-size", type=int, default=DriverImporter.batch_size)
+        parser.add_argument("--report", help="Write the per-row report as JSON to this path")
+
+    def handle(self, *args, **options):
+        defaults = {"client_id": options["client_id"]} if options["client_id"] else {}
+        importer = DriverImporter(on_conflict=options["on_conflict"], defaults=defaults)
+        importer.batch_size = options["batch_size"]
+        try:
+            file_format = detect_format(options["path"], options["format"])
+            with open(options["path"], "rb") as upload:
+                report = importer.run(iter_rows(upload, file_format))
+        except (ImportFileError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        if options["report"]:
+            with open(options["report"], "w") as output:
+                json.dump(report.as_dict(), output, indent=2, default=str)
+        for error in report.errors[:20]:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'], default=str)}")
+        if report.failed > 20:
+            self.stderr.write(f"... {report.failed - 20} more rejected rows")
+        self.stdout.write(
+            f"{report.total} rows: {report.created} created, {report.updated} updated, "
+            f"{report.skipped} skipped, {report.failed} failed"
+        )
@@ -102,6 +102,7 @@ class Vehicle(BaseModel):
 
     class Meta:
         ordering = ("unit_number", "vin")
+        indexes = [models.Index(fields=["-created_at", "-id"])]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.unit_number or self.vin}"
@@ -142,6 +143,27 @@ class PolicyVehicle(BaseModel):
         return f"{self.policy} -> {self.vehicle}"
 
 
+ACTIVE_POLICY_ASSIGNMENTS_ATTR = "active_policy_assignments"
+
+
+def active_policy_assignments_prefetch(lookup: str = "policy_assignments") -> models.Prefetch:
+    """Prefetch active assignments (with policy and garaging address) for vehicle payloads.
+
+    ``lookup`` is the path to ``Vehicle.policy_assignments`` from the queryset being
+    prefetched, e.g. ``"vehicle__policy_assignments"`` for ``PolicyVehicle`` querysets.
+    The results land on ``vehicle.active_policy_assignments``.
+    """
+
+    return models.Prefetch(
+        lookup,
+        queryset=PolicyVehicle.objects.filter(is_active=True).select_related(
+            "policy",
+            "garaging_address",
+        ),
+        to_attr=ACTIVE_POLICY_ASSIGNMENTS_ATTR,
+    )
+
+
 class Driver(BaseModel):
     """Client driver record used for assignments and compliance."""
 
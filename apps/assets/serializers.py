@@ -4,18 +4,29 @@ from __future__ import annotations
 from typing import Any
 
 from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
 from apps.clients.models import Address, Client
 from apps.clients.serializers import AddressSerializer
+from apps.common.fieldsets import SparseFieldsetSerializerMixin
+from apps.common.models import ActivityLog
+from apps.common.services import log_activity, user_display_name
 from apps.lookups.models import LicenseClass, VehicleType
-from apps.lookups.serializers import LookupSerializer
+from apps.lookups.serializers import LookupRelatedField, LookupSerializer
 from apps.policies.models import Policy
 
-from .models import Driver, LossPayee, PolicyDriver, PolicyVehicle, Vehicle
+from .models import (
+    ACTIVE_POLICY_ASSIGNMENTS_ATTR,
+    Driver,
+    LossPayee,
+    PolicyDriver,
+    PolicyVehicle,
+    Vehicle,
+)
 
 
-class LossPayeeSerializer(serializers.ModelSerializer):
+class LossPayeeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     address = AddressSerializer()
 
     class Meta:
@@ -74,7 +85,7 @@ class GaragingAddressSerializer(serializers.Serializer):
     address = AddressSerializer()
 
 
-class VehicleSerializer(serializers.ModelSerializer):
+class VehicleSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     client = ClientSummarySerializer(read_only=True)
     client_id = serializers.PrimaryKeyRelatedField(
         queryset=Client.objects.filter(is_active=True),
@@ -82,8 +93,8 @@ class VehicleSerializer(serializers.ModelSerializer):
         write_only=True,
     )
     vehicle_type = LookupSerializer(read_only=True)
-    vehicle_type_id = serializers.PrimaryKeyRelatedField(
-        queryset=VehicleType.objects.filter(is_active=True),
+    vehicle_type_id = LookupRelatedField(
+        VehicleType,
         source="vehicle_type",
         write_only=True,
     )
@@ -143,13 +154,22 @@ class VehicleSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        # Left out of sparse fieldsets (``?fields=`` / ``?expand=``) unless asked for.
+        expandable_fields = ("loss_payee", "garaging_addresses")
+        fieldset_relations = {"garaging_addresses": ("policy_assignments",)}
 
     def get_garaging_addresses(self, obj: Vehicle) -> list[dict]:
-        """Return garaging addresses from active policy assignments."""
-        assignments = obj.policy_assignments.filter(
-            is_active=True
-        ).select_related("policy", "garaging_address")
-        
+        """Return garaging addresses from active policy assignments.
+
+        List endpoints attach the assignments with ``active_policy_assignments_prefetch``;
+        single objects (e.g. create/update responses) fall back to one query.
+        """
+        assignments = getattr(obj, ACTIVE_POLICY_ASSIGNMENTS_ATTR, None)
+        if assignments is None:
+            assignments = obj.policy_assignments.filter(
+                is_active=True
+            ).select_related("policy", "garaging_address")
+
         return [
             {
                 "policy_id": str(pa.policy.id),
@@ -187,7 +207,7 @@ class VehicleSerializer(serializers.ModelSerializer):
         return instance
 
 
-class PolicyVehicleSerializer(serializers.ModelSerializer):
+class PolicyVehicleSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     policy = serializers.UUIDField(source="policy.id", read_only=True)
     policy_id = serializers.PrimaryKeyRelatedField(
         queryset=Policy.objects.filter(is_active=True),
@@ -236,6 +256,8 @@ class PolicyVehicleSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        # Left out of sparse fieldsets (``?fields=`` / ``?expand=``) unless asked for.
+        expandable_fields = ("vehicle",)
 
     def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
         # On create, policy_id, vehicle_id, and garaging_address_id are required
@@ -262,7 +284,7 @@ class PolicyVehicleSerializer(serializers.ModelSerializer):
         return instance
 
 
-class DriverSerializer(serializers.ModelSerializer):
+class DriverSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     client = ClientSummarySerializer(read_only=True)
     client_id = serializers.PrimaryKeyRelatedField(
         queryset=Client.objects.filter(is_active=True),
@@ -270,8 +292,8 @@ class DriverSerializer(serializers.ModelSerializer):
         write_only=True,
     )
     license_class = LookupSerializer(read_only=True)
-    license_class_id = serializers.PrimaryKeyRelatedField(
-        queryset=LicenseClass.objects.filter(is_active=True),
+    license_class_id = LookupRelatedField(
+        LicenseClass,
         source="license_class",
         write_only=True,
     )
@@ -317,7 +339,7 @@ class DriverSerializer(serializers.ModelSerializer):
         return instance
 
 
-class PolicyDriverSerializer(serializers.ModelSerializer):
+class PolicyDriverSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     policy = serializers.UUIDField(source="policy.id", read_only=True)
     policy_id = serializers.PrimaryKeyRelatedField(
         queryset=Policy.objects.filter(is_active=True),
@@ -354,6 +376,8 @@ class PolicyDriverSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        # Left out of sparse fieldsets (``?fields=`` / ``?expand=``) unless asked for.
+        expandable_fields = ("driver",)
 
     def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
         # On create, policy_id and driver_id are required
@@ -376,3 +400,202 @@ class PolicyDriverSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
         instance.save()
         return instance
+
+
+class BulkAssignSerializer(serializers.Serializer):
+    """Assigns many vehicles or drivers of the policy's client to one policy.
+
+    Ownership and existence of every id are checked with one query, new assignments are
+    written with one ``bulk_create(ignore_conflicts=True)`` and soft-deleted ones are
+    reactivated with the same requested values in one ``bulk_update``. Rows already
+    assigned are left alone. A single timeline entry records the whole operation
+    (per-row capture is skipped by ``bulk_create``).
+    """
+
+    MAX_IDS = 1000
+
+    assignment_model: type[PolicyVehicle] | type[PolicyDriver]
+    member_model: type[Vehicle] | type[Driver]
+    member_field: str  # "vehicle" or "driver"
+    noun: str
+    assigned_action: str
+
+    policy_id = serializers.PrimaryKeyRelatedField(
+        queryset=Policy.objects.filter(is_active=True),
+        source="policy",
+    )
+
+    @property
+    def ids_field(self) -> str:
+        return f"{self.member_field}_ids"
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        policy = attrs["policy"]
+        ids = list(dict.fromkeys(attrs[self.ids_field]))
+        members = {
+            member.pk: member
+            for member in self.member_model.objects.filter(pk__in=ids, is_active=True).only(
+                "pk", "client_id", *self.member_only_fields()
+            )
+        }
+        errors = {}
+        for pk in ids:
+            member = members.get(pk)
+            if member is None:
+                errors[str(pk)] = f"{self.noun.title()} does not exist."
+            elif member.client_id != policy.client_id:
+                errors[str(pk)] = (
+                    f"{self.noun.title()} belongs to a different client than the policy."
+                )
+        if errors:
+            raise serializers.ValidationError({self.ids_field: errors})
+        attrs["members"] = [members[pk] for pk in ids]
+        return attrs
+
+    def member_only_fields(self) -> tuple[str, ...]:
+        return ()
+
+    def assignment_values(self, member, attrs: dict[str, Any]) -> dict[str, Any]:
+        return {}
+
+    def create(self, validated_data: dict[str, Any]) -> dict[str, Any]:
+        policy = validated_data["policy"]
+        members = validated_data["members"]
+        member_fk = f"{self.member_field}_id"
+        existing = {
+            member_pk: (pk, is_active)
+            for member_pk, pk, is_active in self.assignment_model.objects.filter(
+                policy=policy, **{f"{member_fk}__in": [member.pk for member in members]}
+            ).values_list(member_fk, "pk", "is_active")
+        }
+
+        new_assignments = []
+        reactivated_assignments = []
+        reactivated_fields = {"is_active", "updated_at"}
+        now = timezone.now()
+        for member in members:
+            values = self.assignment_values(member, validated_data)
+            if member.pk not in existing:
+                new_assignments.append(
+                    self.assignment_model(policy=policy, **{self.member_field: member}, **values)
+                )
+            elif not existing[member.pk][1]:
+                reactivated_fields.update(values)
+                reactivated_assignments.append(
+                    self.assignment_model(
+                        pk=existing[member.pk][0],
+                        **{member_fk: member.pk},
+                        is_active=True,
+                        updated_at=now,
+                        **values,
+                    )
+                )
+        with transaction.atomic():
+            self.assignment_model.objects.bulk_create(new_assignments, ignore_conflicts=True)
+            if reactivated_assignments:
+                self.assignment_model.objects.bulk_update(
+                    reactivated_assignments, sorted(reactivated_fields)
+                )
+            # Rows skipped by ``ignore_conflicts`` (a concurrent request assigned the same
+            # member) keep the other request's primary key, so only ours are reported.
+            inserted = set(
+                self.assignment_model.objects.filter(
+                    pk__in=[assignment.pk for assignment in new_assignments]
+                ).values_list(member_fk, flat=True)
+            )
+
+        assigned = [member.pk for member in members if member.pk in inserted]
+        reactivated = [getattr(assignment, member_fk) for assignment in reactivated_assignments]
+        changed = assigned + reactivated
+        if changed:
+            user = self.context["request"].user if "request" in self.context else None
+            log_activity(
+                self.assigned_action,
+                f"{self.noun.title()}s Assigned: {len(changed)}",
+                description=(
+                    f"{len(changed)} {self.noun}s were assigned to policy {policy.policy_number} "
+                    f"by {user_display_name(user)}"
+                ),
+                client_id=policy.client_id,
+                policy=policy,
+                performed_by=user,
+                metadata={
+                    "event": "bulk_assign",
+                    f"{self.member_field}_ids": [str(pk) for pk in changed],
+                },
+            )
+        return {
+            "policy_id": policy.pk,
+            "assigned": assigned,
+            "reactivated": reactivated,
+            "already_assigned": [pk for pk, (_, is_active) in existing.items() if is_active],
+        }
+
+    def to_representation(self, instance: dict[str, Any]) -> dict[str, Any]:
+        return instance
+
+
+class PolicyVehicleBulkAssignSerializer(BulkAssignSerializer):
+    assignment_model = PolicyVehicle
+    member_model = Vehicle
+    member_field = "vehicle"
+    noun = "vehicle"
+    assigned_action = ActivityLog.ActionType.VEHICLE_ASSIGNED
+
+    vehicle_ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=BulkAssignSerializer.MAX_IDS
+    )
+    garaging_address_id = serializers.PrimaryKeyRelatedField(
+        queryset=Address.objects.filter(is_active=True),
+        source="garaging_address",
+        required=False,
+        help_text="Garaging address for every assignment; defaults to each vehicle's own.",
+    )
+    status = serializers.ChoiceField(
+        choices=PolicyVehicle.Status.choices, default=PolicyVehicle.Status.ACTIVE
+    )
+    inception_date = serializers.DateField(required=False, allow_null=True)
+
+    def member_only_fields(self) -> tuple[str, ...]:
+        return ("garaging_address_id",)
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        attrs = super().validate(attrs)
+        if "garaging_address" not in attrs:
+            missing = [
+                str(vehicle.pk)
+                for vehicle in attrs["members"]
+                if vehicle.garaging_address_id is None
+            ]
+            if missing:
+                message = f"Required: vehicles {', '.join(missing)} have no garaging address."
+                raise serializers.ValidationError({"garaging_address_id": message})
+        return attrs
+
+    def assignment_values(self, member, attrs: dict[str, Any]) -> dict[str, Any]:
+        garaging_address = attrs.get("garaging_address")
+        return {
+            "garaging_address_id": (
+                garaging_address.pk if garaging_address else member.garaging_address_id
+            ),
+            "status": attrs["status"],
+            "inception_date": attrs.get("inception_date"),
+        }
+
+
+class PolicyDriverBulkAssignSerializer(BulkAssignSerializer):
+    assignment_model = PolicyDriver
+    member_model = Driver
+    member_field = "driver"
+    noun = "driver"
+    assigned_action = ActivityLog.ActionType.DRIVER_ASSIGNED
+
+    driver_ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=BulkAssignSerializer.MAX_IDS
+    )
+    status = serializers.ChoiceField(
+        choices=PolicyDriver.Status.choices, default=PolicyDriver.Status.ACTIVE
+    )
+
+    def assignment_values(self, member, attrs: dict[str, Any]) -> dict[str, Any]:
+        return {"status": attrs["status"]}
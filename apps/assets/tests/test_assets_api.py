@@ -1,18 +1,29 @@
+import io
+import json
+
 import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 
 from apps.accounts.models import User
+from apps.assets.imports import VehicleImporter
+from apps.assets.models import Driver, PolicyDriver, PolicyVehicle
 from apps.clients.models import Address, Client
-from apps.lookups.models import LicenseClass, VehicleType
-from apps.policies.models import CarrierProduct, GeneralAgent, Policy
+from apps.common.models import ActivityLog, SearchIndexEntry
 from apps.lookups.models import (
     BusinessType,
+    FinanceCompany,
     InsuranceType,
+    LicenseClass,
     PolicyStatus,
     PolicyType,
-    FinanceCompany,
+    VehicleType,
 )
+from apps.policies.models import CarrierProduct, GeneralAgent, Policy
 
 
 @pytest.fixture
@@ -263,3 +274,428 @@ def test_assign_driver_to_policy(api_client, user, client, license_class, policy
 
     dup_response = api_client.post(policy_driver_url, payload, format="json")
     assert dup_response.status_code == 400
+
+
+def _create_assigned_vehicles(client, vehicle_type, policy, count, *, start=0):
+    address = Address.objects.create(
+        street_address="300 Yard Ln",
+        city="Houston",
+        state="TX",
+        zip_code="77001",
+    )
+    for index in range(start, start + count):
+        vehicle = client.vehicles.create(
+            vin=f"1XPWD40X1ED{index:06d}",
+            unit_number=f"UNIT-{index:03d}",
+            vehicle_type=vehicle_type,
+            year=2021,
+            make="Kenworth",
+            model="T680",
+            garaging_address=address,
+        )
+        vehicle.policy_assignments.create(policy=policy, garaging_address=address)
+
+
+@pytest.mark.django_db
+def test_vehicle_list_query_count_is_constant(
+    api_client, user, client, vehicle_type, policy, django_assert_num_queries
+):
+    api_client.force_authenticate(user=user)
+    url = reverse("assets:vehicle-list")
+
+    _create_assigned_vehicles(client, vehicle_type, policy, 2)
+    with CaptureQueriesContext(connection) as small_page:
+        response = api_client.get(url)
+    assert response.status_code == 200
+    assert len(response.json()["results"][0]["garaging_addresses"]) == 1
+
+    _create_assigned_vehicles(client, vehicle_type, policy, 10, start=2)
+    with django_assert_num_queries(len(small_page.captured_queries)):
+        response = api_client.get(url)
+    assert response.json()["count"] == 12
+
+    policy_vehicle_url = reverse("assets:policy-vehicle-list")
+    with CaptureQueriesContext(connection) as assignments_page:
+        response = api_client.get(policy_vehicle_url)
+    assert response.status_code == 200
+    assert response.json()["results"][0]["vehicle"]["garaging_addresses"]
+    assert len(assignments_page.captured_queries) <= len(small_page.captured_queries)
+
+
+@pytest.mark.django_db
+def test_sparse_vehicle_list_skips_nested_relations(api_client, user, client, vehicle_type, policy):
+    api_client.force_authenticate(user=user)
+    _create_assigned_vehicles(client, vehicle_type, policy, 3)
+    url = reverse("assets:vehicle-list")
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(url, {"fields": "id,vin,unit_number"})
+
+    assert response.status_code == 200
+    assert set(response.json()["results"][0]) == {"id", "vin", "unit_number"}
+    # Count and page only, without joins or the assignment prefetch.
+    assert len(queries.captured_queries) == 2
+    assert "JOIN" not in queries.captured_queries[-1]["sql"]
+
+    row = api_client.get(url, {"fields": "id", "expand": "garaging_addresses"}).json()["results"][0]
+    assert set(row) == {"id", "garaging_addresses"}
+    assert row["garaging_addresses"][0]["policy_number"] == policy.policy_number
+
+
+def _upload(name, content):
+    return SimpleUploadedFile(name, content.encode(), content_type="text/plain")
+
+
+@pytest.mark.django_db
+def test_bulk_import_vehicles_reports_rejected_rows(
+    api_client, user, client, vehicle_type, django_capture_on_commit_callbacks
+):
+    api_client.force_authenticate(user=user)
+    client.vehicles.create(
+        vin="1XPWD40X1ED000001", vehicle_type=vehicle_type, year=2021, make="Kenworth", model="T680"
+    )
+    rows = [
+        "vin,unit_number,vehicle_type_id,year,make,model,gvw,client_id",
+        f"1xpwd40x1ed000002,U-2,{vehicle_type.pk},2022,Kenworth,T680,80000,",
+        f"1XPWD40X1ED000003,,{vehicle_type.pk},2023,Volvo,VNL,,",
+        f"1XPWD40X1ED000002,U-dup,{vehicle_type.pk},2022,Kenworth,T680,,",
+        f"1XPWD40X1ED000001,U-taken,{vehicle_type.pk},2022,Kenworth,T680,,",
+        f"1XPWD40X1ED00000O,U-bad,{vehicle_type.pk},1800,Kenworth,,,",
+        f"1XPWD40X1ED000004,U-4,{vehicle_type.pk},2022,Kenworth,T680,,{vehicle_type.pk}",
+    ]
+    url = reverse("assets:vehicle-bulk-import")
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(
+            url,
+            {"file": _upload("fleet.csv", "\n".join(rows)), "client_id": str(client.pk)},
+            format="multipart",
+        )
+
+    assert response.status_code == 201, response.content
+    data = response.json()
+    assert (data["total"], data["created"], data["failed"]) == (6, 2, 4)
+    errors = {error["row"]: error["errors"] for error in data["errors"]}
+    assert errors[3] == {"vin": ["Duplicate VIN in this upload."]}
+    assert errors[4] == {"vin": ["vehicle with this vin already exists."]}
+    assert set(errors[5]) == {"vin", "year", "model"}
+    assert set(errors[6]) == {"client_id"}
+
+    vehicle = client.vehicles.get(vin="1XPWD40X1ED000002")
+    assert (vehicle.unit_number, vehicle.gvw) == ("U-2", 80000)
+    assert SearchIndexEntry.objects.filter(object_id=vehicle.pk, field="vin").exists()
+    summary = ActivityLog.objects.get(metadata__event="bulk_import")
+    assert summary.client_id == client.pk
+    assert summary.metadata["created"] == 2
+
+
+@pytest.mark.django_db
+def test_bulk_import_vehicles_queries_per_batch(
+    api_client, user, client, vehicle_type, monkeypatch
+):
+    api_client.force_authenticate(user=user)
+    monkeypatch.setattr(VehicleImporter, "batch_size", 50)
+    lines = "\n".join(
+        json.dumps(
+            {
+                "client_id": str(client.pk),
+                "vin": f"2XPWD40X1ED{index:06d}",
+                "vehicle_type_id": str(vehicle_type.pk),
+                "year": 2020,
+                "make": "Peterbilt",
+                "model": "579",
+            }
+        )
+        for index in range(120)
+    )
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.post(
+            reverse("assets:vehicle-bulk-import"),
+            {"file": _upload("fleet.jsonl", lines)},
+            format="multipart",
+        )
+
+    assert response.status_code == 201, response.content
+    assert response.json()["created"] == 120
+    # Three batches, each with a handful of lookups and one INSERT.
+    assert len(queries.captured_queries) < 30
+
+
+@pytest.mark.django_db
+def test_bulk_import_drivers_upserts_on_license_collisions(api_client, user, client, license_class):
+    api_client.force_authenticate(user=user)
+    existing = Driver.objects.create(
+        client=client,
+        first_name="Old",
+        last_name="Name",
+        date_of_birth="1980-01-01",
+        license_number="TX100",
+        license_state="TX",
+        license_class=license_class,
+        violations=3,
+        is_active=False,
+    )
+    rows = [
+        "first_name,last_name,date_of_birth,license_number,license_state,license_class,violations",
+        f"Jane,Doe,1990-03-15,TX100,tx,{license_class.name.lower()},0",
+        "John,Roe,1985-07-01,TX200,TX,,",
+        f"Jim,Poe,1985-07-01,TX300,TX,{license_class.name},",
+        f"Jim,Poe,1985-07-01,TX300,TX,{license_class.name},",
+        "Ann,Moe,1985-07-01,TX400,TX,Not A Class,",
+    ]
+    url = reverse("assets:driver-bulk-import")
+    response = api_client.post(
+        url,
+        {"file": _upload("mvr.csv", "\n".join(rows)), "client_id": str(client.pk)},
+        format="multipart",
+    )
+
+    assert response.status_code == 201, response.content
+    data = response.json()
+    assert (data["created"], data["updated"], data["failed"]) == (1, 1, 3)
+    assert [(row["row"], row["status"]) for row in data["rows"]] == [(1, "updated"), (3, "created")]
+    assert data["rows"][0]["id"] == str(existing.pk)
+    assert {error["row"]: set(error["errors"]) for error in data["errors"]} == {
+        2: {"license_class"},
+        4: {"license_number"},
+        5: {"license_class"},
+    }
+    existing.refresh_from_db()
+    assert (existing.first_name, existing.license_state, existing.violations) == ("Jane", "TX", 0)
+    assert existing.is_active
+
+    response = api_client.post(
+        url,
+        {
+            "file": _upload("mvr.csv", "\n".join(rows[:2])),
+            "client_id": str(client.pk),
+            "on_conflict": "skip",
+        },
+        format="multipart",
+    )
+    assert response.status_code == 200
+    assert response.json()["rows"] == [{"row": 1, "status": "skipped", "id": str(existing.pk)}]
+
+
+@pytest.mark.django_db
+def test_bulk_import_drivers_keeps_values_of_blank_cells(api_client, user, client, license_class):
+    api_client.force_authenticate(user=user)
+    drivers = [
+        Driver.objects.create(
+            client=client,
+            first_name="Old",
+            last_name=f"Driver {index}",
+            date_of_birth="1980-01-01",
+            license_number=f"TX50{index}",
+            license_state="TX",
+            license_class=license_class,
+            hire_date="2015-06-01",
+            violations=7,
+            accidents=2,
+        )
+        for index in range(2)
+    ]
+    rows = [
+        "first_name,last_name,date_of_birth,license_number,license_state,license_class,"
+        "hire_date,violations,accidents",
+        f"Jane,Doe,1990-03-15,TX500,TX,{license_class.name},,1,",
+        f"John,Roe,1985-07-01,TX501,TX,{license_class.name},2020-01-01,,0",
+    ]
+    response = api_client.post(
+        reverse("assets:driver-bulk-import"),
+        {"file": _upload("mvr.csv", "\n".join(rows)), "client_id": str(client.pk)},
+        format="multipart",
+    )
+
+    assert response.status_code == 200, response.content
+    assert response.json()["updated"] == 2
+    for driver in drivers:
+        driver.refresh_from_db()
+    assert [(d.first_name, str(d.hire_date), d.violations, d.accidents) for d in drivers] == [
+        ("Jane", "2015-06-01", 1, 2),
+        ("John", "2020-01-01", 7, 0),
+    ]
+
+
+@pytest.mark.django_db
+def test_import_drivers_command(tmp_path, client, license_class):
+    path = tmp_path / "roster.jsonl"
+    path.write_text(
+        json.dumps(
+            {
+                "client_id": str(client.pk),
+                "first_name": "Jane",
+                "last_name": "Doe",
+                "date_of_birth": "1990-03-15",
+                "license_number": "CA555",
+                "license_state": "CA",
+                "license_class_id": str(license_class.pk),
+            }
+        )
+        + "\n"
+    )
+    stdout = io.StringIO()
+    call_command("import_drivers", str(path), stdout=stdout)
+    assert "1 created" in stdout.getvalue()
+    assert Driver.objects.get(client=client, license_number="CA555").first_name == "Jane"
+
+    stdout = io.StringIO()
+    call_command(
+        "import_drivers", str(path), "--on-conflict", "error", stdout=stdout, stderr=io.StringIO()
+    )
+    assert "1 failed" in stdout.getvalue()
+
+
+@pytest.mark.django_db
+def test_bulk_assign_vehicles_to_policy(
+    api_client, user, client, vehicle_type, policy, django_capture_on_commit_callbacks
+):
+    api_client.force_authenticate(user=user)
+    address = Address.objects.create(
+        street_address="1 Yard", city="Austin", state="TX", zip_code="78701"
+    )
+    vehicles = [
+        client.vehicles.create(
+            vin=f"3XPWD40X1ED{index:06d}",
+            vehicle_type=vehicle_type,
+            year=2021,
+            make="Mack",
+            model="Anthem",
+        )
+        for index in range(3)
+    ]
+    vehicles[0].policy_assignments.create(policy=policy, garaging_address=address)
+    other_client = Client.objects.create(
+        company_name="Other Fleet", created_by=user, updated_by=user
+    )
+    foreign = other_client.vehicles.create(
+        vin="3XPWD40X1ED999999", vehicle_type=vehicle_type, year=2021, make="Mack", model="Anthem"
+    )
+    url = reverse("assets:policy-vehicle-bulk-assign")
+
+    response = api_client.post(
+        url,
+        {
+            "policy_id": str(policy.pk),
+            "vehicle_ids": [str(foreign.pk)],
+            "garaging_address_id": str(address.pk),
+        },
+        format="json",
+    )
+    assert response.status_code == 400
+    assert str(foreign.pk) in response.json()["vehicle_ids"]
+
+    payload = {
+        "policy_id": str(policy.pk),
+        "vehicle_ids": [str(vehicle.pk) for vehicle in vehicles],
+        "garaging_address_id": str(address.pk),
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(url, payload, format="json")
+    assert response.status_code == 201, response.content
+    data = response.json()
+    assert sorted(data["assigned"]) == sorted(str(vehicle.pk) for vehicle in vehicles[1:])
+    assert data["already_assigned"] == [str(vehicles[0].pk)]
+    assert PolicyVehicle.objects.filter(policy=policy, garaging_address=address).count() == 3
+    entry = ActivityLog.objects.get(metadata__event="bulk_assign")
+    assert entry.action_type == ActivityLog.ActionType.VEHICLE_ASSIGNED
+    assert entry.policy_id == policy.pk
+
+
+@pytest.mark.django_db
+def test_bulk_assign_drivers_reactivates_removed_assignments(
+    api_client, user, client, license_class, policy
+):
+    api_client.force_authenticate(user=user)
+    drivers = [
+        client.drivers.create(
+            first_name=f"Driver {index}",
+            last_name="Bulk",
+            date_of_birth="1985-01-01",
+            license_number=f"BULK{index}",
+            license_state="TX",
+            license_class=license_class,
+        )
+        for index in range(2)
+    ]
+    removed = drivers[0].policy_assignments.create(policy=policy, is_active=False)
+
+    response = api_client.post(
+        reverse("assets:policy-driver-bulk-assign"),
+        {"policy_id": str(policy.pk), "driver_ids": [str(driver.pk) for driver in drivers]},
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+    assert response.json()["assigned"] == [str(drivers[1].pk)]
+    assert response.json()["reactivated"] == [str(drivers[0].pk)]
+    removed.refresh_from_db()
+    assert removed.is_active
+
+
+@pytest.mark.django_db
+def test_bulk_assign_vehicles_reactivates_with_requested_values(
+    api_client, user, client, vehicle_type, policy
+):
+    api_client.force_authenticate(user=user)
+    old_address = Address.objects.create(
+        street_address="1 Yard", city="Austin", state="TX", zip_code="78701"
+    )
+    new_address = Address.objects.create(
+        street_address="2 Depot", city="Austin", state="TX", zip_code="78702"
+    )
+    vehicle = client.vehicles.create(
+        vin="3XPWD40X1ED000100", vehicle_type=vehicle_type, year=2021, make="Mack", model="Anthem"
+    )
+    removed = vehicle.policy_assignments.create(
+        policy=policy, garaging_address=old_address, inception_date="2024-01-01", is_active=False
+    )
+
+    response = api_client.post(
+        reverse("assets:policy-vehicle-bulk-assign"),
+        {
+            "policy_id": str(policy.pk),
+            "vehicle_ids": [str(vehicle.pk)],
+            "garaging_address_id": str(new_address.pk),
+            "inception_date": "2025-03-01",
+        },
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+    assert response.json()["reactivated"] == [str(vehicle.pk)]
+    removed.refresh_from_db()
+    assert removed.is_active
+    assert removed.garaging_address_id == new_address.pk
+    assert str(removed.inception_date) == "2025-03-01"
+
+
+@pytest.mark.django_db
+def test_bulk_assign_only_reports_inserted_assignments(
+    api_client, user, client, license_class, policy, monkeypatch
+):
+    api_client.force_authenticate(user=user)
+    drivers = [
+        client.drivers.create(
+            first_name=f"Driver {index}",
+            last_name="Race",
+            date_of_birth="1985-01-01",
+            license_number=f"RACE{index}",
+            license_state="TX",
+            license_class=license_class,
+        )
+        for index in range(2)
+    ]
+    bulk_create = PolicyDriver.objects.bulk_create
+
+    def racing_bulk_create(objs, **kwargs):
+        # Another request assigns the first driver between the lookup and the insert.
+        PolicyDriver.objects.create(policy=policy, driver=drivers[0])
+        return bulk_create(objs, **kwargs)
+
+    monkeypatch.setattr(PolicyDriver.objects, "bulk_create", racing_bulk_create)
+    response = api_client.post(
+        reverse("assets:policy-driver-bulk-assign"),
+        {"policy_id": str(policy.pk), "driver_ids": [str(driver.pk) for driver in drivers]},
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+    assert response.json()["assigned"] == [str(drivers[1].pk)]
+    assert PolicyDriver.objects.filter(policy=policy).count() == 2
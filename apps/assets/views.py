@@ -2,21 +2,66 @@
 from __future__ import annotations
 
 from django.db import IntegrityError
-from rest_framework import serializers
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from .models import Driver, LossPayee, PolicyDriver, PolicyVehicle, Vehicle
+from apps.common.fieldsets import SparseFieldsetMixin
+
+from .imports import (
+    BatchImporter,
+    DriverImporter,
+    ImportFileError,
+    VehicleImporter,
+    detect_format,
+    iter_rows,
+)
+from .models import (
+    Driver,
+    LossPayee,
+    PolicyDriver,
+    PolicyVehicle,
+    Vehicle,
+    active_policy_assignments_prefetch,
+)
 from .serializers import (
     DriverSerializer,
     LossPayeeSerializer,
+    PolicyDriverBulkAssignSerializer,
     PolicyDriverSerializer,
+    PolicyVehicleBulkAssignSerializer,
     PolicyVehicleSerializer,
     VehicleSerializer,
 )
 
 
-class BaseSoftDeleteViewSet(ModelViewSet):
+def run_import(request, importer_class: type[BatchImporter], **options) -> Response:
+    """Run ``importer_class`` over the uploaded ``file`` and return its report."""
+
+    upload = request.FILES.get("file")
+    if upload is None:
+        raise serializers.ValidationError({"file": ["This field is required."]})
+    defaults = {"client_id": request.data["client_id"]} if request.data.get("client_id") else {}
+    try:
+        file_format = detect_format(upload.name, request.data.get("format"))
+        importer = importer_class(user=request.user, defaults=defaults, **options)
+        report = importer.run(iter_rows(upload.file, file_format))
+    except ImportFileError as exc:
+        raise serializers.ValidationError({"file": [str(exc)]}) from exc
+
+    if report.created:
+        response_status = status.HTTP_201_CREATED
+    elif report.updated or report.skipped:
+        response_status = status.HTTP_200_OK
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response(report.as_dict(), status=response_status)
+
+
+class BaseSoftDeleteViewSet(SparseFieldsetMixin, ModelViewSet):
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
@@ -45,10 +90,8 @@ class VehicleViewSet(BaseSoftDeleteViewSet):
         "vehicle_type",
         "loss_payee",
         "loss_payee__address",
-    ).prefetch_related(
-        "policy_assignments__policy",
-        "policy_assignments__garaging_address",
-    )
+        "garaging_address",
+    ).prefetch_related(active_policy_assignments_prefetch())
     serializer_class = VehicleSerializer
     search_fields = (
         "vin",
@@ -65,6 +108,17 @@ class VehicleViewSet(BaseSoftDeleteViewSet):
     }
     ordering_fields = ("vin", "unit_number", "year", "created_at", "updated_at")
     ordering = ("unit_number", "vin")
+    cursor_ordering = ("-created_at", "-id")
+
+    @action(detail=False, methods=["post"], url_path="bulk", parser_classes=(MultiPartParser,))
+    def bulk_import(self, request):
+        """Import vehicles from an uploaded CSV or JSON-lines ``file``.
+
+        ``client_id`` (form field) applies to rows that do not name a client. Valid rows
+        are created even when others fail; the response lists every rejected row.
+        """
+
+        return run_import(request, VehicleImporter)
 
 
 class PolicyVehicleViewSet(BaseSoftDeleteViewSet):
@@ -72,8 +126,12 @@ class PolicyVehicleViewSet(BaseSoftDeleteViewSet):
         "policy",
         "vehicle",
         "vehicle__client",
+        "vehicle__vehicle_type",
+        "vehicle__loss_payee",
+        "vehicle__loss_payee__address",
+        "vehicle__garaging_address",
         "garaging_address",
-    )
+    ).prefetch_related(active_policy_assignments_prefetch("vehicle__policy_assignments"))
     serializer_class = PolicyVehicleSerializer
     filterset_fields = {
         "policy": ["exact"],
@@ -83,6 +141,17 @@ class PolicyVehicleViewSet(BaseSoftDeleteViewSet):
     ordering_fields = ("created_at", "updated_at", "inception_date")
     ordering = ("-created_at",)
 
+    @action(detail=False, methods=["post"], url_path="bulk-assign")
+    def bulk_assign(self, request):
+        """Assign many vehicles of the policy's client to the policy in one request."""
+
+        serializer = PolicyVehicleBulkAssignSerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def perform_create(self, serializer: PolicyVehicleSerializer) -> None:
         try:
             serializer.save()
@@ -108,6 +177,17 @@ class DriverViewSet(BaseSoftDeleteViewSet):
     ordering_fields = ("last_name", "first_name", "created_at", "updated_at")
     ordering = ("last_name", "first_name")
 
+    @action(detail=False, methods=["post"], url_path="bulk", parser_classes=(MultiPartParser,))
+    def bulk_import(self, request):
+        """Import a driver roster from an uploaded CSV or JSON-lines ``file``.
+
+        ``on_conflict`` decides what happens to rows whose license number already
+        exists for the client: ``update`` (default), ``skip`` or ``error``.
+        """
+
+        on_conflict = request.data.get("on_conflict") or DriverImporter.UPDATE
+        return run_import(request, DriverImporter, on_conflict=on_conflict)
+
     def perform_create(self, serializer: DriverSerializer) -> None:
         try:
             serializer.save()
@@ -132,6 +212,17 @@ class PolicyDriverViewSet(BaseSoftDeleteViewSet):
     ordering_fields = ("created_at", "updated_at")
     ordering = ("-created_at",)
 
+    @action(detail=False, methods=["post"], url_path="bulk-assign")
+    def bulk_assign(self, request):
+        """Assign many drivers of the policy's client to the policy in one request."""
+
+        serializer = PolicyDriverBulkAssignSerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def perform_create(self, serializer: PolicyDriverSerializer) -> None:
         try:
             serializer.save()
@@ -7,6 +7,7 @@ from .models import (
     Certificate,
     CertificateDriver,
     CertificateHolder,
+    CertificateIssuance,
     CertificateVehicle,
     MasterCertificate,
 )
@@ -53,11 +54,12 @@ class CertificateAdmin(admin.ModelAdmin):
         "verification_code",
         "certificate_holder",
         "master_certificate",
+        "document_status",
         "is_active",
         "created_at",
         "created_by",
     )
-    list_filter = ("is_active", "created_at")
+    list_filter = ("is_active", "document_status", "created_at")
     search_fields = (
         "verification_code",
         "certificate_holder__name",
@@ -65,7 +67,15 @@ class CertificateAdmin(admin.ModelAdmin):
         "master_certificate__policy__policy_number",
     )
     autocomplete_fields = ["master_certificate", "certificate_holder"]
-    readonly_fields = ("verification_code", "created_by", "updated_by", "created_at", "updated_at")
+    readonly_fields = (
+        "verification_code",
+        "document_status",
+        "document_hash",
+        "created_by",
+        "updated_by",
+        "created_at",
+        "updated_at",
+    )
     inlines = [CertificateVehicleInline, CertificateDriverInline]
 
     def save_model(self, request, obj, form, change):
@@ -98,3 +108,10 @@ class CertificateDriverAdmin(admin.ModelAdmin):
         "driver__license_number",
     )
     autocomplete_fields = ["certificate", "driver"]
+
+
+@admin.register(CertificateIssuance)
+class CertificateIssuanceAdmin(admin.ModelAdmin):
+    list_display = ("master_certificate", "total", "created_by", "created_at")
+    search_fields = ("master_certificate__name", "master_certificate__policy__policy_number")
+    readonly_fields = ("master_certificate", "total", "created_by", "created_at", "updated_at")
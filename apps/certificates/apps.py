@@ -8,3 +8,8 @@ class CertificatesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.certificates"
     verbose_name = "Certificates"
+
+    def ready(self) -> None:
+        from .signals import connect_signals
+
+        connect_signals()
@@ -0,0 +1,140 @@
+"""Measure certificate PDF rendering throughput.
+
+Builds an in-memory certificate (nothing is written to the database) with ``--vehicles``
+vehicles and ``--drivers`` drivers and renders it repeatedly with the previous
+single-page builder, kept here as the baseline, and with the precompiled template.
+Both are fed the same text lines, so the numbers compare PDF assembly only.
+"""
+from __future__ import annotations
+
+import datetime
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.assets.models import Driver, Vehicle
+from apps.certificates.models import Certificate, CertificateHolder, MasterCertificate
+from apps.certificates.pdf import template_for
+from apps.certificates.services import certificate_lines
+from apps.clients.models import Address, Client
+from apps.policies.models import Policy
+
+
+def _legacy_build_pdf(lines: list[str]) -> bytes:
+    """The per-certificate builder the template replaced (one page, rebuilt from scratch)."""
+
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+    ]
+    y_position = 760
+    content_segments = []
+    for raw_line in lines:
+        safe_line = raw_line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        content_segments.append(f"BT /F1 12 Tf 50 {y_position} Td ({safe_line}) Tj ET")
+        y_position -= 16
+    content_stream = "\n".join(content_segments).encode("latin-1")
+    objects.append(
+        f"<< /Length {len(content_stream)} >>\nstream\n".encode("latin-1")
+        + content_stream
+        + b"\nendstream"
+    )
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = [0]
+    for index, obj in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf.extend(f"{index} 0 obj\n".encode("latin-1"))
+        pdf.extend(obj)
+        pdf.extend(b"\nendobj\n")
+    xref_offset = len(pdf)
+    total_objects = len(objects) + 1
+    pdf.extend(f"xref\n0 {total_objects}\n".encode("latin-1"))
+    pdf.extend(b"0000000000 65535 f \n")
+    for offset in offsets[1:]:
+        pdf.extend(f"{offset:010d} 00000 n \n".encode("latin-1"))
+    trailer = f"trailer\n<< /Size {total_objects} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF"
+    pdf.extend(trailer.encode("latin-1"))
+    return bytes(pdf)
+
+
+class Command(BaseCommand):
+    help = "Report certificate PDF renders per second before and after the precompiled template."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vehicles", type=int, default=300)
+        parser.add_argument("--drivers", type=int, default=20)
+        parser.add_argument(
+            "--seconds", type=float, default=2.0, help="Time spent on each renderer."
+        )
+
+    def handle(self, *args, **options):
+        certificate, vehicles, drivers = self._certificate(options["vehicles"], options["drivers"])
+        lines = certificate_lines(certificate, vehicles=vehicles, drivers=drivers)
+        template = template_for(certificate.master_certificate.settings)
+
+        pages = template.render(lines).count(b"/Type /Page ")
+        self.stdout.write(f"{len(lines)} lines, {pages} page(s) with the template")
+        baseline = self._rate(lambda: _legacy_build_pdf(lines), options["seconds"])
+        current = self._rate(lambda: template.render(lines), options["seconds"])
+        self.stdout.write(f"legacy builder  {baseline:>10,.0f} renders/sec")
+        self.stdout.write(
+            f"template        {current:>10,.0f} renders/sec ({current / baseline:.1f}x)"
+        )
+
+    def _rate(self, render, seconds: float) -> float:
+        count = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            for _ in range(50):
+                render()
+            count += 50
+        return count / (time.perf_counter() - started)
+
+    def _certificate(self, vehicle_count: int, driver_count: int):
+        client = Client(company_name="Benchmark Freight (East)")
+        policy = Policy(client=client, policy_number="BENCH-0001")
+        holder = CertificateHolder(
+            name="Benchmark Holder",
+            contact_person="Pat Doe",
+            email="holder@example.com",
+            address=Address(
+                street_address="1 Main St", city="Springfield", state="IL", zip_code="62701"
+            ),
+        )
+        certificate = Certificate(
+            master_certificate=MasterCertificate(policy=policy, name="Benchmark"),
+            certificate_holder=holder,
+            verification_code="BENCH0000001",
+            created_at=timezone.now(),
+        )
+        vehicles = [
+            Vehicle(
+                client=client,
+                vin=f"1FUJGLDR{number:09d}",
+                unit_number=f"U{number}",
+                year=2015 + number % 10,
+                make="Freightliner",
+                model="Cascadia",
+                pd_amount=Decimal("85000.00"),
+            )
+            for number in range(vehicle_count)
+        ]
+        drivers = [
+            Driver(
+                client=client,
+                first_name="Driver",
+                last_name=f"No. {number}",
+                license_state="TX",
+                license_number=f"D{number:07d}",
+                date_of_birth=datetime.date(1980, 1, 1),
+            )
+            for number in range(driver_count)
+        ]
+        return certificate, vehicles, drivers
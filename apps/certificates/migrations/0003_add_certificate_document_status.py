@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:41
+
+from django.db import migrations, models
+
+
+def backfill_document_status(apps, schema_editor):
+    """Existing PDFs are ready; certificates without one get a render job."""
+
+    Certificate = apps.get_model("certificates", "Certificate")
+    BackgroundJob = apps.get_model("common", "BackgroundJob")
+    Certificate.objects.exclude(document__isnull=True).exclude(document="").update(document_status="ready")
+    missing = Certificate.objects.filter(document_status="pending").values_list("pk", flat=True)
+    BackgroundJob.objects.bulk_create(
+        [
+            BackgroundJob(
+                task="certificates.render_document",
+                payload={"certificate_id": str(pk)},
+                unique_key=str(pk),
+            )
+            for pk in missing.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0002_add_certificate_keyset_index'),
+        ('common', '0005_add_background_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='document_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', help_text='The PDF is rendered by a background job after every change.', max_length=16),
+        ),
+        migrations.RunPython(backfill_document_status, migrations.RunPython.noop),
+    ]
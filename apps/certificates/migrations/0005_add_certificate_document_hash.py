@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0004_add_certificate_issuance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='document_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Fingerprint of the inputs the stored document was rendered from.', max_length=64),
+        ),
+    ]
@@ -1,14 +1,23 @@
 """Certificate of Insurance domain models."""
 from __future__ import annotations
 
+import string
+from collections.abc import Callable
 from pathlib import PurePosixPath
+from typing import TypeVar
 
 from django.conf import settings as django_settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils.crypto import get_random_string
 
 from apps.common.models import BaseModel
 
+VERIFICATION_CODE_LENGTH = 12
+VERIFICATION_CODE_ALPHABET = string.ascii_uppercase + string.digits
+VERIFICATION_CODE_ATTEMPTS = 3
+
+T = TypeVar("T")
+
 
 def certificate_document_upload_to(instance: "Certificate", filename: str) -> str:
     """Store generated certificates grouped by client and policy."""
@@ -80,9 +89,42 @@ class MasterCertificate(BaseModel):
         return f"{self.name} ({self.policy})"
 
 
+class CertificateIssuance(BaseModel):
+    """One bulk issuance of a master certificate to many holders.
+
+    Its id is the handle clients poll for progress: the counts of the issued
+    certificates whose documents are still pending, ready or failed.
+    """
+
+    master_certificate = models.ForeignKey(
+        MasterCertificate,
+        related_name="issuances",
+        on_delete=models.CASCADE,
+    )
+    total = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(
+        django_settings.AUTH_USER_MODEL,
+        related_name="certificate_issuances",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self) -> str:  # pragma: no cover - formatting helper
+        return f"{self.master_certificate} x{self.total}"
+
+
 class Certificate(BaseModel):
     """Issued certificate of insurance derived from a master template."""
 
+    class DocumentStatus(models.TextChoices):
+        PENDING = "pending", "Pending"
+        READY = "ready", "Ready"
+        FAILED = "failed", "Failed"
+
     master_certificate = models.ForeignKey(
         MasterCertificate,
         related_name="certificates",
@@ -93,6 +135,13 @@ class Certificate(BaseModel):
         related_name="certificates",
         on_delete=models.PROTECT,
     )
+    issuance = models.ForeignKey(
+        CertificateIssuance,
+        related_name="certificates",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
     verification_code = models.CharField(max_length=20, unique=True, editable=False)
     document = models.FileField(
         upload_to=certificate_document_upload_to,
@@ -100,6 +149,19 @@ class Certificate(BaseModel):
         blank=True,
         null=True,
     )
+    document_status = models.CharField(
+        max_length=16,
+        choices=DocumentStatus.choices,
+        default=DocumentStatus.PENDING,
+        help_text="The PDF is rendered by a background job after every change.",
+    )
+    document_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Fingerprint of the inputs the stored document was rendered from.",
+    )
     created_by = models.ForeignKey(
         django_settings.AUTH_USER_MODEL,
         related_name="certificates_created",
@@ -130,21 +192,54 @@ class Certificate(BaseModel):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [models.Index(fields=["-created_at", "-id"])]
 
     def __str__(self) -> str:  # pragma: no cover - formatting helper
         return f"Certificate {self.verification_code}"
 
     def save(self, *args, **kwargs):
-        if not self.verification_code:
-            self.verification_code = self._generate_verification_code()
-        super().save(*args, **kwargs)
-
-    def _generate_verification_code(self) -> str:
-        candidate_length = 12
-        while True:
-            candidate = get_random_string(candidate_length).upper()
-            if not type(self).objects.filter(verification_code=candidate).exists():
-                return candidate
+        if self.verification_code:
+            super().save(*args, **kwargs)
+            return
+
+        def assign() -> None:
+            self.verification_code = generate_verification_codes(1)[0]
+
+        insert_with_verification_codes(
+            assign, lambda: super(Certificate, self).save(*args, **kwargs)
+        )
+
+
+def generate_verification_codes(count: int) -> list[str]:
+    """Return ``count`` distinct random verification codes without touching the database.
+
+    Codes carry about 62 random bits (12 characters of ``A-Z0-9``), so a clash with an
+    existing code is left to the unique index; see ``insert_with_verification_codes``.
+    """
+
+    codes: set[str] = set()
+    while len(codes) < count:
+        codes.add(get_random_string(VERIFICATION_CODE_LENGTH, VERIFICATION_CODE_ALPHABET))
+    return list(codes)
+
+
+def insert_with_verification_codes(assign: Callable[[], None], insert: Callable[[], T]) -> T:
+    """Run ``insert`` after ``assign`` gave the rows fresh codes, retrying on a code clash.
+
+    Each attempt runs in a savepoint so a duplicate code only rolls back the insert
+    itself; other integrity errors, or a clash on the last attempt, propagate.
+    """
+
+    attempt = 1
+    while True:
+        assign()
+        try:
+            with transaction.atomic():
+                return insert()
+        except IntegrityError as exc:
+            if attempt >= VERIFICATION_CODE_ATTEMPTS or "verification_code" not in str(exc):
+                raise
+            attempt += 1
 
 
 class CertificateVehicle(BaseModel):
@@ -0,0 +1,185 @@
+"""Precompiled PDF templates for certificate documents.
+
+A certificate PDF is always the same skeleton (catalog, font, one page object per page,
+the pages tree) around text that changes per certificate. ``PdfTemplate`` serializes the
+fixed objects once per page layout, together with their byte offsets and xref entries,
+and ``stream`` only adds the per-page objects, the pages tree and the xref tail. Pages
+are yielded as they are completed, so a PDF can be written to storage or sent in a
+``StreamingHttpResponse`` without holding the whole document in memory.
+
+Object layout::
+
+    1  catalog (fixed)        3  pages tree (written last, lists the pages)
+    2  Helvetica font (fixed) 4, 6, 8...  page objects; 5, 7, 9...  their content streams
+
+Text is emitted with the ``TL`` (leading) and ``'`` (next line and show) operators, so a
+line costs one escaped string instead of a positioned text block. Lines that do not fit
+on a page continue on the next one.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from typing import Any
+
+PAGE_SIZES = {
+    "letter": (612, 792),
+    "legal": (612, 1008),
+    "a4": (595, 842),
+}
+DEFAULT_PAGE_SIZE = "letter"
+DEFAULT_FONT_SIZE = 12
+MARGIN_LEFT = 50
+MARGIN_TOP = 32
+MARGIN_BOTTOM = 40
+
+_FIRST_PAGE_ID = 4
+# Part of every document fingerprint: bump it when the same lines would render differently.
+TEMPLATE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class PageLayout:
+    """Geometry of the generated pages; hashable so templates can be cached per layout."""
+
+    width: int
+    height: int
+    font_size: int
+    line_height: int
+
+    @classmethod
+    def from_settings(cls, settings: Mapping[str, Any] | None) -> PageLayout:
+        """Read ``page_size`` and ``font_size`` from master certificate settings.
+
+        Unknown or out-of-range values fall back to the defaults (US Letter, 12 pt).
+        """
+
+        settings = settings or {}
+        width, height = PAGE_SIZES.get(
+            str(settings.get("page_size", "")).lower(), PAGE_SIZES[DEFAULT_PAGE_SIZE]
+        )
+        font_size = settings.get("font_size", DEFAULT_FONT_SIZE)
+        if (
+            not isinstance(font_size, int)
+            or isinstance(font_size, bool)
+            or not 6 <= font_size <= 24
+        ):
+            font_size = DEFAULT_FONT_SIZE
+        return cls(
+            width=width, height=height, font_size=font_size, line_height=round(font_size * 4 / 3)
+        )
+
+    @property
+    def lines_per_page(self) -> int:
+        return max(1, (self.height - MARGIN_TOP - MARGIN_BOTTOM) // self.line_height)
+
+
+def _object(number: int, body: bytes) -> bytes:
+    return b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+
+class PdfTemplate:
+    """The serialized fixed part of a certificate PDF for one ``PageLayout``."""
+
+    def __init__(self, layout: PageLayout) -> None:
+        self.layout = layout
+        self.lines_per_page = layout.lines_per_page
+
+        prefix = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in (
+            (1, b"<< /Type /Catalog /Pages 3 0 R >>"),
+            (2, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"),
+        ):
+            offsets.append(len(prefix))
+            prefix += _object(number, body)
+        self.prefix = bytes(prefix)
+        self.fixed_xref = b"0000000000 65535 f \n" + b"".join(
+            b"%010d 00000 n \n" % offset for offset in offsets
+        )
+
+        self.page_object = (
+            b"%%d 0 obj\n<< /Type /Page /Parent 3 0 R /MediaBox [0 0 %d %d] "
+            b"/Contents %%d 0 R /Resources << /Font << /F1 2 0 R >> >> >>\nendobj\n"
+            % (layout.width, layout.height)
+        )
+        # ``'`` moves down one leading before showing text, so start one line above the first.
+        first_baseline = layout.height - MARGIN_TOP
+        self.text_start = (
+            f"BT /F1 {layout.font_size} Tf {layout.line_height} TL "
+            f"{MARGIN_LEFT} {first_baseline} Td\n"
+        )
+
+    def _content(self, lines: Sequence[str]) -> bytes:
+        if not lines:
+            return (self.text_start + "ET").encode("latin-1")
+        # Escape the page in one pass, then turn each line break into "show, next line".
+        text = "\n".join(lines).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        body = "(" + text.replace("\n", ") '\n(") + ") '\n"
+        return (self.text_start + body + "ET").encode("latin-1", "replace")
+
+    def stream(self, lines: Iterable[str]) -> Iterator[bytes]:
+        """Yield the PDF showing ``lines`` top to bottom, one chunk per page.
+
+        ``lines`` is consumed a page at a time, so memory is bounded by the page size
+        rather than the number of lines; only the object offsets are kept until the
+        xref table is written at the end.
+        """
+
+        per_page = self.lines_per_page
+        lines = iter(lines)
+        position = len(self.prefix)
+        yield self.prefix
+
+        offsets: list[int] = []
+        page_id = _FIRST_PAGE_ID
+        chunk = list(islice(lines, per_page))
+        while True:
+            stream = self._content(chunk)
+            page = self.page_object % (page_id, page_id + 1)
+            content = b"%d 0 obj\n<< /Length %d >>\nstream\n%s\nendstream\nendobj\n" % (
+                page_id + 1,
+                len(stream),
+                stream,
+            )
+            offsets += (position, position + len(page))
+            position += len(page) + len(content)
+            yield page + content
+            page_id += 2
+            chunk = list(islice(lines, per_page))
+            if not chunk:
+                break
+
+        page_count = len(offsets) // 2
+        kids = b" ".join(b"%d 0 R" % (_FIRST_PAGE_ID + 2 * index) for index in range(page_count))
+        pages = _object(3, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, page_count))
+        size = _FIRST_PAGE_ID + len(offsets)
+        yield b"".join(
+            [
+                pages,
+                b"xref\n0 %d\n" % size,
+                self.fixed_xref,
+                b"%010d 00000 n \n" % position,
+                *[b"%010d 00000 n \n" % offset for offset in offsets],
+                b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF"
+                % (size, position + len(pages)),
+            ]
+        )
+
+    def render(self, lines: Iterable[str]) -> bytes:
+        """Return the whole PDF at once; see ``stream``."""
+
+        return b"".join(self.stream(lines))
+
+
+@lru_cache(maxsize=64)
+def _template(layout: PageLayout) -> PdfTemplate:
+    return PdfTemplate(layout)
+
+
+def template_for(settings: Mapping[str, Any] | None) -> PdfTemplate:
+    """The cached template for a master certificate's ``settings``."""
+
+    return _template(PageLayout.from_settings(settings))
@@ -3,7 +3,6 @@ from __future__ import annotations
 
 from typing import Any
 
-from django.core.files.base import ContentFile
 from django.db import transaction
 from rest_framework import serializers
 
@@ -11,10 +10,11 @@ from apps.accounts.models import User
 from apps.assets.models import Driver, Vehicle
 from apps.clients.models import Address
 from apps.clients.serializers import AddressSerializer
+from apps.common.fieldsets import SparseFieldsetSerializerMixin
 from apps.policies.models import Policy
 
-from .models import Certificate, CertificateHolder, MasterCertificate
-from .services import render_certificate_pdf
+from .models import Certificate, CertificateHolder, CertificateIssuance, MasterCertificate
+from .services import issue_certificates, schedule_document
 
 
 class UserSummarySerializer(serializers.ModelSerializer):
@@ -26,7 +26,7 @@ class UserSummarySerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class CertificateHolderSerializer(serializers.ModelSerializer):
+class CertificateHolderSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     address = AddressSerializer()
 
     class Meta:
@@ -70,7 +70,7 @@ class PolicySummarySerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class MasterCertificateSerializer(serializers.ModelSerializer):
+class MasterCertificateSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     policy = PolicySummarySerializer(read_only=True)
     policy_id = serializers.PrimaryKeyRelatedField(
         queryset=Policy.objects.filter(is_active=True),
@@ -126,7 +126,7 @@ class DriverSummarySerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class CertificateSerializer(serializers.ModelSerializer):
+class CertificateSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     master_certificate = MasterCertificateSerializer(read_only=True)
     master_certificate_id = serializers.PrimaryKeyRelatedField(
         queryset=MasterCertificate.objects.filter(is_active=True),
@@ -167,6 +167,7 @@ class CertificateSerializer(serializers.ModelSerializer):
             "certificate_holder_id",
             "verification_code",
             "document",
+            "document_status",
             "vehicles",
             "vehicle_ids",
             "drivers",
@@ -183,6 +184,7 @@ class CertificateSerializer(serializers.ModelSerializer):
             "certificate_holder",
             "verification_code",
             "document",
+            "document_status",
             "vehicles",
             "drivers",
             "created_by",
@@ -191,6 +193,8 @@ class CertificateSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        # Left out of sparse fieldsets (``?fields=`` / ``?expand=``) unless asked for.
+        expandable_fields = ("master_certificate", "vehicles", "drivers")
 
     def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
         master = attrs.get("master_certificate") or getattr(self.instance, "master_certificate", None)
@@ -217,7 +221,7 @@ class CertificateSerializer(serializers.ModelSerializer):
                 certificate.vehicles.set(vehicle_objects)
             if driver_objects:
                 certificate.drivers.set(driver_objects)
-            self._refresh_document(certificate)
+            schedule_document(certificate)
         return certificate
 
     def update(self, instance: Certificate, validated_data: dict[str, Any]) -> Certificate:
@@ -226,6 +230,7 @@ class CertificateSerializer(serializers.ModelSerializer):
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
+        instance.document_status = Certificate.DocumentStatus.PENDING
 
         with transaction.atomic():
             instance.save()
@@ -233,15 +238,97 @@ class CertificateSerializer(serializers.ModelSerializer):
                 instance.vehicles.set(vehicle_objects)
             if driver_objects is not None:
                 instance.drivers.set(driver_objects)
-            self._refresh_document(instance)
+            schedule_document(instance)
         return instance
 
-    def _refresh_document(self, certificate: Certificate) -> None:
-        vehicles = list(certificate.vehicles.select_related("client").all())
-        drivers = list(certificate.drivers.select_related("client").all())
-        payload = render_certificate_pdf(certificate, vehicles=vehicles, drivers=drivers)
-        if certificate.document:
-            certificate.document.delete(save=False)
-        filename = f"certificate-{certificate.verification_code}.pdf"
-        certificate.document.save(filename, ContentFile(payload), save=False)
-        certificate.save(update_fields=["document", "updated_at"])
+
+class CertificateIssuanceSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """Bulk issuance of one master certificate to many holders, with render progress.
+
+    Holders, vehicles and drivers are each resolved with one query (see
+    ``issue_certificates`` for the writes).
+    """
+
+    MAX_HOLDERS = 500
+
+    master_certificate_id = serializers.PrimaryKeyRelatedField(
+        queryset=MasterCertificate.objects.filter(is_active=True).select_related("policy"),
+        source="master_certificate",
+    )
+    certificate_holder_ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=MAX_HOLDERS, write_only=True
+    )
+    vehicle_ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, write_only=True
+    )
+    driver_ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, write_only=True
+    )
+    pending = serializers.IntegerField(read_only=True)
+    ready = serializers.IntegerField(read_only=True)
+    failed = serializers.IntegerField(read_only=True)
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CertificateIssuance
+        fields = (
+            "id",
+            "master_certificate_id",
+            "certificate_holder_ids",
+            "vehicle_ids",
+            "driver_ids",
+            "total",
+            "pending",
+            "ready",
+            "failed",
+            "status",
+            "created_at",
+        )
+        read_only_fields = ("id", "total", "created_at")
+
+    def get_status(self, obj: CertificateIssuance) -> str:
+        pending = getattr(obj, "pending", None)
+        if pending is None or pending:
+            return "rendering"
+        return "completed"
+
+    def _resolve(self, model, ids, *, noun: str, client_id=None) -> list:
+        ids = list(dict.fromkeys(ids))
+        found = {obj.pk: obj for obj in model.objects.filter(pk__in=ids, is_active=True)}
+        errors = {}
+        for pk in ids:
+            obj = found.get(pk)
+            if obj is None:
+                errors[str(pk)] = f"{noun} does not exist."
+            elif client_id is not None and obj.client_id != client_id:
+                errors[str(pk)] = f"{noun} does not belong to the policy client."
+        if errors:
+            raise serializers.ValidationError(errors)
+        return [found[pk] for pk in ids]
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        client_id = attrs["master_certificate"].policy.client_id
+        errors = {}
+        for field, model, noun, owner in (
+            ("certificate_holder_ids", CertificateHolder, "Certificate holder", None),
+            ("vehicle_ids", Vehicle, "Vehicle", client_id),
+            ("driver_ids", Driver, "Driver", client_id),
+        ):
+            try:
+                attrs[field] = self._resolve(
+                    model, attrs.get(field, []), noun=noun, client_id=owner
+                )
+            except serializers.ValidationError as exc:
+                errors[field] = exc.detail
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data: dict[str, Any]) -> CertificateIssuance:
+        return issue_certificates(
+            validated_data["master_certificate"],
+            validated_data["certificate_holder_ids"],
+            vehicles=validated_data["vehicle_ids"],
+            drivers=validated_data["driver_ids"],
+            user=validated_data.get("created_by"),
+        )
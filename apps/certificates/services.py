@@ -1,90 +1,76 @@
-"""Utilities for generating certificate documents."""
-from __future__ import annotations
-
-from typing import Iterable
-
-from django.utils import timezone
-
-from apps.certificates.models import Certificate
+"""Utilities for generating certificate documents.
 
+Documents are rendered outside the request: saving a certificate marks its document
+``pending`` and queues a ``certificates.render_document`` job (see ``tasks``), which
+streams the PDF page by page into storage without holding a transaction open and then
+records it with a single UPDATE.
 
-def _escape_pdf_text(content: str) -> str:
-    return content.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+Each stored document carries the fingerprint of its inputs (``document_fingerprint``).
+A job whose fingerprint matches the stored one only marks the document ready again, so
+edits that do not change what the PDF shows cost neither a render nor an upload.
+"""
+from __future__ import annotations
 
+import hashlib
+import tempfile
+from collections.abc import Iterable, Iterator
+from functools import partial
+from typing import Any
 
-def _build_pdf(lines: list[str]) -> bytes:
-    objects: list[bytes] = []
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
 
-    # Catalog
-    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
-    # Pages
-    objects.append(b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>")
+from apps.certificates.models import (
+    Certificate,
+    CertificateDriver,
+    CertificateHolder,
+    CertificateIssuance,
+    CertificateVehicle,
+    MasterCertificate,
+    generate_verification_codes,
+    insert_with_verification_codes,
+)
+from apps.certificates.pdf import TEMPLATE_VERSION, PageLayout, template_for
+from apps.common.jobs import enqueue, enqueue_many
+from apps.common.models import ActivityLog
+from apps.common.services import format_timestamp, log_activity, user_display_name
+from apps.lookups.cache import get_version
+from apps.lookups.models import PolicyStatus
 
-    # Content stream will be object 4
-    # Page references content stream object 4 and Helvetica font (object 5)
-    page_dict = (
-        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
-        b"/Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>"
-    )
-    objects.append(page_dict)
-
-    line_height = 16
-    y_position = 760
-    content_segments = []
-    for raw_line in lines:
-        safe_line = _escape_pdf_text(raw_line)
-        segment = f"BT /F1 12 Tf 50 {y_position} Td ({safe_line}) Tj ET"
-        content_segments.append(segment)
-        y_position -= line_height
-
-    content_stream = "\n".join(content_segments).encode("latin-1")
-    stream_obj = (
-        f"<< /Length {len(content_stream)} >>\nstream\n".encode("latin-1")
-        + content_stream
-        + b"\nendstream"
-    )
-    objects.append(stream_obj)
-
-    # Font definition
-    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
-
-    pdf = bytearray(b"%PDF-1.4\n")
-    offsets = [0]
-
-    for index, obj in enumerate(objects, start=1):
-        offsets.append(len(pdf))
-        pdf.extend(f"{index} 0 obj\n".encode("latin-1"))
-        pdf.extend(obj if isinstance(obj, (bytes, bytearray)) else obj.encode("latin-1"))
-        pdf.extend(b"\nendobj\n")
-
-    xref_offset = len(pdf)
-    total_objects = len(objects) + 1
-    pdf.extend(f"xref\n0 {total_objects}\n".encode("latin-1"))
-    pdf.extend(b"0000000000 65535 f \n")
-    for offset in offsets[1:]:
-        pdf.extend(f"{offset:010d} 00000 n \n".encode("latin-1"))
-
-    pdf.extend(
-        (
-            "trailer\n"
-            f"<< /Size {total_objects} /Root 1 0 R >>\n"
-            "startxref\n"
-            f"{xref_offset}\n"
-            "%%EOF"
-        ).encode("latin-1")
-    )
+RENDER_TASK = "certificates.render_document"
+# Bulk renders yield to certificates issued one at a time (lower runs first).
+BULK_RENDER_PRIORITY = 10
+# Vehicles and drivers are read from the database this many rows at a time while rendering.
+SCHEDULE_CHUNK_SIZE = 500
+SCHEDULE_VEHICLE_FIELDS = ("id", "unit_number", "vin", "year", "make", "model", "pd_amount")
+SCHEDULE_DRIVER_FIELDS = ("id", "first_name", "last_name", "license_state", "license_number")
+SPOOL_MAX_SIZE = 1024 * 1024
+DOCUMENT_CACHE_KEY = "certificates:document-cache:{outcome}"
+# Policy status names are lookups: keying on their table version drops every cached
+# answer when a status is renamed or deactivated.
+VERIFY_CACHE_KEY = "certificates:verify:{status_version}:{code}"
+# Holder address fields a verify answer shows.
+VERIFY_ADDRESS_FIELDS = frozenset({"city", "state"})
+_CODE_MAX_LENGTH = Certificate._meta.get_field("verification_code").max_length
 
-    return bytes(pdf)
 
+def iter_certificate_lines(
+    certificate: Certificate, *, vehicles: Iterable, drivers: Iterable
+) -> Iterator[str]:
+    """The text lines of a certificate's PDF summary, top to bottom.
 
-def render_certificate_pdf(certificate: Certificate, *, vehicles: Iterable, drivers: Iterable) -> bytes:
-    """Render a lightweight PDF summary for a certificate."""
+    ``vehicles`` and ``drivers`` are iterated once and never materialized, so they can
+    be queryset iterators over fleets of any size.
+    """
 
     policy = certificate.master_certificate.policy
     holder = certificate.certificate_holder
     issued_at = timezone.localtime(certificate.created_at)
 
-    lines = [
+    yield from (
         "Insurance Management System",
         "Certificate of Insurance",
         "",
@@ -95,47 +81,372 @@ def render_certificate_pdf(certificate: Certificate, *, vehicles: Iterable, driv
         "",
         "Certificate Holder:",
         f"  {holder.name}",
-    ]
+    )
 
     if holder.contact_person:
-        lines.append(f"  Contact: {holder.contact_person}")
+        yield f"  Contact: {holder.contact_person}"
     if holder.email:
-        lines.append(f"  Email: {holder.email}")
+        yield f"  Email: {holder.email}"
     if holder.phone_number:
-        lines.append(f"  Phone: {holder.phone_number}")
+        yield f"  Phone: {holder.phone_number}"
 
     address = holder.address
-    lines.append(
-        f"  Address: {address.street_address}, {address.city}, {address.state} {address.zip_code}"
+    yield f"  Address: {address.street_address}, {address.city}, {address.state} {address.zip_code}"
+
+    yield ""
+    yield "Vehicles"
+    empty = True
+    for vehicle in vehicles:
+        empty = False
+        pd_value = f" (PD ${vehicle.pd_amount:,.2f})" if getattr(vehicle, "pd_amount", None) else ""
+        label = vehicle.unit_number or vehicle.vin
+        yield f"  {label} - {vehicle.year} {vehicle.make} {vehicle.model}{pd_value}"
+    if empty:
+        yield "  None selected"
+
+    yield ""
+    yield "Drivers"
+    empty = True
+    for driver in drivers:
+        empty = False
+        license_id = f"{driver.license_state} {driver.license_number}"
+        yield f"  {driver.first_name} {driver.last_name} - License {license_id}"
+    if empty:
+        yield "  None selected"
+
+    yield ""
+    yield "Verification"
+    yield "  Present this certificate along with the verification code for authenticity checks."
+
+
+def certificate_lines(
+    certificate: Certificate, *, vehicles: Iterable, drivers: Iterable
+) -> list[str]:
+    return list(iter_certificate_lines(certificate, vehicles=vehicles, drivers=drivers))
+
+
+def stream_certificate_pdf(
+    certificate: Certificate, *, vehicles: Iterable, drivers: Iterable
+) -> Iterator[bytes]:
+    """Yield a certificate's PDF page by page.
+
+    Uses the precompiled template for the master certificate's settings; long vehicle
+    and driver schedules continue on additional pages. The chunks can be written to a
+    file or passed to a ``StreamingHttpResponse``.
+    """
+
+    template = template_for(certificate.master_certificate.settings)
+    return template.stream(iter_certificate_lines(certificate, vehicles=vehicles, drivers=drivers))
+
+
+def render_certificate_pdf(
+    certificate: Certificate, *, vehicles: Iterable, drivers: Iterable
+) -> bytes:
+    """Render a lightweight PDF summary for a certificate in one piece."""
+
+    return b"".join(stream_certificate_pdf(certificate, vehicles=vehicles, drivers=drivers))
+
+
+def _schedules(certificate: Certificate) -> dict[str, Iterator]:
+    return {
+        "vehicles": certificate.vehicles.only(*SCHEDULE_VEHICLE_FIELDS).iterator(
+            chunk_size=SCHEDULE_CHUNK_SIZE
+        ),
+        "drivers": certificate.drivers.only(*SCHEDULE_DRIVER_FIELDS).iterator(
+            chunk_size=SCHEDULE_CHUNK_SIZE
+        ),
+    }
+
+
+def stream_certificate_document(certificate: Certificate) -> Iterator[bytes]:
+    """Stream the PDF of a saved certificate, reading its schedules in chunks."""
+
+    return stream_certificate_pdf(certificate, **_schedules(certificate))
+
+
+def document_fingerprint(certificate: Certificate) -> str:
+    """SHA-256 of everything the certificate's PDF is rendered from.
+
+    Covers the template version, the page layout and the text lines themselves (holder
+    and address, policy, verification code, vehicle and driver schedules), so two
+    renders with the same fingerprint produce the same document.
+    """
+
+    layout = PageLayout.from_settings(certificate.master_certificate.settings)
+    digest = hashlib.sha256(f"v{TEMPLATE_VERSION}:{layout!r}\n".encode())
+    for line in iter_certificate_lines(certificate, **_schedules(certificate)):
+        digest.update(line.encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def _count_document_cache(outcome: str) -> None:
+    key = DOCUMENT_CACHE_KEY.format(outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def document_cache_stats() -> dict[str, Any]:
+    """Hits and misses of the document cache across all job workers."""
+
+    keys = {outcome: DOCUMENT_CACHE_KEY.format(outcome=outcome) for outcome in ("hits", "misses")}
+    found = cache.get_many(list(keys.values()))
+    stats: dict[str, Any] = {outcome: int(found.get(key, 0)) for outcome, key in keys.items()}
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / total, 4) if total else None
+    return stats
+
+
+def schedule_document(certificate: Certificate) -> None:
+    """Queue (re)rendering of the certificate's PDF in the current transaction."""
+
+    if certificate.document_status != Certificate.DocumentStatus.PENDING:
+        Certificate.objects.filter(pk=certificate.pk).update(document_status=Certificate.DocumentStatus.PENDING)
+        certificate.document_status = Certificate.DocumentStatus.PENDING
+    enqueue(RENDER_TASK, {"certificate_id": str(certificate.pk)}, unique_key=str(certificate.pk))
+
+
+def render_certificate_document(certificate_id: Any) -> Certificate | None:
+    """Render and store the PDF of one certificate; returns ``None`` if it no longer exists."""
+
+    certificate = (
+        Certificate.objects.select_related(
+            "master_certificate__policy__client",
+            "certificate_holder__address",
+        )
+        .filter(pk=certificate_id)
+        .first()
     )
+    if certificate is None:
+        return None
 
-    lines.append("")
-    lines.append("Vehicles")
-    vehicle_list = list(vehicles)
-    if vehicle_list:
-        for vehicle in vehicle_list:
-            pd_value = (
-                f" (PD ${vehicle.pd_amount:,.2f})" if getattr(vehicle, "pd_amount", None) else ""
-            )
-            lines.append(
-                f"  {vehicle.unit_number or vehicle.vin} - {vehicle.year} {vehicle.make} {vehicle.model}{pd_value}"
+    fingerprint = document_fingerprint(certificate)
+    if certificate.document and certificate.document_hash == fingerprint:
+        # Nothing the PDF shows has changed: keep the stored file.
+        _count_document_cache("hits")
+        Certificate.objects.filter(pk=certificate.pk).update(
+            document_status=Certificate.DocumentStatus.READY, updated_at=timezone.now()
+        )
+        certificate.document_status = Certificate.DocumentStatus.READY
+        return certificate
+
+    _count_document_cache("misses")
+    previous = certificate.document.name if certificate.document else None
+    # Content-addressed name: a new file for every distinct rendering.
+    filename = f"certificate-{certificate.verification_code}-{fingerprint[:16]}.pdf"
+    # Pages are spooled (to disk once past SPOOL_MAX_SIZE) rather than joined in memory;
+    # the storage write, possibly a slow network upload, happens with no transaction open.
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+        for chunk in stream_certificate_document(certificate):
+            spool.write(chunk)
+        spool.seek(0)
+        certificate.document.save(filename, File(spool), save=False)
+    Certificate.objects.filter(pk=certificate.pk).update(
+        document=certificate.document.name,
+        document_hash=fingerprint,
+        document_status=Certificate.DocumentStatus.READY,
+        updated_at=timezone.now(),
+    )
+    if previous and previous != certificate.document.name:
+        certificate.document.storage.delete(previous)
+    certificate.document_hash = fingerprint
+    certificate.document_status = Certificate.DocumentStatus.READY
+    return certificate
+
+
+def mark_document_failed(certificate_id: Any) -> None:
+    Certificate.objects.filter(pk=certificate_id).update(document_status=Certificate.DocumentStatus.FAILED)
+
+
+def issue_certificates(
+    master: MasterCertificate,
+    holders: list[CertificateHolder],
+    *,
+    vehicles: Iterable = (),
+    drivers: Iterable = (),
+    user=None,
+) -> CertificateIssuance:
+    """Issue ``master`` to every holder in one transaction with a fixed number of queries.
+
+    Verification codes are generated without queries, certificates and their vehicle/driver
+    rows are bulk inserted, and one render job per certificate is queued for the job
+    workers. A single timeline entry records the issuance.
+    """
+
+    vehicles, drivers = list(vehicles), list(drivers)
+    user_id = getattr(user, "pk", None)
+    with transaction.atomic():
+        issuance = CertificateIssuance.objects.create(
+            master_certificate=master, total=len(holders), created_by_id=user_id
+        )
+        certificates = [
+            Certificate(
+                master_certificate=master,
+                certificate_holder=holder,
+                issuance=issuance,
+                created_by_id=user_id,
+                updated_by_id=user_id,
             )
-    else:
-        lines.append("  None selected")
-
-    lines.append("")
-    lines.append("Drivers")
-    driver_list = list(drivers)
-    if driver_list:
-        for driver in driver_list:
-            lines.append(f"  {driver.first_name} {driver.last_name} - License {driver.license_state} {driver.license_number}")
-    else:
-        lines.append("  None selected")
-
-    lines.append("")
-    lines.append("Verification")
-    lines.append(
-        "  Present this certificate along with the verification code for authenticity checks."
+            for holder in holders
+        ]
+
+        def assign_codes() -> None:
+            codes = generate_verification_codes(len(certificates))
+            for certificate, code in zip(certificates, codes, strict=True):
+                certificate.verification_code = code
+
+        insert_with_verification_codes(
+            assign_codes, lambda: Certificate.objects.bulk_create(certificates)
+        )
+        CertificateVehicle.objects.bulk_create(
+            [
+                CertificateVehicle(certificate=certificate, vehicle=vehicle)
+                for certificate in certificates
+                for vehicle in vehicles
+            ],
+            batch_size=1000,
+        )
+        CertificateDriver.objects.bulk_create(
+            [
+                CertificateDriver(certificate=certificate, driver=driver)
+                for certificate in certificates
+                for driver in drivers
+            ],
+            batch_size=1000,
+        )
+        enqueue_many(
+            RENDER_TASK,
+            [{"certificate_id": str(certificate.pk)} for certificate in certificates],
+            unique_keys=[str(certificate.pk) for certificate in certificates],
+            priority=BULK_RENDER_PRIORITY,
+        )
+
+    policy = master.policy
+    log_activity(
+        ActivityLog.ActionType.CERTIFICATE_CREATED,
+        f"Certificates Issued: {master.name}",
+        description=(
+            f"{len(certificates)} certificates of {master.name} were issued "
+            f"on {format_timestamp(issuance.created_at)} by {user_display_name(user)}"
+        ),
+        client_id=policy.client_id,
+        policy=policy,
+        performed_by=user,
+        metadata={
+            "event": "bulk_issued",
+            "issuance": str(issuance.pk),
+            "certificates": len(certificates),
+            "vehicles": len(vehicles),
+            "drivers": len(drivers),
+        },
     )
+    return issuance
+
+
+def verify_certificate(code: str) -> dict[str, Any] | None:
+    """Public validity summary of the certificate printed with ``code``, or ``None``.
+
+    The certificate, policy and holder data is cached per code (unknown codes too) and
+    dropped by ``invalidate_verifications`` whenever one of them changes, or by a new
+    policy status lookup version, so a hit does not touch the database. Whether the
+    policy is in force today is decided per request from the cached dates. Input that
+    cannot be a code never reaches the cache or the database.
+    """
+
+    code = code.strip().upper()
+    if not (code.isascii() and code.isalnum()) or len(code) > _CODE_MAX_LENGTH:
+        return None
+
+    key = VERIFY_CACHE_KEY.format(status_version=get_version(PolicyStatus), code=code)
+    record = cache.get(key)
+    if record is None:
+        certificate = (
+            Certificate.objects.select_related(
+                "master_certificate__policy__status", "certificate_holder__address"
+            )
+            .filter(verification_code=code)
+            .first()
+        )
+        record = {} if certificate is None else _verification_record(certificate)
+        cache.set(key, record, timeout=settings.CERTIFICATE_VERIFY_CACHE_TIMEOUT)
+    if not record:
+        return None
+
+    policy = record["policy"]
+    today = timezone.localdate().isoformat()
+    in_force = policy["is_active"] and policy["effective_date"] <= today <= policy["maturity_date"]
+    return {
+        "verification_code": record["verification_code"],
+        "valid": record["certificate_active"] and in_force,
+        "issued_at": record["issued_at"],
+        "policy": {
+            "policy_number": policy["policy_number"],
+            "status": policy["status"],
+            "effective_date": policy["effective_date"],
+            "maturity_date": policy["maturity_date"],
+            "in_force": in_force,
+        },
+        "certificate_holder": record["certificate_holder"],
+    }
+
+
+def _verification_record(certificate: Certificate) -> dict[str, Any]:
+    master = certificate.master_certificate
+    policy = master.policy
+    holder = certificate.certificate_holder
+    return {
+        "verification_code": certificate.verification_code,
+        "certificate_active": certificate.is_active and master.is_active,
+        "issued_at": certificate.created_at.isoformat(),
+        "policy": {
+            "policy_number": policy.policy_number,
+            "status": policy.status.name,
+            "is_active": policy.is_active,
+            "effective_date": policy.effective_date.isoformat(),
+            "maturity_date": policy.maturity_date.isoformat(),
+        },
+        "certificate_holder": {
+            "name": holder.name,
+            "city": holder.address.city,
+            "state": holder.address.state,
+        },
+    }
+
+
+def invalidate_verifications(codes: Iterable[str]) -> None:
+    """Drop the cached verify answers of ``codes``."""
+
+    status_version = get_version(PolicyStatus)
+    keys = [VERIFY_CACHE_KEY.format(status_version=status_version, code=code) for code in codes]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_verifications_around_commit(codes: list[str]) -> None:
+    """Drop the answers of ``codes`` now and again once the transaction commits.
+
+    The second pass discards answers another request may have cached from the
+    not-yet-committed state in between.
+    """
+
+    if codes:
+        invalidate_verifications(codes)
+        transaction.on_commit(partial(invalidate_verifications, codes))
+
+
+def invalidate_for_addresses(address_ids: Iterable[Any]) -> None:
+    """Drop the answers of certificates whose holder uses one of ``address_ids``.
+
+    For address writes that send no signals, such as the nested client sync; pass only
+    addresses whose ``VERIFY_ADDRESS_FIELDS`` changed.
+    """
 
-    return _build_pdf(lines)
+    address_ids = list(address_ids)
+    if not address_ids:
+        return
+    certificates = Certificate.objects.filter(certificate_holder__address_id__in=address_ids)
+    codes = list(certificates.values_list("verification_code", flat=True))
+    invalidate_verifications_around_commit(codes)
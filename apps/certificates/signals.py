@@ -0,0 +1,78 @@
+"""Signal handlers keeping cached certificate verifications in sync with the database.
+
+Only saves that change a value a verify answer shows drop cached answers. The related
+models keep a snapshot of just those fields, taken in ``post_init`` and compared in
+``post_save``, so unrelated edits (e.g. an address street, a policy premium) cost no
+query. Hard deletes need no receivers of their own: masters and policies cascade to
+their certificates, whose ``post_delete`` drops the answers, and holders and addresses
+are protected while certificates use them. Policy status names are covered by keying
+the cache on the status lookup version (see ``services.verify_certificate``).
+"""
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_init, post_save
+
+from apps.clients.models import Address
+from apps.policies.models import Policy
+
+from .models import Certificate, CertificateHolder, MasterCertificate
+from .services import VERIFY_ADDRESS_FIELDS, invalidate_verifications_around_commit
+
+SNAPSHOT_ATTR = "_verify_snapshot"
+
+# Fields of a certificate that its verify answer shows.
+_CERTIFICATE_FIELDS = frozenset(
+    {"verification_code", "is_active", "created_at", "master_certificate", "certificate_holder"}
+)
+
+# Path from Certificate to each related model and the fields of it a verify answer shows.
+_CERTIFICATE_PATHS = {
+    MasterCertificate: ("master_certificate", ("is_active", "policy_id")),
+    Policy: (
+        "master_certificate__policy",
+        ("policy_number", "status_id", "is_active", "effective_date", "maturity_date"),
+    ),
+    CertificateHolder: ("certificate_holder", ("name", "address_id")),
+    Address: ("certificate_holder__address", tuple(sorted(VERIFY_ADDRESS_FIELDS))),
+}
+
+
+def _shown_values(instance, attnames: tuple[str, ...]) -> dict:
+    values = instance.__dict__
+    return {attname: values[attname] for attname in attnames if attname in values}
+
+
+def capture_verify_snapshot(sender, instance, **kwargs) -> None:
+    setattr(instance, SNAPSHOT_ATTR, _shown_values(instance, _CERTIFICATE_PATHS[sender][1]))
+
+
+def invalidate_certificate(sender, instance, update_fields=None, **kwargs) -> None:
+    if update_fields is not None and _CERTIFICATE_FIELDS.isdisjoint(update_fields):
+        return
+    invalidate_verifications_around_commit([instance.verification_code])
+
+
+def invalidate_related(sender, instance, created, raw=False, **kwargs) -> None:
+    path, attnames = _CERTIFICATE_PATHS[sender]
+    snapshot = getattr(instance, SNAPSHOT_ATTR, {})
+    values = _shown_values(instance, attnames)
+    setattr(instance, SNAPSHOT_ATTR, values)
+    # A new row has no certificates yet. Fields missing from the snapshot were deferred
+    # when the row was loaded, so they count as changed.
+    unchanged = all(key in snapshot and snapshot[key] == value for key, value in values.items())
+    if created or raw or unchanged:
+        return
+    certificates = Certificate.objects.filter(**{path: instance.pk})
+    invalidate_verifications_around_commit(
+        list(certificates.values_list("verification_code", flat=True))
+    )
+
+
+def connect_signals() -> None:
+    uid = f"certificate-verify-{Certificate._meta.label_lower}"
+    post_save.connect(invalidate_certificate, sender=Certificate, dispatch_uid=f"{uid}-save")
+    post_delete.connect(invalidate_certificate, sender=Certificate, dispatch_uid=f"{uid}-delete")
+    for model in _CERTIFICATE_PATHS:
+        uid = f"certificate-verify-{model._meta.label_lower}"
+        post_init.connect(capture_verify_snapshot, sender=model, dispatch_uid=f"{uid}-init")
+        post_save.connect(invalidate_related, sender=model, dispatch_uid=f"{uid}-save")
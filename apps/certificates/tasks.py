@@ -0,0 +1,17 @@
+"""Background tasks of the certificate domain (run by ``manage.py process_jobs``)."""
+from __future__ import annotations
+
+from typing import Any
+
+from apps.common.jobs import task
+
+from .services import RENDER_TASK, mark_document_failed, render_certificate_document
+
+
+def _render_failed(payload: dict[str, Any], error: str) -> None:
+    mark_document_failed(payload["certificate_id"])
+
+
+@task(RENDER_TASK, max_attempts=3, on_failure=_render_failed)
+def render_document(payload: dict[str, Any]) -> None:
+    render_certificate_document(payload["certificate_id"])
@@ -1,12 +1,30 @@
+import io
+import os
+
 import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 
 from apps.accounts.models import User
 from apps.assets.models import Driver, Vehicle
-from apps.certificates.models import Certificate
-from apps.clients.models import Client
+from apps.certificates import models as certificate_models
+from apps.certificates.models import (
+    Certificate,
+    CertificateDriver,
+    CertificateHolder,
+    CertificateVehicle,
+    MasterCertificate,
+)
+from apps.certificates.pdf import template_for
+from apps.certificates.views import CertificateVerifyThrottle
+from apps.clients.models import Address, Client, ClientAddress
+from apps.common.models import BackgroundJob
 from apps.lookups.models import (
+    AddressType,
     BusinessType,
     FinanceCompany,
     InsuranceType,
@@ -190,10 +208,315 @@ def test_issue_certificate_generates_pdf(
     assert len(data["vehicles"]) == 1
     assert len(data["drivers"]) == 1
     assert data["verification_code"]
+    # The PDF is rendered by the job worker, outside the request.
+    assert (data["document"], data["document_status"]) == (None, "pending")
+
+    call_command("process_jobs", "--once", "--concurrency", "1", stdout=io.StringIO())
 
     certificate = Certificate.objects.get(id=data["id"])
+    assert certificate.document_status == Certificate.DocumentStatus.READY
     assert certificate.document.name.endswith(".pdf")
     stored_path = certificate.document.path
     with open(stored_path, "rb") as fp:
         content = fp.read()
     assert content.startswith(b"%PDF"), "Expected generated PDF document"
+
+
+def _process_jobs():
+    call_command("process_jobs", "--once", "--concurrency", "1", stdout=io.StringIO())
+
+
+def _rendered_certificate(api_client, policy, vehicle):
+    master = MasterCertificate.objects.create(
+        policy=policy, name="Primary Certificate", settings={"coverages": ["Auto Liability"]}
+    )
+    address = Address.objects.create(
+        street_address="100 Depot Rd", city="Dallas", state="TX", zip_code="75201"
+    )
+    holder = CertificateHolder.objects.create(name="Logistics Hub LLC", address=address)
+    payload = {
+        "master_certificate_id": str(master.pk),
+        "certificate_holder_id": str(holder.pk),
+        "vehicle_ids": [str(vehicle.pk)],
+    }
+    response = api_client.post(reverse("certificates:certificate-list"), payload, format="json")
+    assert response.status_code == 201, response.json()
+    _process_jobs()
+    return Certificate.objects.get(pk=response.json()["id"])
+
+
+@pytest.mark.django_db
+def test_certificate_pdf_is_streamed_from_storage(api_client, user, policy, client, vehicle_type):
+    api_client.force_authenticate(user=user)
+    vehicle = Vehicle.objects.create(
+        client=client, vin="1XPWD40X1ED999999", vehicle_type=vehicle_type, year=2024
+    )
+    certificate = _rendered_certificate(api_client, policy, vehicle)
+    with open(certificate.document.path, "rb") as fp:
+        content = fp.read()
+
+    response = api_client.get(reverse("certificates:certificate-pdf", args=[certificate.pk]))
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/pdf"
+    assert b"".join(response.streaming_content) == content
+
+
+@pytest.mark.django_db
+def test_certificate_pdf_is_reused_until_its_content_changes(
+    api_client, user, policy, client, vehicle_type
+):
+    api_client.force_authenticate(user=user)
+    vehicle = Vehicle.objects.create(
+        client=client, vin="1XPWD40X1ED999999", vehicle_type=vehicle_type, year=2024
+    )
+    certificate = _rendered_certificate(api_client, policy, vehicle)
+    stored_path = certificate.document.path
+    detail_url = reverse("certificates:certificate-detail", args=[certificate.pk])
+    stats_url = reverse("certificates:certificate-document-cache")
+    hits = api_client.get(stats_url).json()["hits"]
+
+    # Saving without changing anything the PDF shows keeps the stored file.
+    response = api_client.patch(detail_url, {"vehicle_ids": [str(vehicle.pk)]}, format="json")
+    assert response.status_code == 200, response.json()
+    _process_jobs()
+    certificate.refresh_from_db()
+    assert certificate.document_status == Certificate.DocumentStatus.READY
+    assert certificate.document.path == stored_path
+    assert api_client.get(stats_url).json()["hits"] == hits + 1
+
+    # Dropping the vehicle renders a new, content-addressed file and removes the old one.
+    api_client.patch(detail_url, {"vehicle_ids": []}, format="json")
+    _process_jobs()
+    certificate.refresh_from_db()
+    assert certificate.document.path != stored_path
+    assert certificate.document_hash[:16] in certificate.document.name
+    assert not os.path.exists(stored_path)
+
+
+def test_long_certificates_continue_on_new_pages_with_valid_xref():
+    template = template_for({"coverages": ["Auto Liability"]})
+    lines = ["Vehicles", *(f"  UNIT-{number} (PD $85,000.00)" for number in range(300))]
+
+    chunks = list(template.stream(iter(lines)))
+    pdf = b"".join(chunks)
+
+    assert template is template_for({"coverages": ["Auto Liability"]})
+    page_count = -(-len(lines) // template.lines_per_page)
+    assert page_count > 1
+    assert b"/Count %d" % page_count in pdf
+    assert pdf.count(b"/Type /Page ") == page_count
+    # Header, one chunk per page, then the pages tree and xref.
+    assert len(chunks) == page_count + 2
+    assert b"(  UNIT-299 \\(PD $85,000.00\\)) '" in pdf
+
+    xref_offset = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n", 1)[0])
+    xref = pdf[xref_offset:].split(b"trailer", 1)[0].splitlines()
+    assert xref[1] == b"0 %d" % (3 + 2 * page_count + 1)
+    for number, entry in enumerate(xref[3:], start=1):
+        offset = int(entry.split()[0])
+        assert pdf[offset:].startswith(b"%d 0 obj" % number)
+
+
+@pytest.mark.django_db
+def test_bulk_issuance_reports_progress_with_constant_queries(
+    api_client, user, policy, client, vehicle_type, license_class
+):
+    api_client.force_authenticate(user=user)
+    master = MasterCertificate.objects.create(policy=policy, name="Fleet Certificate")
+    address = Address.objects.create(
+        street_address="100 Depot Rd", city="Dallas", state="TX", zip_code="75201"
+    )
+    holders = [
+        CertificateHolder.objects.create(name=f"Holder {index}", address=address)
+        for index in range(15)
+    ]
+    vehicle = Vehicle.objects.create(
+        client=client, vin="1XPWD40X1ED999998", vehicle_type=vehicle_type, year=2024
+    )
+    driver = Driver.objects.create(
+        client=client,
+        first_name="Alex",
+        last_name="Johnson",
+        date_of_birth="1990-05-01",
+        license_number="TX7654321",
+        license_state="TX",
+        license_class=license_class,
+    )
+    url = reverse("certificates:certificate-issuance-list")
+
+    def issue(selected):
+        payload = {
+            "master_certificate_id": str(master.id),
+            "certificate_holder_ids": [str(holder.id) for holder in selected],
+            "vehicle_ids": [str(vehicle.id)],
+            "driver_ids": [str(driver.id)],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(url, payload, format="json")
+        assert response.status_code == 202, response.content
+        return response.json(), len(queries.captured_queries)
+
+    small, small_queries = issue(holders[:3])
+    large, large_queries = issue(holders[3:])
+    assert large_queries == small_queries
+    counts = (large["total"], large["pending"], large["ready"], large["status"])
+    assert counts == (12, 12, 0, "rendering")
+
+    issued = Certificate.objects.filter(issuance_id=large["id"])
+    assert len(set(issued.values_list("verification_code", flat=True))) == 12
+    assert CertificateVehicle.objects.filter(certificate__in=issued).count() == 12
+    assert CertificateDriver.objects.filter(certificate__in=issued).count() == 12
+    assert BackgroundJob.objects.filter(task="certificates.render_document").count() == 15
+
+    call_command("process_jobs", "--once", "--concurrency", "1", stdout=io.StringIO())
+
+    progress = api_client.get(
+        reverse("certificates:certificate-issuance-detail", args=[large["id"]])
+    ).json()
+    assert (progress["pending"], progress["ready"], progress["status"]) == (0, 12, "completed")
+
+    response = api_client.post(
+        url,
+        {"master_certificate_id": str(master.id), "certificate_holder_ids": [str(master.id)]},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert str(master.id) in response.json()["certificate_holder_ids"]
+
+
+@pytest.mark.django_db
+def test_verification_codes_retry_on_clash_and_verify_is_cached(
+    api_client, policy, monkeypatch, django_assert_num_queries
+):
+    master = MasterCertificate.objects.create(policy=policy, name="Primary Certificate")
+    address = Address.objects.create(
+        street_address="100 Depot Rd", city="Dallas", state="TX", zip_code="75201"
+    )
+    holder = CertificateHolder.objects.create(name="Logistics Hub LLC", address=address)
+    first = Certificate.objects.create(master_certificate=master, certificate_holder=holder)
+
+    # The first generated code is already taken: the insert is retried with the next one.
+    codes = iter([[first.verification_code], ["ZZZZ00000001"]])
+    monkeypatch.setattr(
+        certificate_models, "generate_verification_codes", lambda count: next(codes)
+    )
+    second = Certificate.objects.create(master_certificate=master, certificate_holder=holder)
+    assert second.verification_code == "ZZZZ00000001"
+    assert Certificate.objects.count() == 2
+
+    cache.clear()
+    url = reverse("certificates:certificate-verify", args=[second.verification_code.lower()])
+    response = api_client.get(url)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["policy"]["policy_number"] == policy.policy_number
+    assert body["valid"] is body["policy"]["in_force"]
+    assert body["certificate_holder"] == {
+        "name": "Logistics Hub LLC",
+        "city": "Dallas",
+        "state": "TX",
+    }
+    with django_assert_num_queries(0):
+        assert api_client.get(url).json() == body
+
+    # Changes to the holder, policy or certificate drop the cached answer.
+    holder.name = "Logistics Hub Inc"
+    holder.save()
+    assert api_client.get(url).json()["certificate_holder"]["name"] == "Logistics Hub Inc"
+    policy.policy_number = "POL-RENAMED"
+    policy.save()
+    assert api_client.get(url).json()["policy"]["policy_number"] == "POL-RENAMED"
+    second.is_active = False
+    second.save(update_fields=["is_active", "updated_at"])
+    assert api_client.get(url).json()["valid"] is False
+
+    unknown = reverse("certificates:certificate-verify", args=["NOPE00000000"])
+    malformed = reverse("certificates:certificate-verify", args=["not-a-code"])
+    assert api_client.get(unknown).status_code == 404
+    with django_assert_num_queries(0):
+        assert api_client.get(unknown).status_code == 404
+        assert api_client.get(malformed).status_code == 404
+
+
+@pytest.mark.django_db
+def test_verify_cache_follows_only_shown_changes(api_client, policy, django_assert_num_queries):
+    master = MasterCertificate.objects.create(policy=policy, name="Primary Certificate")
+    holder_address = Address.objects.create(
+        street_address="1 Hub Rd", city="Dallas", state="TX", zip_code="75201"
+    )
+    holder = CertificateHolder.objects.create(name="Logistics Hub LLC", address=holder_address)
+    certificate = Certificate.objects.create(master_certificate=master, certificate_holder=holder)
+    cache.clear()
+    url = reverse("certificates:certificate-verify", args=[certificate.verification_code])
+    assert api_client.get(url).status_code == 200
+
+    # Edits to fields the answer does not show neither query certificates nor drop it.
+    unrelated = Address.objects.create(
+        street_address="9 Yard", city="Austin", state="TX", zip_code="78701"
+    )
+    unrelated.street_address = "10 Yard"
+    holder_address = Address.objects.get(pk=holder_address.pk)
+    holder_address.street_address = "2 Hub Rd"
+    policy = Policy.objects.get(pk=policy.pk)
+    policy.notes = "Renewal pending"
+    with django_assert_num_queries(3):
+        unrelated.save()
+        holder_address.save()
+        policy.save()
+    with django_assert_num_queries(0):
+        api_client.get(url)
+
+    holder_address.city = "Fort Worth"
+    holder_address.save()
+    assert api_client.get(url).json()["certificate_holder"]["city"] == "Fort Worth"
+
+    status = policy.status
+    status.name = "Renamed Status"
+    status.save()
+    assert api_client.get(url).json()["policy"]["status"] == "Renamed Status"
+
+
+@pytest.mark.django_db
+def test_nested_client_address_update_drops_verify_cache(api_client, user, client, policy):
+    address = Address.objects.create(
+        street_address="1 Hub Rd", city="Dallas", state="TX", zip_code="75201"
+    )
+    address_type = AddressType.objects.filter(is_active=True).first()
+    link = ClientAddress.objects.create(client=client, address=address, address_type=address_type)
+    holder = CertificateHolder.objects.create(name="Logistics Hub LLC", address=address)
+    master = MasterCertificate.objects.create(policy=policy, name="Primary Certificate")
+    certificate = Certificate.objects.create(master_certificate=master, certificate_holder=holder)
+    cache.clear()
+    url = reverse("certificates:certificate-verify", args=[certificate.verification_code])
+    assert api_client.get(url).json()["certificate_holder"]["city"] == "Dallas"
+
+    api_client.force_authenticate(user=user)
+    payload = {
+        "addresses": [
+            {
+                "id": str(link.id),
+                "address": {
+                    "street_address": "1 Hub Rd",
+                    "city": "Houston",
+                    "state": "TX",
+                    "zip_code": "75201",
+                },
+            }
+        ]
+    }
+    client_url = reverse("clients:client-detail", args=[client.id])
+    response = api_client.patch(client_url, payload, format="json")
+    assert response.status_code == 200, response.content
+
+    assert api_client.get(url).json()["certificate_holder"]["city"] == "Houston"
+
+
+@pytest.mark.django_db
+def test_verify_endpoint_is_rate_limited_per_client(api_client, monkeypatch):
+    cache.clear()
+    monkeypatch.setattr(CertificateVerifyThrottle, "rate", "2/min", raising=False)
+    url = reverse("certificates:certificate-verify", args=["NOPE00000000"])
+
+    assert [api_client.get(url).status_code for _ in range(3)] == [404, 404, 429]
+    assert api_client.get(url, REMOTE_ADDR="10.0.0.2").status_code == 404
@@ -4,15 +4,23 @@ from __future__ import annotations
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import CertificateHolderViewSet, CertificateViewSet, MasterCertificateViewSet
+from .views import (
+    CertificateHolderViewSet,
+    CertificateIssuanceViewSet,
+    CertificateVerificationView,
+    CertificateViewSet,
+    MasterCertificateViewSet,
+)
 
 router = DefaultRouter()
 router.register("holders", CertificateHolderViewSet, basename="certificate-holder")
 router.register("master-certificates", MasterCertificateViewSet, basename="master-certificate")
 router.register("certificates", CertificateViewSet, basename="certificate")
+router.register("issuances", CertificateIssuanceViewSet, basename="certificate-issuance")
 
 app_name = "certificates"
 
 urlpatterns = [
+    path("verify/<str:code>/", CertificateVerificationView.as_view(), name="certificate-verify"),
     path("", include(router.urls)),
 ]
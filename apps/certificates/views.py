@@ -1,18 +1,30 @@
 """API viewsets for certificates domain."""
 from __future__ import annotations
 
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.viewsets import ModelViewSet
-
-from .models import Certificate, CertificateHolder, MasterCertificate
+from django.db.models import Count, Q
+from django.http import StreamingHttpResponse
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.throttling import AnonRateThrottle
+from rest_framework.views import APIView
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
+
+from apps.common.fieldsets import SparseFieldsetMixin
+
+from .models import Certificate, CertificateHolder, CertificateIssuance, MasterCertificate
 from .serializers import (
     CertificateHolderSerializer,
+    CertificateIssuanceSerializer,
     CertificateSerializer,
     MasterCertificateSerializer,
 )
+from .services import document_cache_stats, stream_certificate_document, verify_certificate
 
 
-class BaseSoftDeleteViewSet(ModelViewSet):
+class BaseSoftDeleteViewSet(SparseFieldsetMixin, ModelViewSet):
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
@@ -81,6 +93,7 @@ class CertificateViewSet(BaseSoftDeleteViewSet):
     )
     ordering_fields = ("created_at", "updated_at")
     ordering = ("-created_at",)
+    cursor_ordering = ("-created_at", "-id")
 
     def perform_create(self, serializer: CertificateSerializer) -> None:
         user = self.request.user if self.request.user.is_authenticated else None
@@ -89,3 +102,89 @@ class CertificateViewSet(BaseSoftDeleteViewSet):
     def perform_update(self, serializer: CertificateSerializer) -> None:
         user = self.request.user if self.request.user.is_authenticated else None
         serializer.save(updated_by=user)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "pdf":
+            # The schedules are streamed in chunks, not prefetched.
+            queryset = queryset.prefetch_related(None)
+        return queryset
+
+    @action(detail=True, methods=["get"])
+    def pdf(self, request, pk=None):
+        """Render the certificate's current PDF on the fly, page by page."""
+
+        certificate = self.get_object()
+        response = StreamingHttpResponse(
+            stream_certificate_document(certificate), content_type="application/pdf"
+        )
+        response["Content-Disposition"] = (
+            f'inline; filename="certificate-{certificate.verification_code}.pdf"'
+        )
+        return response
+
+    @action(detail=False, methods=["get"], url_path="document-cache")
+    def document_cache(self, request):
+        """How often a render job could keep the stored document instead of rendering."""
+
+        return Response(document_cache_stats())
+
+
+class CertificateIssuanceViewSet(
+    SparseFieldsetMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet,
+):
+    """Issue a master certificate to many holders at once and follow the rendering."""
+
+    permission_classes = (IsAuthenticated,)
+    serializer_class = CertificateIssuanceSerializer
+    filterset_fields = {"master_certificate": ["exact"]}
+    ordering_fields = ("created_at",)
+    ordering = ("-created_at",)
+
+    def get_queryset(self):
+        status_counts = {
+            name: Count("certificates", filter=Q(certificates__document_status=value))
+            for name, value in (
+                ("pending", Certificate.DocumentStatus.PENDING),
+                ("ready", Certificate.DocumentStatus.READY),
+                ("failed", Certificate.DocumentStatus.FAILED),
+            )
+        }
+        return CertificateIssuance.objects.annotate(**status_counts)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = request.user if request.user.is_authenticated else None
+        issuance = serializer.save(created_by=user)
+        # Documents render in the background; the response is the handle to poll.
+        issuance = self.get_queryset().get(pk=issuance.pk)
+        return Response(self.get_serializer(issuance).data, status=status.HTTP_202_ACCEPTED)
+
+
+class CertificateVerifyThrottle(AnonRateThrottle):
+    """Per client IP limit of the public verify endpoint."""
+
+    scope = "certificate_verify"
+
+
+class CertificateVerificationView(APIView):
+    """Public check of the verification code printed on a certificate."""
+
+    permission_classes = (AllowAny,)
+    authentication_classes = ()
+    throttle_classes = (CertificateVerifyThrottle,)
+    renderer_classes = (JSONRenderer,)
+
+    def get(self, request, code: str):
+        payload = verify_certificate(code)
+        if payload is None:
+            return Response(
+                {"detail": "No certificate with this verification code."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(payload)
@@ -0,0 +1,35 @@
+"""Delete addresses that no client, vehicle, loss payee or certificate holder references."""
+from __future__ import annotations
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.clients.services import orphaned_addresses, sweep_orphan_addresses
+
+
+class Command(BaseCommand):
+    help = "Delete orphaned addresses; meant to run periodically (e.g. nightly from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=24,
+            help="Keep orphans updated within this many hours",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only count the orphans that would be deleted"
+        )
+
+    def handle(self, *args, **options):
+        if options["grace_hours"] < 0:
+            raise CommandError("--grace-hours must be >= 0.")
+        grace = datetime.timedelta(hours=options["grace_hours"])
+        if options["dry_run"]:
+            count = orphaned_addresses().filter(updated_at__lt=timezone.now() - grace).count()
+            self.stdout.write(f"{count} orphaned addresses would be deleted")
+            return
+        deleted = sweep_orphan_addresses(grace=grace)
+        self.stdout.write(f"Deleted {deleted} orphaned addresses")
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:19
+
+import re
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 500
+
+
+def _normalize(values):
+    # Frozen copy of apps.common.search.normalize as of this migration.
+    text = " ".join(str(value) for value in values if value not in (None, ""))
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def backfill_search_documents(apps, schema_editor):
+    Client = apps.get_model("clients", "Client")
+    clients = Client.objects.prefetch_related("dbas", "contacts")
+    batch = []
+    for client in clients.iterator(chunk_size=BATCH_SIZE):
+        values = [client.company_name, client.dot_number, client.fein, client.referral_source]
+        values += [dba.dba_name for dba in client.dbas.all() if dba.is_active]
+        contacts = [contact for contact in client.contacts.all() if contact.is_active]
+        values += [contact.first_name for contact in contacts]
+        values += [contact.last_name for contact in contacts]
+        client.search_document = _normalize(values)
+        batch.append(client)
+        if len(batch) >= BATCH_SIZE:
+            Client.objects.bulk_update(batch, ["search_document"])
+            batch = []
+    Client.objects.bulk_update(batch, ["search_document"])
+
+
+def add_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS "clients_client_search_trgm" ON "clients_client" USING gin ("search_document" gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS "clients_client_search_trgm"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Denormalized search text maintained by apps.common.search'),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(add_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:18
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def mark_unreferenced_addresses_standalone(apps, schema_editor):
+    # Which existing addresses came from the address endpoint is not recorded; keep every
+    # address nothing references yet out of the sweep rather than risk deleting one.
+    Address = apps.get_model("clients", "Address")
+    queryset = Address.objects.all()
+    for relation in Address._meta.related_objects:
+        references = relation.related_model._base_manager.filter(**{relation.field.name: OuterRef("pk")})
+        queryset = queryset.filter(~Exists(references))
+    queryset.update(is_standalone=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_add_client_search_document'),
+        # Every relation to Address must be in the migration state for the backfill.
+        ('assets', '0003_add_garaging_address_to_vehicle'),
+        ('certificates', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='address',
+            name='is_standalone',
+            field=models.BooleanField(default=False, help_text='Created through the address endpoint; never removed by the orphan sweep.'),
+        ),
+        migrations.RunPython(mark_unreferenced_addresses_standalone, migrations.RunPython.noop),
+    ]
@@ -29,6 +29,12 @@ class Client(BaseModel):
         null=True,
         blank=True,
     )
+    search_document = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Denormalized search text maintained by apps.common.search",
+    )
 
     class Meta:
         ordering = ("company_name",)
@@ -74,6 +80,10 @@ class Address(BaseModel):
     city = models.CharField(max_length=128)
     state = models.CharField(max_length=2)
     zip_code = models.CharField(max_length=10)
+    is_standalone = models.BooleanField(
+        default=False,
+        help_text="Created through the address endpoint; never removed by the orphan sweep.",
+    )
 
     class Meta:
         ordering = ("street_address",)
@@ -6,10 +6,18 @@ from typing import Any
 from django.db import transaction
 from rest_framework import serializers
 
+from apps.certificates.services import VERIFY_ADDRESS_FIELDS, invalidate_for_addresses
+from apps.common.fieldsets import SparseFieldsetSerializerMixin
+from apps.common.search import schedule_refresh
+from apps.common.sync import apply_diff, assign_changed, bulk_update_changed, diff_children
 from apps.lookups.models import AddressType, ContactType
-from apps.lookups.serializers import LookupSerializer
+from apps.lookups.serializers import LookupRelatedField, LookupSerializer
 
 from .models import Address, Client, ClientAddress, ClientDBA, Contact
+from .services import delete_orphan_addresses
+
+
+ADDRESS_FIELDS = ("street_address", "city", "state", "zip_code")
 
 
 class ClientDBASerializer(serializers.ModelSerializer):
@@ -21,8 +29,8 @@ class ClientDBASerializer(serializers.ModelSerializer):
 
 class ContactSerializer(serializers.ModelSerializer):
     contact_type = LookupSerializer(read_only=True)
-    contact_type_id = serializers.PrimaryKeyRelatedField(
-        queryset=ContactType.objects.filter(is_active=True),
+    contact_type_id = LookupRelatedField(
+        ContactType,
         source="contact_type",
         write_only=True,
     )
@@ -43,7 +51,7 @@ class ContactSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "contact_type", "is_active")
 
 
-class AddressSerializer(serializers.ModelSerializer):
+class AddressSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Address
         fields = ("id", "street_address", "city", "state", "zip_code")
@@ -53,8 +61,8 @@ class AddressSerializer(serializers.ModelSerializer):
 class ClientAddressSerializer(serializers.ModelSerializer):
     address = AddressSerializer()
     address_type = LookupSerializer(read_only=True)
-    address_type_id = serializers.PrimaryKeyRelatedField(
-        queryset=AddressType.objects.filter(is_active=True),
+    address_type_id = LookupRelatedField(
+        AddressType,
         source="address_type",
         write_only=True,
     )
@@ -72,7 +80,7 @@ class ClientAddressSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "address_type", "is_active")
 
 
-class ClientSerializer(serializers.ModelSerializer):
+class ClientSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     dbas = ClientDBASerializer(many=True, required=False)
     contacts = ContactSerializer(many=True, required=False)
     addresses = ClientAddressSerializer(many=True, required=False)
@@ -95,121 +103,94 @@ class ClientSerializer(serializers.ModelSerializer):
             "updated_at",
         )
         read_only_fields = ("id", "is_active", "created_at", "updated_at")
+        # Left out of sparse fieldsets (``?fields=`` / ``?expand=``) unless asked for.
+        expandable_fields = ("dbas", "contacts", "addresses")
 
     def _sync_dbas(self, client: Client, items: list[dict[str, Any]], *, clear_existing: bool) -> None:
-        manager = client.dbas
-        existing = {str(obj.id): obj for obj in manager.all()}
-
-        if clear_existing:
-            manager.all().delete()
-            existing = {}
-
-        for raw in items:
-            data = dict(raw)
-            obj_id = str(data.pop("id", "") or "")
-            is_active = data.pop("is_active", True)
-            dba_name = data.get("dba_name")
-
-            if obj_id and obj_id in existing and not clear_existing:
-                obj = existing[obj_id]
-                if dba_name is not None:
-                    obj.dba_name = dba_name
-                obj.is_active = is_active
-                obj.save(update_fields=["dba_name", "is_active", "updated_at"])
-                continue
-
-            if not dba_name:
+        def build(data: dict[str, Any], is_active: bool) -> ClientDBA:
+            if not data.get("dba_name"):
                 raise serializers.ValidationError("dba_name is required for client DBAs.")
-            manager.create(dba_name=dba_name, is_active=is_active)
+            return ClientDBA(client=client, dba_name=data["dba_name"], is_active=is_active)
+
+        diff = diff_children(
+            client.dbas.all(),
+            items,
+            fields=("dba_name",),
+            build=build,
+            clear_existing=clear_existing,
+        )
+        apply_diff(ClientDBA, diff)
+        if diff:
+            # Bulk writes send no signals; DBA names feed the client's search document.
+            schedule_refresh("clients.client", "pk", [client.pk])
 
     def _sync_contacts(self, client: Client, items: list[dict[str, Any]], *, clear_existing: bool) -> None:
-        manager = client.contacts
-        existing = {str(obj.id): obj for obj in manager.all()}
-
-        if clear_existing:
-            manager.all().delete()
-            existing = {}
-
-        for raw in items:
-            data = dict(raw)
-            obj_id = str(data.pop("id", "") or "")
-            is_active = data.pop("is_active", True)
-            contact_type = data.pop("contact_type", None)
-
-            if obj_id and obj_id in existing and not clear_existing:
-                obj = existing[obj_id]
-                for field in ["first_name", "last_name", "email", "phone_number", "nickname"]:
-                    if field in data:
-                        setattr(obj, field, data[field])
-                if contact_type is not None:
-                    obj.contact_type = contact_type
-                obj.is_active = is_active
-                obj.save(update_fields=[
-                    "first_name",
-                    "last_name",
-                    "email",
-                    "phone_number",
-                    "nickname",
-                    "contact_type",
-                    "is_active",
-                    "updated_at",
-                ])
-                continue
-
-            if contact_type is None:
+        def build(data: dict[str, Any], is_active: bool) -> Contact:
+            if data.get("contact_type") is None:
                 raise serializers.ValidationError("contact_type_id is required for contacts.")
-            manager.create(contact_type=contact_type, is_active=is_active, **data)
-
-    def _delete_address_link(self, link: ClientAddress) -> None:
-        address = link.address
-        link.delete()
-        if not address.client_links.exists():
-            address.delete()
+            return Contact(client=client, is_active=is_active, **data)
+
+        diff = diff_children(
+            client.contacts.all(),
+            items,
+            fields=("first_name", "last_name", "email", "phone_number", "nickname", "contact_type"),
+            build=build,
+            clear_existing=clear_existing,
+        )
+        apply_diff(Contact, diff)
+        if diff:
+            schedule_refresh("clients.client", "pk", [client.pk])
 
     def _sync_addresses(self, client: Client, items: list[dict[str, Any]], *, clear_existing: bool) -> None:
-        links = client.addresses.select_related("address")
-        existing = {str(link.id): link for link in links}
-
-        if clear_existing:
-            for link in links:
-                self._delete_address_link(link)
-            existing = {}
-
-        for raw in items:
-            data = dict(raw)
-            link_id = str(data.pop("id", "") or "")
-            is_active = data.pop("is_active", True)
-            address_type = data.pop("address_type", None)
-            address_payload = data.pop("address", None)
-
-            if link_id and link_id in existing and not clear_existing:
-                link = existing[link_id]
-                if address_payload:
-                    address = link.address
-                    for field in ["street_address", "city", "state", "zip_code"]:
-                        if field in address_payload:
-                            setattr(address, field, address_payload[field])
-                    address.save(update_fields=["street_address", "city", "state", "zip_code", "updated_at"])
-                if address_type is not None:
-                    link.address_type = address_type
-                if "rating" in data:
-                    link.rating = data["rating"]
-                link.is_active = is_active
-                link.save(update_fields=["address_type", "rating", "is_active", "updated_at"])
-                continue
-
-            if not address_payload or address_type is None:
+        new_addresses: list[Address] = []
+        changed_addresses: dict[Any, Address] = {}
+        address_fields: set[str] = set()
+        verified_address_ids: set[Any] = set()
+
+        def build(data: dict[str, Any], is_active: bool) -> ClientAddress:
+            address_payload = data.get("address")
+            if not address_payload or data.get("address_type") is None:
                 raise serializers.ValidationError(
                     "address and address_type_id are required when creating a client address."
                 )
-            address = Address.objects.create(**address_payload)
-            client.addresses.create(
+            address = Address(**address_payload)
+            new_addresses.append(address)
+            return ClientAddress(
+                client=client,
                 address=address,
-                address_type=address_type,
+                address_type=data["address_type"],
                 rating=data.get("rating"),
                 is_active=is_active,
             )
 
+        def update_address(link: ClientAddress, data: dict[str, Any]) -> None:
+            if not data.get("address"):
+                return
+            changed = assign_changed(link.address, data["address"], ADDRESS_FIELDS)
+            if changed:
+                changed_addresses[link.address.pk] = link.address
+                address_fields.update(changed)
+            if changed & VERIFY_ADDRESS_FIELDS:
+                verified_address_ids.add(link.address.pk)
+
+        diff = diff_children(
+            client.addresses.select_related("address"),
+            items,
+            fields=("address_type", "rating"),
+            build=build,
+            clear_existing=clear_existing,
+            on_update=update_address,
+        )
+        Address.objects.bulk_create(new_addresses)
+        bulk_update_changed(Address, changed_addresses.values(), address_fields)
+        # ``bulk_update`` sends no signals, so cached certificate verifications showing
+        # these addresses are dropped here.
+        invalidate_for_addresses(verified_address_ids)
+        apply_diff(ClientAddress, diff)
+        if diff.deletes:
+            # Addresses are shared; drop only those nothing references any more.
+            delete_orphan_addresses({link.address_id for link in diff.deletes})
+
     def create(self, validated_data: dict[str, Any]) -> Client:
         dbas_data = validated_data.pop("dbas", [])
         contacts_data = validated_data.pop("contacts", [])
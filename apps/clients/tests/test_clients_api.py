@@ -1,10 +1,18 @@
+import datetime
+import io
+
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
 
 from apps.accounts.models import User
 from apps.clients.models import Address, Client, ClientAddress, ClientDBA, Contact
-from apps.lookups.models import AddressType, ContactType
+from apps.clients.serializers import ClientSerializer
+from apps.lookups.models import AddressType, ContactType, VehicleType
 
 
 @pytest.fixture
@@ -197,3 +205,134 @@ def test_soft_delete_client(api_client, user, contact_type, address_type):
 
     response = api_client.get(list_url, {"include_inactive": "true"})
     assert response.json()["count"] == 1
+
+
+@pytest.mark.django_db
+def test_search_uses_document_for_related_names(
+    api_client, user, contact_type, django_capture_on_commit_callbacks
+):
+    api_client.force_authenticate(user=user)
+    with django_capture_on_commit_callbacks(execute=True):
+        acme = Client.objects.create(
+            company_name="Acme Logistics", created_by=user, updated_by=user
+        )
+        ClientDBA.objects.create(client=acme, dba_name="Roadrunner Freight")
+        Contact.objects.create(
+            client=acme, first_name="Jane", last_name="Doe", contact_type=contact_type
+        )
+        Contact.objects.create(
+            client=acme, first_name="Janet", last_name="Doe", contact_type=contact_type
+        )
+        Client.objects.create(company_name="Beta Transport", created_by=user, updated_by=user)
+
+    url = reverse("clients:client-list")
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(url, {"search": "doe roadrunner"})
+    assert response.status_code == 200
+    assert [item["company_name"] for item in response.json()["results"]] == ["Acme Logistics"]
+    assert not any("DISTINCT" in query["sql"] or "JOIN" in query["sql"] for query in queries)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ClientDBA.objects.filter(client=acme).get().delete()
+    assert api_client.get(url, {"search": "roadrunner"}).json()["count"] == 0
+
+
+@pytest.mark.django_db
+def test_nested_sync_query_count_does_not_grow_with_children(
+    api_client, user, contact_type, address_type, django_capture_on_commit_callbacks
+):
+    def replace_children(client, size):
+        payload = {
+            "company_name": client.company_name,
+            "dbas": [{"dba_name": f"Fleet {index}"} for index in range(size)],
+            "contacts": [
+                {"first_name": f"Driver{index}", "contact_type_id": str(contact_type.id)}
+                for index in range(size)
+            ],
+            "addresses": [
+                {
+                    "address": {
+                        "street_address": f"{index} Main St",
+                        "city": "Austin",
+                        "state": "TX",
+                        "zip_code": "78701",
+                    },
+                    "address_type_id": str(address_type.id),
+                }
+                for index in range(size)
+            ],
+        }
+        serializer = ClientSerializer(client, data=payload)
+        assert serializer.is_valid(), serializer.errors
+        with CaptureQueriesContext(connection) as queries:
+            with django_capture_on_commit_callbacks(execute=True):
+                serializer.save()
+        return len(queries.captured_queries)
+
+    small = Client.objects.create(company_name="Small Fleet", created_by=user, updated_by=user)
+    large = Client.objects.create(company_name="Large Fleet", created_by=user, updated_by=user)
+    replace_children(small, 2)
+    replace_children(large, 2)
+
+    # A full update deletes the previous children and inserts the new ones.
+    assert replace_children(large, 20) == replace_children(small, 3)
+    assert large.dbas.count() == 20
+    assert Address.objects.filter(client_links__client=large).count() == 20
+    assert not Address.objects.filter(client_links__isnull=True).exists()
+    api_client.force_authenticate(user=user)
+    response = api_client.get(reverse("clients:client-list"), {"search": "driver19"})
+    assert [item["company_name"] for item in response.json()["results"]] == ["Large Fleet"]
+
+
+@pytest.mark.django_db
+def test_replacing_addresses_deletes_only_unreferenced_ones(api_client, user, address_type):
+    api_client.force_authenticate(user=user)
+    client = Client.objects.create(company_name="Acme Logistics", created_by=user, updated_by=user)
+    yard, office = (
+        Address.objects.create(street_address=street, city="Austin", state="TX", zip_code="78701")
+        for street in ("1 Yard Rd", "2 Office St")
+    )
+    for address in (yard, office):
+        ClientAddress.objects.create(client=client, address=address, address_type=address_type)
+    client.vehicles.create(
+        vin="1FUJGLDR7CSBM4561",
+        vehicle_type=VehicleType.objects.filter(is_active=True).first(),
+        year=2020,
+        garaging_address=yard,
+    )
+
+    url = reverse("clients:client-detail", args=[client.id])
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.put(
+            url, {"company_name": "Acme Logistics", "addresses": []}, format="json"
+        )
+
+    assert response.status_code == 200, response.content
+    address_deletes = [
+        query for query in queries if query["sql"].startswith('DELETE FROM "clients_address"')
+    ]
+    assert len(address_deletes) == 1
+    # The yard still garages a vehicle.
+    assert set(Address.objects.values_list("street_address", flat=True)) == {"1 Yard Rd"}
+
+    stale = Address.objects.create(
+        street_address="3 Old Rd", city="Austin", state="TX", zip_code="78701"
+    )
+    Address.objects.filter(pk=stale.pk).update(
+        updated_at=timezone.now() - datetime.timedelta(days=2)
+    )
+    Address.objects.create(street_address="4 New Rd", city="Austin", state="TX", zip_code="78701")
+    # Addresses created through the address endpoint wait for a link as long as needed.
+    response = api_client.post(
+        reverse("clients:address-list"),
+        {"street_address": "5 Depot Rd", "city": "Austin", "state": "TX", "zip_code": "78701"},
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+    standalone = Address.objects.filter(pk=response.json()["id"])
+    standalone.update(updated_at=timezone.now() - datetime.timedelta(days=2))
+    output = io.StringIO()
+    call_command("sweep_orphan_addresses", "--grace-hours", "24", stdout=output)
+    assert output.getvalue().strip() == "Deleted 1 orphaned addresses"
+    remaining = set(Address.objects.values_list("street_address", flat=True))
+    assert remaining == {"1 Yard Rd", "4 New Rd", "5 Depot Rd"}
@@ -6,11 +6,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from apps.common.fieldsets import SparseFieldsetMixin
+
 from .models import Address, Client
 from .serializers import AddressSerializer, ClientSerializer
 
 
-class AddressViewSet(ModelViewSet):
+class AddressViewSet(SparseFieldsetMixin, ModelViewSet):
     """CRUD operations for standalone addresses (e.g., garaging addresses)."""
 
     queryset = Address.objects.all()
@@ -27,12 +29,15 @@ class AddressViewSet(ModelViewSet):
             queryset = queryset.filter(is_active=True)
         return queryset
 
+    def perform_create(self, serializer) -> None:
+        serializer.save(is_standalone=True)
+
     def perform_destroy(self, instance: Address) -> None:
         instance.is_active = False
         instance.save(update_fields=["is_active", "updated_at"])
 
 
-class ClientViewSet(ModelViewSet):
+class ClientViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = Client.objects.prefetch_related(
         "dbas",
         "contacts",
@@ -56,6 +61,7 @@ class ClientViewSet(ModelViewSet):
         "contacts__first_name",
         "contacts__last_name",
     )
+    search_document_field = "search_document"
     ordering_fields = ("company_name", "created_at", "updated_at")
     ordering = ("company_name",)
 
@@ -78,7 +84,10 @@ class ClientViewSet(ModelViewSet):
         include_inactive = self.request.query_params.get("include_inactive")
         if include_inactive not in {"true", "1", "yes"}:
             queryset = queryset.filter(is_active=True)
-        return queryset.distinct()
+        if "contacts__contact_type" in self.request.query_params:
+            # The only filter joining a to-many relation; search uses the search document.
+            queryset = queryset.distinct()
+        return queryset
 
     @action(detail=True, methods=["get"], url_path="garaging-addresses")
     def garaging_addresses(self, request, pk=None):
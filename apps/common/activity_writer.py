@@ -0,0 +1,236 @@
+"""Buffered writer that batches ActivityLog inserts.
+
+Entries logged inside a transaction are admitted to the buffer through
+``transaction.on_commit`` (so a rollback discards them exactly like an unbuffered
+insert) and written with a single ``bulk_create``:
+
+* inside a ``collect()`` scope (every request via ``ActivityLogBufferMiddleware``,
+  every background job via ``run_job``) the buffer is flushed when the scope exits,
+  or early once it reaches ``ACTIVITY_LOG_MAX_BUFFER`` entries;
+* outside a scope each entry is written as soon as its transaction committed.
+
+With ``ACTIVITY_LOG_ASYNC`` enabled, flushed batches are handed to a background
+thread through a bounded queue. When the queue is full the batch is written
+synchronously instead (back-pressure), so audit entries are never dropped.
+
+Flushes run after the data they describe has been committed, so a failing write is
+logged and counted (``failed``) rather than raised into the request or job.
+
+Context the logging code did not have loaded is resolved per batch rather than per
+entry: the policy behind a master certificate, the client behind a policy, and the
+name of a related row (see ``NameLookup``).
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, connections, router, transaction
+from django.db.models import Model, prefetch_related_objects
+
+from .models import ActivityLog
+from .search import fill_search_documents
+
+logger = logging.getLogger(__name__)
+
+# Transient attributes ``log_activity`` sets on entries for the writer to resolve.
+MASTER_CERTIFICATE_ATTR = "_master_certificate_id"
+NAME_LOOKUP_ATTR = "_name_lookup"
+
+
+@dataclass(frozen=True)
+class NameLookup:
+    """Text of an entry that names a related row which was not loaded.
+
+    The writer reads the rows of a whole batch at once and re-renders the entry's
+    ``transaction_name`` and ``description`` with ``text(name(row))``; if the row is
+    gone the text the entry was logged with is kept.
+    """
+
+    model: type[Model]
+    pk: Any
+    name: Callable[[Model], str]
+    text: Callable[[str], tuple[str, str]]
+
+
+class ActivityLogWriter:
+    """Collects ActivityLog instances and persists them in batches."""
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._metrics: Counter[str] = Counter()
+        self._metrics_lock = threading.Lock()
+        self._queue: queue.Queue[list[ActivityLog]] | None = None
+        self._worker: threading.Thread | None = None
+        self._worker_lock = threading.Lock()
+
+    # Public API -----------------------------------------------------------------
+
+    def write(self, entry: ActivityLog) -> None:
+        """Persist ``entry`` now, or buffer it when buffering is enabled."""
+
+        if not settings.ACTIVITY_LOG_BUFFERED:
+            self._persist([entry])
+            return
+
+        alias = router.db_for_write(ActivityLog)
+        if connections[alias].in_atomic_block:
+            transaction.on_commit(partial(self._admit, entry), using=alias)
+        else:
+            self._admit(entry)
+
+    @contextmanager
+    def collect(self) -> Iterator[None]:
+        """Buffer committed entries until the block exits, then flush them together."""
+
+        scopes = self._scopes()
+        scopes.append([])
+        try:
+            yield
+        finally:
+            buffered = scopes.pop()
+            if buffered:
+                self._flush(buffered)
+
+    def flush(self) -> None:
+        """Write whatever the innermost scope has buffered so far."""
+
+        scopes = self._scopes()
+        if scopes and scopes[-1]:
+            buffered, scopes[-1] = scopes[-1], []
+            self._flush(buffered)
+
+    def metrics(self) -> dict[str, int]:
+        """Snapshot of buffer and back-pressure counters."""
+
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        snapshot["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        return snapshot
+
+    # Internals ------------------------------------------------------------------
+
+    def _scopes(self) -> list[list[ActivityLog]]:
+        if not hasattr(self._local, "scopes"):
+            self._local.scopes = []
+        return self._local.scopes
+
+    def _count(self, key: str, value: int = 1) -> None:
+        with self._metrics_lock:
+            self._metrics[key] += value
+
+    def _admit(self, entry: ActivityLog) -> None:
+        scopes = self._scopes()
+        self._count("buffered")
+        if scopes:
+            scopes[-1].append(entry)
+            if len(scopes[-1]) >= settings.ACTIVITY_LOG_MAX_BUFFER:
+                self._count("early_flushes")
+                self.flush()
+            return
+
+        self._flush([entry])
+
+    def _flush(self, entries: list[ActivityLog]) -> None:
+        if settings.ACTIVITY_LOG_ASYNC:
+            work_queue = self._ensure_worker()
+            try:
+                work_queue.put_nowait(entries)
+                self._count("queued_batches")
+                return
+            except queue.Full:
+                self._count("backpressure_sync_writes")
+        try:
+            self._persist(entries)
+        except Exception:
+            self._count("failed", len(entries))
+            logger.exception("Failed to write %s activity log entries", len(entries))
+
+    def _persist(self, entries: list[ActivityLog]) -> None:
+        _resolve_policies(entries)
+        # Entries logged with only a policy take its client; the policies are loaded
+        # once for the batch (and reused by the search documents below).
+        clientless = [
+            entry for entry in entries if entry.client_id is None and entry.policy_id is not None
+        ]
+        if clientless:
+            prefetch_related_objects(clientless, "policy")
+            for entry in clientless:
+                entry.client_id = entry.policy.client_id
+        _resolve_names(entries)
+        # ``bulk_create`` skips ``pre_save``, so documents are built here in bulk.
+        fill_search_documents(entries)
+        ActivityLog.objects.bulk_create(entries, batch_size=settings.ACTIVITY_LOG_BATCH_SIZE)
+        self._count("written", len(entries))
+        self._count("batches")
+
+    def _ensure_worker(self) -> queue.Queue[list[ActivityLog]]:
+        with self._worker_lock:
+            if self._queue is None:
+                self._queue = queue.Queue(maxsize=settings.ACTIVITY_LOG_QUEUE_SIZE)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._drain,
+                    name="activity-log-writer",
+                    daemon=True,
+                )
+                self._worker.start()
+            return self._queue
+
+    def _drain(self) -> None:
+        assert self._queue is not None
+        while True:
+            entries = self._queue.get()
+            try:
+                self._persist(entries)
+            except Exception:  # pragma: no cover - logged and counted for operators
+                self._count("failed", len(entries))
+                logger.exception("Failed to write %s activity log entries", len(entries))
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+
+def _resolve_policies(entries: list[ActivityLog]) -> None:
+    pending = [
+        entry
+        for entry in entries
+        if entry.policy_id is None and getattr(entry, MASTER_CERTIFICATE_ATTR, None) is not None
+    ]
+    if not pending:
+        return
+    master_ids = {getattr(entry, MASTER_CERTIFICATE_ATTR) for entry in pending}
+    masters = apps.get_model("certificates", "MasterCertificate").objects.filter(pk__in=master_ids)
+    policy_ids = dict(masters.values_list("pk", "policy_id"))
+    for entry in pending:
+        entry.policy_id = policy_ids.get(getattr(entry, MASTER_CERTIFICATE_ATTR))
+
+
+def _resolve_names(entries: list[ActivityLog]) -> None:
+    lookups = [
+        (entry, lookup)
+        for entry in entries
+        if (lookup := getattr(entry, NAME_LOOKUP_ATTR, None)) is not None
+    ]
+    if not lookups:
+        return
+    pks: defaultdict[type[Model], set[Any]] = defaultdict(set)
+    for _, lookup in lookups:
+        pks[lookup.model].add(lookup.pk)
+    rows = {model: model._base_manager.in_bulk(model_pks) for model, model_pks in pks.items()}
+    for entry, lookup in lookups:
+        row = rows[lookup.model].get(lookup.pk)
+        if row is not None:
+            entry.transaction_name, entry.description = lookup.text(lookup.name(row))
+
+
+activity_log_writer = ActivityLogWriter()
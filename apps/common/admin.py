@@ -2,8 +2,9 @@
 from __future__ import annotations
 
 from django.contrib import admin
+from django.utils import timezone
 
-from .models import ActivityLog
+from .models import ActivityLog, BackgroundJob
 
 
 @admin.register(ActivityLog)
@@ -67,3 +68,50 @@ class ActivityLogAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Disable deleting logs - they are audit records."""
         return False
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    """Admin for inspecting and retrying queued background work."""
+
+    list_display = (
+        "task",
+        "status",
+        "attempts",
+        "run_after",
+        "locked_by",
+        "finished_at",
+        "created_at",
+    )
+    list_filter = ("status", "task")
+    search_fields = ("task", "unique_key", "last_error")
+    readonly_fields = (
+        "id",
+        "task",
+        "payload",
+        "unique_key",
+        "attempts",
+        "locked_by",
+        "locked_at",
+        "finished_at",
+        "last_error",
+        "created_at",
+        "updated_at",
+    )
+    ordering = ("-created_at",)
+    actions = ("retry_jobs",)
+
+    def has_add_permission(self, request):
+        """Jobs are queued by the application."""
+        return False
+
+    @admin.action(description="Retry selected failed jobs")
+    def retry_jobs(self, request, queryset):
+        retried = queryset.filter(status=BackgroundJob.Status.FAILED).update(
+            status=BackgroundJob.Status.QUEUED,
+            attempts=0,
+            run_after=timezone.now(),
+            finished_at=None,
+            updated_at=timezone.now(),
+        )
+        self.message_user(request, f"Requeued {retried} job(s).")
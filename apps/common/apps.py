@@ -5,3 +5,10 @@ class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.common"
     verbose_name = "Common"
+
+    def ready(self) -> None:
+        from . import search, search_index, signals
+
+        signals.connect_signals()
+        search.connect_signals()
+        search_index.connect_signals()
@@ -0,0 +1,217 @@
+"""Sparse fieldsets: ``?fields=`` and ``?expand=`` on API responses.
+
+Without either parameter a response is unchanged. With them, only the requested
+fields are rendered:
+
+* ``?fields=id,name,status`` renders exactly those fields;
+* ``?expand=changes`` adds fields listed in the serializer's ``Meta.expandable_fields``
+  (nested lists and other costly fields). When a fieldset is requested, expandable
+  fields are left out unless named in ``fields`` or ``expand``, so ``?expand=`` alone
+  renders everything except them.
+
+Write-only fields are never dropped, and neither are writable fields while a
+serializer validates input, so the parameters do not affect writes. Unknown names are
+ignored. The pruned field maps are built once per serializer class and fieldset and
+copied for later requests.
+
+Views using ``SparseFieldsetMixin`` also drop the ``select_related`` and
+``prefetch_related`` paths whose relation feeds no rendered field. A field's relation
+is the first step of its ``source``; fields whose source is not a model field (method
+fields, properties, annotations) name the relations they read in the serializer's
+``Meta.fieldset_relations``, otherwise the queryset is left as it is.
+"""
+from __future__ import annotations
+
+import copy
+import threading
+from dataclasses import dataclass
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+# Distinct (serializer, fieldset) pairs kept; the cache is emptied when it fills up.
+FIELD_MAP_CACHE_SIZE = 512
+
+_field_maps: dict[tuple, tuple[dict[str, serializers.Field], frozenset[str]]] = {}
+_field_maps_lock = threading.Lock()
+
+
+def _names(raw: str | None) -> frozenset[str]:
+    return frozenset(name.strip() for name in (raw or "").split(",") if name.strip())
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    """The fields and expansions a request asked for."""
+
+    fields: frozenset[str] | None
+    expand: frozenset[str]
+
+    @classmethod
+    def from_request(cls, request) -> Fieldset | None:
+        params = request.query_params
+        if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+            return None
+        fields = _names(params.get(FIELDS_PARAM)) if FIELDS_PARAM in params else None
+        return cls(fields=fields, expand=_names(params.get(EXPAND_PARAM)))
+
+    def includes(self, name: str, *, expandable: bool) -> bool:
+        if self.fields is not None and name in self.fields:
+            return True
+        if expandable:
+            return name in self.expand
+        return self.fields is None
+
+
+def clear_field_map_cache() -> None:
+    with _field_maps_lock:
+        _field_maps.clear()
+
+
+class SparseFieldsetSerializerMixin:
+    """Serializer mixin rendering only the fields in ``context["fieldset"]``.
+
+    Applies to the top-level serializer (or the items of a top-level list) only;
+    nested serializers render in full.
+    """
+
+    # Writable fields kept only to validate input; left out of the representation.
+    _input_only_fields: frozenset[str] = frozenset()
+
+    def get_fields(self):
+        fieldset = self.context.get("fieldset")
+        if fieldset is None or not self._is_top_level():
+            return super().get_fields()
+
+        writing = hasattr(self, "initial_data")
+        key = (type(self), fieldset, writing)
+        cached = _field_maps.get(key)
+        if cached is None:
+            expandable = set(getattr(self.Meta, "expandable_fields", ()))
+            template, input_only = {}, set()
+            for name, field in super().get_fields().items():
+                if field.write_only or fieldset.includes(name, expandable=name in expandable):
+                    template[name] = field
+                elif writing and not field.read_only:
+                    template[name] = field
+                    input_only.add(name)
+            cached = (template, frozenset(input_only))
+            with _field_maps_lock:
+                if len(_field_maps) >= FIELD_MAP_CACHE_SIZE:
+                    _field_maps.clear()
+                _field_maps[key] = cached
+        template, self._input_only_fields = cached
+        # Fields are bound to one serializer instance; hand out copies of the template.
+        return copy.deepcopy(template)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for name in self._input_only_fields:
+            data.pop(name, None)
+        return data
+
+    def _is_top_level(self) -> bool:
+        root = self.root
+        return root is self or (
+            isinstance(root, serializers.ListSerializer) and self.parent is root
+        )
+
+
+def field_relations(model, name: str, field: serializers.Field, hints) -> frozenset[str] | None:
+    """The relations of ``model`` that rendering ``field`` reads, ``None`` if unknown."""
+
+    if name in hints:
+        return frozenset(hints[name])
+    if isinstance(field, serializers.RelatedField) and field.use_pk_only_optimization():
+        # Primary keys of forward relations are read from the ``<name>_id`` column.
+        return frozenset()
+    root = field.source.split(".")[0]
+    try:
+        model_field = model._meta.get_field(root)
+    except FieldDoesNotExist:
+        return None
+    return frozenset([root]) if model_field.is_relation else frozenset()
+
+
+def _select_related_paths(tree: dict, prefix: str = "") -> list[str]:
+    paths = []
+    for name, children in tree.items():
+        path = prefix + name
+        paths.append(path)
+        paths += _select_related_paths(children, path + "__")
+    return paths
+
+
+class SparseFieldsetMixin:
+    """View mixin parsing the fieldset and skipping joins and prefetches nothing will render."""
+
+    def get_fieldset(self) -> Fieldset | None:
+        if not hasattr(self, "_fieldset"):
+            request = getattr(self, "request", None)
+            self._fieldset = Fieldset.from_request(request) if request is not None else None
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fieldset"] = self.get_fieldset()
+        return context
+
+    def get_queryset(self):
+        return self.prune_queryset(super().get_queryset())
+
+    def rendered_fields(self) -> dict[str, serializers.Field] | None:
+        """The fields the response will render, or ``None`` when no fieldset was requested."""
+
+        if self.get_fieldset() is None:
+            return None
+        if not hasattr(self, "_rendered_fields"):
+            fields = self.get_serializer().fields
+            self._rendered_fields = {
+                name: field for name, field in fields.items() if not field.write_only
+            }
+        return self._rendered_fields
+
+    def rendered_relations(self, model) -> frozenset[str] | None:
+        """The relations of ``model`` the rendered fields read, ``None`` if any is unknown."""
+
+        fields = self.rendered_fields()
+        if fields is None:
+            return None
+        serializer_class = self.get_serializer_class()
+        meta = getattr(serializer_class, "Meta", None)
+        if getattr(meta, "model", None) is not model:
+            return None
+        hints = getattr(meta, "fieldset_relations", {})
+        relations: set[str] = set()
+        for name, field in fields.items():
+            needed = field_relations(model, name, field, hints)
+            if needed is None:
+                return None
+            relations |= needed
+        return frozenset(relations)
+
+    def prune_queryset(self, queryset):
+        """Drop the ``select_related``/``prefetch_related`` paths no rendered field reads."""
+
+        relations = self.rendered_relations(queryset.model)
+        if relations is None:
+            return queryset
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            kept = [
+                path
+                for path in _select_related_paths(select_related)
+                if path.split("__")[0] in relations
+            ]
+            queryset = queryset.select_related(None)
+            if kept:
+                queryset = queryset.select_related(*kept)
+        lookups = [
+            lookup
+            for lookup in queryset._prefetch_related_lookups
+            if getattr(lookup, "prefetch_through", lookup).split("__")[0] in relations
+        ]
+        return queryset.prefetch_related(None).prefetch_related(*lookups)
@@ -0,0 +1,26 @@
+"""Filter backends shared by the API."""
+from __future__ import annotations
+
+from rest_framework.filters import SearchFilter
+
+from .search import normalize
+
+
+class SearchDocumentFilter(SearchFilter):
+    """``SearchFilter`` that matches the denormalized ``search_document`` column when available.
+
+    Views opt in with ``search_document_field``; every search term must occur in the
+    document. No JOINs are added, so no ``.distinct()`` is needed either. Views without
+    the attribute keep the standard ``search_fields`` behaviour.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        document_field = getattr(view, "search_document_field", None)
+        if not document_field:
+            return super().filter_queryset(request, queryset, view)
+
+        for term in self.get_search_terms(request):
+            term = normalize(term)
+            if term:
+                queryset = queryset.filter(**{f"{document_field}__contains": term})
+        return queryset
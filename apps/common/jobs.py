@@ -0,0 +1,227 @@
+"""Database-backed job queue.
+
+Work that should not run inside a request (rendering and uploading documents, for
+instance) is stored as ``BackgroundJob`` rows and executed by ``manage.py process_jobs``.
+Enqueueing is a plain INSERT in the caller's transaction, so a rolled back request
+leaves no job behind and a committed one is visible to workers right away.
+
+Workers claim due jobs with ``SELECT ... FOR UPDATE SKIP LOCKED``: several processes
+(and the threads inside each) can poll the same table without handing out a job twice.
+A failing job is retried with exponential backoff until ``max_attempts``, after which
+the task's ``on_failure`` hook runs. Jobs left ``running`` by a crashed worker are put
+back in the queue after ``STALE_AFTER``.
+
+Tasks are registered with ``@task("app.name")`` in an app's ``tasks`` module; those
+modules are imported the first time a task is looked up.
+"""
+from __future__ import annotations
+
+import datetime
+import logging
+import os
+import socket
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .activity_writer import activity_log_writer
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = datetime.timedelta(seconds=30)
+STALE_AFTER = datetime.timedelta(minutes=15)
+
+
+@dataclass(frozen=True)
+class Task:
+    """A registered job handler."""
+
+    name: str
+    run: Callable[[dict[str, Any]], Any]
+    on_failure: Callable[[dict[str, Any], str], Any] | None = None
+    max_attempts: int = 3
+
+
+_REGISTRY: dict[str, Task] = {}
+_discovered = False
+_discover_lock = threading.Lock()
+
+
+def task(
+    name: str,
+    *,
+    max_attempts: int = 3,
+    on_failure: Callable[[dict[str, Any], str], Any] | None = None,
+) -> Callable[[Callable[[dict[str, Any]], Any]], Callable[[dict[str, Any]], Any]]:
+    """Register the decorated ``function(payload)`` under ``name``."""
+
+    def decorator(function: Callable[[dict[str, Any]], Any]) -> Callable[[dict[str, Any]], Any]:
+        _REGISTRY[name] = Task(
+            name=name, run=function, on_failure=on_failure, max_attempts=max_attempts
+        )
+        return function
+
+    return decorator
+
+
+def get_task(name: str) -> Task:
+    global _discovered
+    if not _discovered:
+        with _discover_lock:
+            if not _discovered:
+                autodiscover_modules("tasks")
+                _discovered = True
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise LookupError(f"Unknown background task {name!r}.") from None
+
+
+def enqueue(
+    name: str,
+    payload: dict[str, Any] | None = None,
+    *,
+    unique_key: str = "",
+    priority: int = 0,
+    run_after: datetime.datetime | None = None,
+) -> BackgroundJob | None:
+    """Queue a job in the current transaction.
+
+    With ``unique_key`` nothing is queued while an identical job is still waiting (the
+    waiting job will see the latest data when it runs); ``None`` is returned then.
+    """
+
+    spec = get_task(name)
+    if unique_key and BackgroundJob.objects.filter(
+        task=name, unique_key=unique_key, status=BackgroundJob.Status.QUEUED
+    ).exists():
+        return None
+    return BackgroundJob.objects.create(
+        task=name,
+        payload=payload or {},
+        unique_key=unique_key,
+        priority=priority,
+        run_after=run_after or timezone.now(),
+        max_attempts=spec.max_attempts,
+    )
+
+
+def enqueue_many(
+    name: str,
+    payloads: list[dict[str, Any]],
+    *,
+    unique_keys: list[str] | None = None,
+    priority: int = 0,
+) -> list[BackgroundJob]:
+    """Queue one job per payload with a single INSERT (no de-duplication)."""
+
+    spec = get_task(name)
+    now = timezone.now()
+    keys = unique_keys or [""] * len(payloads)
+    return BackgroundJob.objects.bulk_create(
+        [
+            BackgroundJob(
+                task=name,
+                payload=payload,
+                unique_key=key,
+                priority=priority,
+                run_after=now,
+                max_attempts=spec.max_attempts,
+            )
+            for payload, key in zip(payloads, keys, strict=True)
+        ],
+        batch_size=1000,
+    )
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(limit: int, *, worker: str, tasks: list[str] | None = None) -> list[BackgroundJob]:
+    """Lock and mark as running up to ``limit`` due jobs that no other worker holds."""
+
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = BackgroundJob.objects.select_for_update(skip_locked=True).filter(
+            status=BackgroundJob.Status.QUEUED, run_after__lte=now
+        )
+        if tasks:
+            queryset = queryset.filter(task__in=tasks)
+        jobs = list(queryset.order_by("priority", "run_after")[:limit])
+        for job in jobs:
+            job.status = BackgroundJob.Status.RUNNING
+            job.attempts += 1
+            job.locked_by = worker
+            job.locked_at = now
+            job.updated_at = now
+        BackgroundJob.objects.bulk_update(
+            jobs, ["status", "attempts", "locked_by", "locked_at", "updated_at"]
+        )
+    return jobs
+
+
+def run_job(job: BackgroundJob) -> bool:
+    """Execute a claimed job and record the outcome; returns whether it succeeded."""
+
+    try:
+        spec = get_task(job.task)
+        # Timeline entries the job logs are written in one batch when it finishes.
+        with activity_log_writer.collect():
+            spec.run(job.payload)
+    except Exception as exc:  # noqa: BLE001 - recorded on the job
+        logger.exception("Background job %s (%s) failed", job.pk, job.task)
+        _record_failure(job, f"{type(exc).__name__}: {exc}")
+        return False
+
+    BackgroundJob.objects.filter(pk=job.pk).update(
+        status=BackgroundJob.Status.SUCCEEDED,
+        finished_at=timezone.now(),
+        last_error="",
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+def _record_failure(job: BackgroundJob, error: str) -> None:
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        delay = RETRY_BASE_DELAY * 2 ** (job.attempts - 1)
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.Status.QUEUED,
+            run_after=now + delay,
+            last_error=error,
+            updated_at=now,
+        )
+        return
+
+    BackgroundJob.objects.filter(pk=job.pk).update(
+        status=BackgroundJob.Status.FAILED, finished_at=now, last_error=error, updated_at=now
+    )
+    spec = _REGISTRY.get(job.task)
+    if spec is not None and spec.on_failure is not None:
+        try:
+            spec.on_failure(job.payload, error)
+        except Exception:  # noqa: BLE001 - the job is already marked failed
+            logger.exception("on_failure hook of background job %s failed", job.pk)
+
+
+def requeue_stale(*, older_than: datetime.timedelta = STALE_AFTER) -> int:
+    """Put back jobs whose worker died while running them."""
+
+    now = timezone.now()
+    return BackgroundJob.objects.filter(
+        status=BackgroundJob.Status.RUNNING, locked_at__lt=now - older_than
+    ).update(
+        status=BackgroundJob.Status.QUEUED,
+        locked_by="",
+        locked_at=None,
+        run_after=now,
+        updated_at=now,
+    )
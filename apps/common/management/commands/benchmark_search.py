@@ -0,0 +1,129 @@
+"""Seed vehicles and measure global search latency.
+
+Vehicles are seeded with ``bulk_create`` under a throwaway client and indexed in bulk,
+then a mix of full VINs, VIN prefixes, VIN serials and unit numbers is searched. The
+seeded rows are removed afterwards unless ``--keep`` is given.
+"""
+from __future__ import annotations
+
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.assets.models import Vehicle
+from apps.clients.models import Client
+from apps.common.models import SearchIndexEntry
+from apps.common.search_index import VIN_SERIAL_LENGTH, build_entries, search
+from apps.lookups.models import VehicleType
+
+VIN_ALPHABET = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+
+
+def _encode(number: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        number, remainder = divmod(number, len(VIN_ALPHABET))
+        digits.append(VIN_ALPHABET[remainder])
+    return "".join(reversed(digits))
+
+
+class Command(BaseCommand):
+    help = "Seed vehicles into the search index and report search latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vehicles", type=int, default=1_000_000)
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded rows.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        client = Client.objects.create(company_name=f"Search Benchmark {uuid.uuid4().hex[:8]}")
+        vehicle_type, _ = VehicleType.objects.get_or_create(name="Benchmark")
+
+        started = time.perf_counter()
+        samples = self._seed(client, vehicle_type, rng, options["vehicles"], options["batch_size"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Seeded and indexed {options['vehicles']} vehicles in {elapsed:.1f}s")
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"ANALYZE {connection.ops.quote_name(SearchIndexEntry._meta.db_table)}"
+                )
+
+        try:
+            self._measure(samples, rng, options["queries"])
+        finally:
+            if not options["keep"]:
+                self._cleanup(client)
+
+    def _seed(self, client, vehicle_type, rng, total, batch_size) -> list[tuple[str, str]]:
+        samples: list[tuple[str, str]] = []
+        prefix = "".join(rng.choice(VIN_ALPHABET) for _ in range(4))
+        for start in range(0, total, batch_size):
+            vehicles = []
+            for number in range(start, min(start + batch_size, total)):
+                body = "".join(rng.choice(VIN_ALPHABET) for _ in range(17 - 4 - VIN_SERIAL_LENGTH))
+                vehicles.append(
+                    Vehicle(
+                        client=client,
+                        vin=f"{prefix}{body}{_encode(number, VIN_SERIAL_LENGTH)}",
+                        unit_number=f"U{number}",
+                        vehicle_type=vehicle_type,
+                        year=2000 + number % 25,
+                        make="Freightliner",
+                        model="Cascadia",
+                    )
+                )
+            with transaction.atomic():
+                Vehicle.objects.bulk_create(vehicles, batch_size=batch_size)
+                SearchIndexEntry.objects.bulk_create(build_entries(vehicles), batch_size=batch_size)
+            if len(samples) < 1000:
+                samples.extend(
+                    (v.vin, v.unit_number) for v in rng.sample(vehicles, min(10, len(vehicles)))
+                )
+            self.stdout.write(f"  {min(start + batch_size, total)}/{total}", ending="\r")
+        self.stdout.write("")
+        return samples
+
+    def _measure(self, samples, rng, count) -> None:
+        kinds = {
+            "vin": lambda vin, unit: vin,
+            "vin_prefix": lambda vin, unit: vin[:8],
+            "vin_serial": lambda vin, unit: vin[-VIN_SERIAL_LENGTH:],
+            "unit_number": lambda vin, unit: unit,
+        }
+        timings: dict[str, list[float]] = {kind: [] for kind in kinds}
+        for index in range(count):
+            kind = list(kinds)[index % len(kinds)]
+            vin, unit = rng.choice(samples)
+            started = time.perf_counter()
+            search(kinds[kind](vin, unit))
+            timings[kind].append((time.perf_counter() - started) * 1000)
+
+        everything = [value for values in timings.values() for value in values]
+        for kind, values in [*timings.items(), ("all", everything)]:
+            if not values:
+                continue
+            values.sort()
+            p95 = values[max(0, int(len(values) * 0.95) - 1)]
+            self.stdout.write(
+                f"{kind:<12} n={len(values):<5} p50={statistics.median(values):.2f}ms "
+                f"p95={p95:.2f}ms max={values[-1]:.2f}ms"
+            )
+
+    def _cleanup(self, client) -> None:
+        SearchIndexEntry.objects.filter(client_id=client.pk).delete()
+        # A raw delete: the ORM collector would load and signal every seeded vehicle.
+        client_id = Vehicle._meta.get_field("client").get_db_prep_value(client.pk, connection)
+        with transaction.atomic(), connection.cursor() as cursor:
+            table = connection.ops.quote_name(Vehicle._meta.db_table)
+            cursor.execute(f"DELETE FROM {table} WHERE client_id = %s", [client_id])
+        client.delete()
+        self.stdout.write("Removed seeded rows")
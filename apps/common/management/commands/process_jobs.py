@@ -0,0 +1,94 @@
+"""Run queued background jobs (document rendering and other deferred work)."""
+from __future__ import annotations
+
+import datetime
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.common.jobs import claim, requeue_stale, run_job, worker_name
+
+
+def _run_in_thread(job) -> bool:
+    # Each pool thread keeps its own connection, recycled like a request's would be.
+    close_old_connections()
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Process background jobs from the database queue; run one or more of these per host."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=4, help="Jobs run in parallel (threads)"
+        )
+        parser.add_argument(
+            "--task", action="append", dest="tasks", help="Only run these tasks (repeatable)"
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once no job is due instead of polling"
+        )
+        parser.add_argument("--max-jobs", type=int, help="Exit after this many jobs")
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=15,
+            help="Requeue jobs running for more than this many minutes",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options["concurrency"]
+        if concurrency < 1:
+            raise CommandError("--concurrency must be >= 1.")
+        stale_after = datetime.timedelta(minutes=options["stale_after"])
+        worker = worker_name()
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+            self.stdout.write("Stopping after the current batch...")
+
+        previous = {
+            signum: signal.signal(signum, stop) for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+
+        succeeded = failed = 0
+        pool = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else None
+        try:
+            while not stopping:
+                requeue_stale(older_than=stale_after)
+                limit = concurrency
+                if options["max_jobs"] is not None:
+                    limit = min(limit, options["max_jobs"] - succeeded - failed)
+                    if limit <= 0:
+                        break
+                jobs = claim(limit, worker=worker, tasks=options["tasks"])
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                results = pool.map(_run_in_thread, jobs) if pool else map(run_job, jobs)
+                for ok in results:
+                    succeeded += ok
+                    failed += not ok
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+        self.stdout.write(f"{worker}: {succeeded} jobs succeeded, {failed} failed")
@@ -0,0 +1,32 @@
+"""Rebuild the global search index from the source tables."""
+from __future__ import annotations
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.common.search_index import INDEXED_ENTITIES, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the global search index (all entity types, or those given)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "labels",
+            nargs="*",
+            metavar="app_label.model",
+            help=f"Models to reindex; defaults to {', '.join(INDEXED_ENTITIES)}.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        labels = [label.lower() for label in options["labels"]] or list(INDEXED_ENTITIES)
+        unknown = sorted(set(labels) - set(INDEXED_ENTITIES))
+        if unknown:
+            raise CommandError(f"Not indexed: {', '.join(unknown)}")
+
+        for label in labels:
+            with transaction.atomic():
+                written = rebuild_index(apps.get_model(label), batch_size=options["batch_size"])
+            self.stdout.write(f"{label}: {written} entries")
@@ -0,0 +1,37 @@
+"""Shared request middleware."""
+from __future__ import annotations
+
+from contextvars import ContextVar
+
+from .activity_writer import activity_log_writer
+
+_current_request: ContextVar = ContextVar("current_request", default=None)
+
+
+def get_current_user():
+    """Return the authenticated user of the request being processed, if any.
+
+    ``request.user`` is read lazily so DRF authentication (which runs inside the view)
+    has already replaced the anonymous session user by the time activity is logged.
+    """
+
+    request = _current_request.get()
+    user = getattr(request, "user", None) if request is not None else None
+    if user is None or not user.is_authenticated:
+        return None
+    return user
+
+
+class ActivityLogBufferMiddleware:
+    """Collect activity log entries for the whole request and write them in one batch."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _current_request.set(request)
+        try:
+            with activity_log_writer.collect():
+                return self.get_response(request)
+        finally:
+            _current_request.reset(token)
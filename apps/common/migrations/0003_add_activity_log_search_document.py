@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:19
+
+import re
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 500
+
+
+def _normalize(values):
+    # Frozen copy of apps.common.search.normalize as of this migration.
+    text = " ".join(str(value) for value in values if value not in (None, ""))
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def backfill_search_documents(apps, schema_editor):
+    ActivityLog = apps.get_model("common", "ActivityLog")
+    entries = ActivityLog.objects.select_related("policy", "client", "vehicle", "driver")
+    batch = []
+    for entry in entries.iterator(chunk_size=BATCH_SIZE):
+        values = [
+            entry.transaction_name,
+            entry.description,
+            entry.notes,
+            entry.policy.policy_number if entry.policy else None,
+            entry.client.company_name if entry.client else None,
+            entry.vehicle.vin if entry.vehicle else None,
+            entry.driver.first_name if entry.driver else None,
+            entry.driver.last_name if entry.driver else None,
+        ]
+        entry.search_document = _normalize(values)
+        batch.append(entry)
+        if len(batch) >= BATCH_SIZE:
+            ActivityLog.objects.bulk_update(batch, ["search_document"])
+            batch = []
+    ActivityLog.objects.bulk_update(batch, ["search_document"])
+
+
+def add_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS "common_activitylog_search_trgm" ON "common_activitylog" USING gin ("search_document" gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS "common_activitylog_search_trgm"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_add_activity_log_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitylog',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Denormalized search text maintained by apps.common.search'),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(add_trigram_index, drop_trigram_index),
+    ]
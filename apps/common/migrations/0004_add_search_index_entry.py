@@ -0,0 +1,135 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:22
+
+import re
+
+from django.db import migrations, models
+
+
+# Frozen copies of the apps.common.search_index rules as of this migration.
+BATCH_SIZE = 1000
+MIN_TERM_LENGTH = 2
+VIN_SERIAL_LENGTH = 6
+
+
+def _normalize(value):
+    return re.sub(r"\s+", " ", value or "").strip().lower()
+
+
+def _identifier(value):
+    return re.sub(r"[^0-9a-z]", "", (value or "").lower())
+
+
+def _join(*parts):
+    return " · ".join(str(part) for part in parts if part)
+
+
+def _client(client):
+    words = _normalize(client.company_name).split(" ")
+    terms = [
+        ("dot_number", _identifier(client.dot_number), 0),
+        ("fein", _identifier(client.fein), 0),
+        ("company_name", _normalize(client.company_name), 10),
+    ]
+    terms += [("company_name_word", word, 20) for word in words[1:]]
+    sublabel = _join(
+        client.dot_number and f"DOT {client.dot_number}",
+        client.fein and f"FEIN {client.fein}",
+    )
+    return "client", client.pk, terms, client.company_name, sublabel
+
+
+def _policy(policy):
+    terms = [("policy_number", _identifier(policy.policy_number), 0)]
+    sublabel = _join(policy.effective_date, policy.maturity_date and f"to {policy.maturity_date}")
+    return "policy", policy.client_id, terms, policy.policy_number, sublabel
+
+
+def _vehicle(vehicle):
+    terms = [
+        ("vin", _identifier(vehicle.vin), 0),
+        ("vin_serial", _identifier(vehicle.vin[-VIN_SERIAL_LENGTH:]), 5),
+        ("unit_number", _identifier(vehicle.unit_number), 10),
+    ]
+    sublabel = _join(
+        vehicle.unit_number and f"Unit {vehicle.unit_number}",
+        " ".join(str(part) for part in (vehicle.year, vehicle.make, vehicle.model) if part),
+    )
+    return "vehicle", vehicle.client_id, terms, vehicle.vin, sublabel
+
+
+def _driver(driver):
+    terms = [("license_number", _identifier(driver.license_number), 0)]
+    label = f"{driver.first_name} {driver.last_name}".strip()
+    sublabel = _join(
+        driver.license_state and f"License {driver.license_state} {driver.license_number}"
+    )
+    return "driver", driver.client_id, terms, label, sublabel
+
+
+SOURCES = (
+    ("clients", "Client", _client),
+    ("policies", "Policy", _policy),
+    ("assets", "Vehicle", _vehicle),
+    ("assets", "Driver", _driver),
+)
+
+
+def backfill_search_index(apps, schema_editor):
+    SearchIndexEntry = apps.get_model("common", "SearchIndexEntry")
+    entries = []
+    for app_label, model_name, describe in SOURCES:
+        model = apps.get_model(app_label, model_name)
+        for instance in model.objects.filter(is_active=True).iterator(chunk_size=BATCH_SIZE):
+            entity_type, client_id, terms, label, sublabel = describe(instance)
+            seen = set()
+            for field, term, weight in terms:
+                if len(term) < MIN_TERM_LENGTH or term in seen:
+                    continue
+                seen.add(term)
+                entries.append(
+                    SearchIndexEntry(
+                        entity_type=entity_type,
+                        object_id=instance.pk,
+                        client_id=client_id,
+                        field=field,
+                        term=term[:255],
+                        weight=weight,
+                        label=label[:255],
+                        sublabel=sublabel[:255],
+                    )
+                )
+            if len(entries) >= BATCH_SIZE:
+                SearchIndexEntry.objects.bulk_create(entries)
+                entries = []
+    SearchIndexEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0004_add_vehicle_keyset_index'),
+        ('clients', '0002_add_client_search_document'),
+        ('common', '0003_add_activity_log_search_document'),
+        ('policies', '0005_add_policy_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('client', 'Client'), ('policy', 'Policy'), ('vehicle', 'Vehicle'), ('driver', 'Driver')], max_length=16)),
+                ('object_id', models.UUIDField()),
+                ('client_id', models.UUIDField(blank=True, null=True)),
+                ('field', models.CharField(help_text='Attribute the term was derived from', max_length=32)),
+                ('term', models.CharField(help_text='Normalized (lower-case) search term', max_length=255)),
+                ('weight', models.PositiveSmallIntegerField(default=0, help_text='Ranking weight; lower ranks first')),
+                ('label', models.CharField(max_length=255)),
+                ('sublabel', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term'], name='common_search_term_prefix', opclasses=['varchar_pattern_ops']), models.Index(fields=['entity_type', 'object_id'], name='common_search_object')],
+            },
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
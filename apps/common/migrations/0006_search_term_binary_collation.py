@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:10
+
+import apps.common.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_add_background_job'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='searchindexentry',
+            name='common_search_term_prefix',
+        ),
+        migrations.AddIndex(
+            model_name='searchindexentry',
+            index=models.Index(apps.common.models.BinaryCollate('term'), name='common_search_term_prefix'),
+        ),
+    ]
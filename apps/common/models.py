@@ -6,6 +6,7 @@ import uuid
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
+from django.utils.deconstruct import deconstructible
 
 
 class TimeStampedModel(models.Model):
@@ -155,11 +156,18 @@ class ActivityLog(UUIDPrimaryKeyModel):
 
     # Additional context stored as JSON
     metadata = models.JSONField(default=dict, blank=True)
+    search_document = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Denormalized search text maintained by apps.common.search",
+    )
 
     class Meta:
         ordering = ("-timestamp",)
         indexes = [
-            models.Index(fields=["client", "-timestamp"]),
+            models.Index(fields=["-timestamp", "-id"]),
+            models.Index(fields=["client", "-timestamp", "-id"]),
             models.Index(fields=["policy", "-timestamp"]),
             models.Index(fields=["action_type", "-timestamp"]),
         ]
@@ -180,3 +188,96 @@ class ActivityLog(UUIDPrimaryKeyModel):
         if self.policy:
             return self.policy.policy_number
         return None
+
+
+@deconstructible(path="apps.common.models.BinaryCollate")
+class BinaryCollate(models.Func):
+    """``expression COLLATE "C"``: strings compared byte by byte, whatever the database collation.
+
+    SQLite has no ``"C"`` collation but already compares text bytewise (``BINARY``).
+    """
+
+    template = '%(expressions)s COLLATE "C"'
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return compiler.compile(self.get_source_expressions()[0])
+
+
+class SearchIndexEntry(models.Model):
+    """
+    One searchable term of a client, policy, vehicle or driver.
+    Powers the global search endpoint with indexed prefix matches; maintained by
+    ``apps.common.search_index``.
+    """
+
+    class EntityType(models.TextChoices):
+        CLIENT = "client", "Client"
+        POLICY = "policy", "Policy"
+        VEHICLE = "vehicle", "Vehicle"
+        DRIVER = "driver", "Driver"
+
+    entity_type = models.CharField(max_length=16, choices=EntityType.choices)
+    object_id = models.UUIDField()
+    client_id = models.UUIDField(null=True, blank=True)
+    field = models.CharField(max_length=32, help_text="Attribute the term was derived from")
+    term = models.CharField(max_length=255, help_text="Normalized (lower-case) search term")
+    weight = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Ranking weight; lower ranks first",
+    )
+    label = models.CharField(max_length=255)
+    sublabel = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            # Under the "C" collation one index serves both ``LIKE 'term%'`` and ``ORDER BY``
+            # whatever the database collation; queries must use the same expression.
+            models.Index(BinaryCollate("term"), name="common_search_term_prefix"),
+            models.Index(fields=["entity_type", "object_id"], name="common_search_object"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial formatting
+        return f"{self.entity_type}:{self.term}"
+
+
+class BackgroundJob(UUIDPrimaryKeyModel, TimeStampedModel):
+    """
+    Unit of deferred work stored in the database and run by ``manage.py process_jobs``.
+    Claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` so several workers can share the
+    table without an external broker; see ``apps.common.jobs``.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    task = models.CharField(
+        max_length=128, help_text="Registered task name, e.g. certificates.render_document"
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    unique_key = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Enqueueing is skipped while a queued job with the same task and key exists",
+    )
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    priority = models.SmallIntegerField(default=0, help_text="Lower runs first")
+    run_after = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    locked_by = models.CharField(max_length=128, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ("priority", "run_after")
+        indexes = [
+            models.Index(fields=["status", "priority", "run_after"], name="common_job_claim"),
+            models.Index(fields=["task", "unique_key"], name="common_job_unique_key"),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial formatting
+        return f"{self.task} ({self.status})"
@@ -0,0 +1,352 @@
+"""Pagination classes shared by the API."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """JSON encoder keeping full microsecond precision, unlike ``DjangoJSONEncoder``."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique composite ordering such as ``("-timestamp", "-id")``.
+
+    Each page is fetched with a ``WHERE (key) < (last key)`` condition instead of an
+    ``OFFSET``, and no total count is computed, so page N costs the same as page 1 as
+    long as an index matches the ordering.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, ordering: Sequence[str], page_size: int) -> None:
+        self.ordering = tuple(ordering)
+        self.page_size = page_size
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> list[Any]:
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor["reverse"])
+        ordering = self._reversed(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(ordering, cursor["position"]))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = cursor is not None, has_more
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data) -> Response:
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self) -> str | None:
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> str | None:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, *, reverse: bool) -> str:
+        position = [getattr(row, self._field_name(term)) for term in self.ordering]
+        payload = json.dumps({"p": position, "r": int(reverse)}, cls=CursorEncoder)
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request) -> dict[str, Any] | None:
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            raw_position = payload["p"]
+            if len(raw_position) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(self._field_name(term)).to_python(value)
+                for term, value in zip(self.ordering, raw_position, strict=True)
+            ]
+            return {"position": position, "reverse": bool(payload.get("r"))}
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message) from None
+
+    @staticmethod
+    def _field_name(term: str) -> str:
+        return term.lstrip("-")
+
+    @staticmethod
+    def _reversed(ordering: Sequence[str]) -> tuple[str, ...]:
+        return tuple(term[1:] if term.startswith("-") else f"-{term}" for term in ordering)
+
+    def _after(self, ordering: Sequence[str], position: Sequence[Any]) -> Q:
+        # Expands ``(a, b) > (x, y)`` into ``a > x OR (a = x AND b > y)``; the extra
+        # ``a >= x`` conjunct lets the planner turn it into a single index range scan.
+        condition = Q()
+        equal = Q()
+        for term, value in zip(ordering, position, strict=True):
+            name = self._field_name(term)
+            lookup = "lt" if term.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        first = ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{self._field_name(first)}__{bound}": position[0]}) & condition
+
+
+class CountAwarePaginator(DjangoPaginator):
+    """Django paginator that obtains its total from ``count_resolver`` when given."""
+
+    def __init__(self, object_list, per_page, *, count_resolver=None, **kwargs) -> None:
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_resolver = count_resolver
+
+    @cached_property
+    def count(self) -> int:
+        if self.count_resolver is None:
+            return super().count
+        return self.count_resolver(self.object_list)
+
+
+class SelectablePagination(PageNumberPagination):
+    """Default API pagination.
+
+    * Page-number pagination whose total ``count`` is cached per filter signature for
+      ``PAGINATION_COUNT_CACHE_TTL`` seconds and, for querysets without any filter on
+      PostgreSQL above ``PAGINATION_ESTIMATE_THRESHOLD`` rows, taken from
+      ``pg_class.reltuples``.
+    * ``?count=false`` skips the count and reports ``has_next`` instead.
+    * ``?pagination=cursor`` switches to keyset pagination on views declaring
+      ``cursor_ordering``, a unique ordering backed by an index.
+
+    The ``Server-Timing`` response header reports how the count was obtained and how
+    long it took.
+    """
+
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+    count_query_param = "count"
+    count_cache_key = "pagination:count:{label}:{signature}"
+
+    def django_paginator_class(self, object_list, per_page) -> CountAwarePaginator:
+        # Called by ``PageNumberPagination.paginate_queryset`` in place of a class.
+        return CountAwarePaginator(object_list, per_page, count_resolver=self.resolve_count)
+
+    def resolve_count(self, queryset) -> int:
+        started = time.perf_counter()
+        count, source = self._count(queryset)
+        self.count_timing = (source, (time.perf_counter() - started) * 1000)
+        return count
+
+    def _count(self, queryset) -> tuple[int, str]:
+        if not isinstance(queryset, QuerySet):
+            return len(queryset), "exact"
+
+        if self.is_unfiltered(queryset):
+            estimate = self.estimate_count(queryset)
+            if estimate is not None and estimate >= settings.PAGINATION_ESTIMATE_THRESHOLD:
+                return estimate, "estimate"
+
+        key = self.count_cache_key.format(
+            label=queryset.model._meta.label_lower, signature=self.filter_signature(queryset)
+        )
+        count = cache.get(key)
+        if count is not None:
+            return count, "cached"
+        count = queryset.count()
+        cache.set(key, count, timeout=settings.PAGINATION_COUNT_CACHE_TTL)
+        return count, "exact"
+
+    @staticmethod
+    def is_unfiltered(queryset: QuerySet) -> bool:
+        # Any WHERE clause counts: query parameters, but also a view's own scoping such as
+        # the ``is_active`` default of soft-delete viewsets, which the estimate ignores.
+        return not queryset.query.where and not queryset.query.distinct
+
+    @staticmethod
+    def filter_signature(queryset: QuerySet) -> str:
+        # The compiled SQL covers query parameters, default filters and any per-user scoping.
+        sql, params = queryset.order_by().query.sql_with_params()
+        return hashlib.sha1(f"{sql}|{params!r}".encode()).hexdigest()
+
+    @staticmethod
+    def estimate_count(queryset: QuerySet) -> int | None:
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        # ``reltuples`` is -1 (or 0) until the table has been vacuumed/analyzed.
+        if row is None or row[0] is None or row[0] <= 0:
+            return None
+        return int(row[0])
+
+    def count_requested(self, request) -> bool:
+        return request.query_params.get(self.count_query_param, "").lower() not in ("false", "0")
+
+    def get_cursor_paginator(self, request, view) -> KeysetPagination | None:
+        ordering = getattr(view, "cursor_ordering", None)
+        if not ordering or request.query_params.get(self.mode_query_param) != self.cursor_mode:
+            return None
+        return KeysetPagination(ordering, self.get_page_size(request) or self.page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_timing = None
+        self.without_count = False
+        self.cursor_paginator = self.get_cursor_paginator(request, view)
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        if not self.count_requested(request):
+            return self.paginate_without_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_without_count(self, queryset, request) -> list[Any] | None:
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        raw_page = request.query_params.get(self.page_query_param) or 1
+        try:
+            page_number = int(raw_page)
+            if page_number < 1:
+                raise ValueError
+        except ValueError:
+            message = self.invalid_page_message.format(
+                page_number=raw_page, message="Invalid page."
+            )
+            raise NotFound(message) from None
+
+        offset = (page_number - 1) * page_size
+        rows = list(queryset[offset : offset + page_size + 1])
+        self.without_count = True
+        self.page_number = page_number
+        self.has_next = len(rows) > page_size
+        self.count_timing = ("skipped", 0.0)
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if getattr(self, "cursor_paginator", None) is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        if self.without_count:
+            response = Response(
+                OrderedDict(
+                    [
+                        ("has_next", self.has_next),
+                        ("next", self._page_link(self.page_number + 1) if self.has_next else None),
+                        (
+                            "previous",
+                            self._page_link(self.page_number - 1) if self.page_number > 1 else None,
+                        ),
+                        ("results", data),
+                    ]
+                )
+            )
+        else:
+            response = super().get_paginated_response(data)
+        if self.count_timing is not None:
+            source, duration = self.count_timing
+            response["Server-Timing"] = f'count;desc="{source}";dur={duration:.2f}'
+        return response
+
+    def _page_link(self, page_number: int) -> str:
+        url = self.request.build_absolute_uri()
+        if page_number == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, page_number)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "Set to `false` to skip the total count; "
+                    "the response reports `has_next` instead."
+                ),
+                "schema": {"type": "boolean"},
+            }
+        )
+        if getattr(view, "cursor_ordering", None):
+            parameters += [
+                {
+                    "name": self.mode_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": (
+                        "Set to `cursor` for keyset pagination (no count, constant cost per page)."
+                    ),
+                    "schema": {"type": "string", "enum": [self.cursor_mode]},
+                },
+                {
+                    "name": KeysetPagination.cursor_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Opaque cursor taken from the `next`/`previous` links.",
+                    "schema": {"type": "string"},
+                },
+            ]
+        return parameters
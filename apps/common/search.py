@@ -0,0 +1,316 @@
+"""Denormalized search documents for list endpoints.
+
+``Client``, ``Policy`` and ``ActivityLog`` carry a ``search_document`` column: the
+lower-cased concatenation of every value their list endpoint searches on, including
+values from related rows (DBA names, contact names, carrier names...). Searching then
+filters a single column instead of JOINing (and de-duplicating) related tables. On
+PostgreSQL the column has a trigram GIN index, so ``LIKE '%term%'`` is indexed; other
+databases fall back to a sequential scan over the one column.
+
+Documents are kept current incrementally:
+
+* the saved instance's own document is rebuilt in ``pre_save`` and written by the same
+  INSERT/UPDATE when its source fields changed (compared with a snapshot taken in
+  ``post_init``, so an unchanged save costs nothing). Related sets that are not already
+  prefetched are not queried on save; the document is rebuilt after commit instead;
+* changes to rows that feed other documents (a DBA, a contact, a carrier name) mark
+  those documents stale, and they are rebuilt in bulk, de-duplicated, once the
+  transaction commits.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+from django.apps import apps
+from django.db import router, transaction
+from django.db.models import Manager, Model, Q, prefetch_related_objects
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+DOCUMENT_FIELD = "search_document"
+SOURCE_SNAPSHOT_ATTR = "_search_document_source"
+REFRESH_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class SearchDocumentSpec:
+    """Field paths (``__`` separated, like ``search_fields``) that make up a document."""
+
+    fields: tuple[str, ...]
+    select_related: tuple[str, ...] = ()
+    prefetch_related: tuple[str, ...] = ()
+
+    @property
+    def local_fields(self) -> frozenset[str]:
+        return frozenset(path.split("__", 1)[0] for path in self.fields)
+
+    def source_attnames(self, model: type[Model]) -> tuple[str, ...]:
+        """Concrete columns of ``model`` the document is built from."""
+
+        return tuple(
+            field.attname
+            for field in model._meta.concrete_fields
+            if field.name in self.local_fields
+        )
+
+
+SEARCH_DOCUMENTS: dict[str, SearchDocumentSpec] = {
+    "clients.client": SearchDocumentSpec(
+        fields=(
+            "company_name",
+            "dot_number",
+            "fein",
+            "referral_source",
+            "dbas__dba_name",
+            "contacts__first_name",
+            "contacts__last_name",
+        ),
+        prefetch_related=("dbas", "contacts"),
+    ),
+    "policies.policy": SearchDocumentSpec(
+        fields=(
+            "policy_number",
+            "client__company_name",
+            "carrier_product__insurance_company_name",
+            "carrier_product__general_agent__name",
+        ),
+        select_related=("client", "carrier_product__general_agent"),
+    ),
+    "common.activitylog": SearchDocumentSpec(
+        fields=(
+            "transaction_name",
+            "description",
+            "notes",
+            "policy__policy_number",
+            "client__company_name",
+            "vehicle__vin",
+            "driver__first_name",
+            "driver__last_name",
+        ),
+        select_related=("policy", "client", "vehicle", "driver"),
+    ),
+}
+
+# Saving (or deleting) a row of the key model makes these documents stale:
+# (document model, lookup on the document model, attribute of the changed row).
+# Activity log documents describe the entities as they were when the entry was written
+# and are deliberately not refreshed.
+DEPENDENT_DOCUMENTS: dict[str, tuple[tuple[str, str, str], ...]] = {
+    "clients.client": (("policies.policy", "client_id", "pk"),),
+    "clients.clientdba": (("clients.client", "pk", "client_id"),),
+    "clients.contact": (("clients.client", "pk", "client_id"),),
+    "policies.carrierproduct": (("policies.policy", "carrier_product_id", "pk"),),
+    "policies.generalagent": (("policies.policy", "carrier_product__general_agent_id", "pk"),),
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Lower-case ``text`` and collapse whitespace, as stored in documents."""
+
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def _resolve(obj: Any, parts: list[str], *, include_related_sets: bool) -> list[Any]:
+    if obj is None:
+        return []
+    if not parts:
+        return [obj]
+    value = getattr(obj, parts[0])
+    if isinstance(value, Manager):
+        if not include_related_sets:
+            return []
+        rows = [row for row in value.all() if getattr(row, "is_active", True)]
+        return [
+            item
+            for row in rows
+            for item in _resolve(row, parts[1:], include_related_sets=include_related_sets)
+        ]
+    return _resolve(value, parts[1:], include_related_sets=include_related_sets)
+
+
+def build_document(instance: Model, *, include_related_sets: bool = True) -> str:
+    """Return the search document of ``instance`` according to its spec."""
+
+    spec = SEARCH_DOCUMENTS[instance._meta.label_lower]
+    values: list[str] = []
+    for path in spec.fields:
+        for value in _resolve(
+            instance, path.split("__"), include_related_sets=include_related_sets
+        ):
+            if value not in (None, ""):
+                values.append(str(value))
+    return normalize(" ".join(values))
+
+
+def fill_search_documents(instances: list[Model]) -> None:
+    """Set the document of unsaved instances of one model, loading relations in bulk."""
+
+    if not instances:
+        return
+    spec = SEARCH_DOCUMENTS[instances[0]._meta.label_lower]
+    lookups = [*spec.select_related, *spec.prefetch_related]
+    if lookups:
+        prefetch_related_objects(instances, *lookups)
+    for instance in instances:
+        setattr(instance, DOCUMENT_FIELD, build_document(instance))
+
+
+def refresh_search_documents(
+    model: type[Model], condition: Q | None = None, *, cascade: bool = True
+) -> int:
+    """Rebuild stored documents of ``model`` rows matching ``condition`` (all rows if omitted).
+
+    With ``cascade`` documents depending on the changed ones are scheduled as well.
+    Returns the number of rows whose document changed.
+    """
+
+    label = model._meta.label_lower
+    spec = SEARCH_DOCUMENTS[label]
+    queryset = model._default_manager.all()
+    if condition is not None:
+        queryset = queryset.filter(condition)
+    queryset = queryset.select_related(*spec.select_related).prefetch_related(
+        *spec.prefetch_related
+    )
+
+    changed: list[Model] = []
+    for instance in queryset.iterator(chunk_size=REFRESH_BATCH_SIZE):
+        document = build_document(instance)
+        if document != getattr(instance, DOCUMENT_FIELD):
+            setattr(instance, DOCUMENT_FIELD, document)
+            changed.append(instance)
+    # ``bulk_update`` sends no signals and leaves ``updated_at`` untouched.
+    model._default_manager.bulk_update(changed, [DOCUMENT_FIELD], batch_size=REFRESH_BATCH_SIZE)
+    if cascade:
+        _schedule_dependents(label, changed)
+    return len(changed)
+
+
+# Deferred refreshes ---------------------------------------------------------------
+
+_state = threading.local()
+
+Runner = Callable[[type[Model], str, set[Any]], Any]
+
+
+def _pending(alias: str) -> dict[tuple[Runner, str, str], set[Any]]:
+    if not hasattr(_state, "pending"):
+        _state.pending = {}
+    return _state.pending.setdefault(alias, {})
+
+
+def defer_until_commit(
+    runner: Runner, label: str, lookup: str, values: Iterable[Any], *, using: str | None = None
+) -> None:
+    """Call ``runner(model, lookup, values)`` once the current transaction commits.
+
+    Requests are merged: the first commit hook to run drains everything pending, one
+    call per (runner, model, lookup), and the remaining hooks find nothing left to do.
+    """
+
+    values = {value for value in values if value is not None}
+    if not values:
+        return
+    alias = using or router.db_for_write(apps.get_model(label))
+    _pending(alias).setdefault((runner, label, lookup), set()).update(values)
+    transaction.on_commit(partial(_run_pending, alias), using=alias)
+
+
+def _run_pending(alias: str) -> None:
+    pending = _pending(alias)
+    batches = list(pending.items())
+    pending.clear()
+    for (runner, label, lookup), values in batches:
+        runner(apps.get_model(label), lookup, values)
+
+
+def _refresh_matching(model: type[Model], lookup: str, values: set[Any]) -> None:
+    refresh_search_documents(model, Q(**{f"{lookup}__in": values}))
+
+
+def schedule_refresh(
+    label: str, lookup: str, values: Iterable[Any], *, using: str | None = None
+) -> None:
+    """Rebuild the ``label`` documents matching ``lookup__in=values`` after commit.
+
+    A nested client save touching dozens of contacts refreshes the client document once.
+    """
+
+    defer_until_commit(_refresh_matching, label, lookup, values, using=using)
+
+
+def _schedule_dependents(label: str, instances: Iterable[Model]) -> None:
+    instances = list(instances)
+    for owner_label, lookup, attribute in DEPENDENT_DOCUMENTS.get(label, ()):
+        schedule_refresh(
+            owner_label, lookup, (getattr(instance, attribute) for instance in instances)
+        )
+
+
+# Signal handlers ------------------------------------------------------------------
+
+
+def _source_values(instance: Model) -> tuple[Any, ...]:
+    spec = SEARCH_DOCUMENTS[instance._meta.label_lower]
+    values = instance.__dict__
+    return tuple(values.get(attname) for attname in spec.source_attnames(type(instance)))
+
+
+def capture_source(sender, instance, **kwargs) -> None:
+    setattr(instance, SOURCE_SNAPSHOT_ATTR, _source_values(instance))
+
+
+def update_own_document(sender, instance, raw=False, update_fields=None, **kwargs) -> None:
+    if raw:
+        return
+    label = sender._meta.label_lower
+    spec = SEARCH_DOCUMENTS[label]
+    adding = instance._state.adding
+
+    if update_fields is not None:
+        # A partial save cannot add the document column; rebuild it after commit instead.
+        if spec.local_fields & set(update_fields):
+            schedule_refresh(label, "pk", [instance.pk])
+        return
+    if not adding and _source_values(instance) == getattr(instance, SOURCE_SNAPSHOT_ATTR, None):
+        return
+
+    prefetched = getattr(instance, "_prefetched_objects_cache", {})
+    if not adding and not all(name in prefetched for name in spec.prefetch_related):
+        schedule_refresh(label, "pk", [instance.pk])
+        return
+
+    # New rows have no related sets yet; their entries schedule a refresh as they are added.
+    document = build_document(instance, include_related_sets=not adding)
+    if not adding and document != getattr(instance, DOCUMENT_FIELD):
+        _schedule_dependents(label, [instance])
+    setattr(instance, DOCUMENT_FIELD, document)
+
+
+def mark_dependents_stale(sender, instance, raw=False, **kwargs) -> None:
+    if raw:
+        return
+    _schedule_dependents(sender._meta.label_lower, [instance])
+
+
+def connect_signals() -> None:
+    for label in SEARCH_DOCUMENTS:
+        model = apps.get_model(label)
+        uid = f"search-document-{label}"
+        post_init.connect(capture_source, sender=model, dispatch_uid=f"{uid}-init")
+        pre_save.connect(update_own_document, sender=model, dispatch_uid=f"{uid}-save")
+        post_save.connect(capture_source, sender=model, dispatch_uid=f"{uid}-saved")
+    for label in DEPENDENT_DOCUMENTS:
+        if label in SEARCH_DOCUMENTS:
+            # Handled in ``update_own_document``, only when the document really changed.
+            continue
+        model = apps.get_model(label)
+        uid = f"search-dependents-{label}"
+        post_save.connect(mark_dependents_stale, sender=model, dispatch_uid=f"{uid}-save")
+        post_delete.connect(mark_dependents_stale, sender=model, dispatch_uid=f"{uid}-delete")
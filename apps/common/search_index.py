@@ -0,0 +1,297 @@
+"""Unified search index behind ``/api/v1/search/``.
+
+Clients, policies, vehicles and drivers are flattened into ``SearchIndexEntry`` rows,
+one per searchable term (DOT number, FEIN, company name and its words, policy number,
+VIN and VIN serial, unit number, license number). Identifiers are stored lower-cased
+with punctuation stripped, so ``12-3456789`` and ``123456789`` match the same FEIN.
+
+A query is a prefix range scan on the ``term`` index, read in index order and capped,
+so its cost does not grow with the table. Entries are rebuilt after commit whenever a
+source row is saved or deleted; bulk writers call ``reindex_objects`` themselves.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from django.apps import apps
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+
+from .models import BinaryCollate, SearchIndexEntry
+from .search import defer_until_commit, normalize
+
+MIN_QUERY_LENGTH = 2
+DEFAULT_LIMIT = 20
+# Prefix matches read per query variant before ranking; keeps short queries bounded.
+CANDIDATE_LIMIT = 200
+REINDEX_BATCH_SIZE = 1000
+# Positions 12-17 of a VIN are the production serial number agents usually quote.
+VIN_SERIAL_LENGTH = 6
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]")
+
+Term = tuple[str, str, int]  # (field, raw value, weight)
+
+
+def identifier(value: str) -> str:
+    """Normalize an identifier: lower-case, letters and digits only."""
+
+    return _NON_ALNUM.sub("", value.lower())
+
+
+@dataclass(frozen=True)
+class IndexedEntity:
+    """How one model is flattened into search index entries."""
+
+    entity_type: str
+    terms: Callable[[Any], list[Term]]
+    label: Callable[[Any], str]
+    sublabel: Callable[[Any], str]
+    client_attr: str = "client_id"
+
+
+def _join(*parts: Any) -> str:
+    return " · ".join(str(part) for part in parts if part)
+
+
+def _client_terms(client) -> list[Term]:
+    terms: list[Term] = [
+        ("dot_number", client.dot_number, 0),
+        ("fein", client.fein, 0),
+        ("company_name", client.company_name, 10),
+    ]
+    words = normalize(client.company_name).split(" ")
+    terms.extend(
+        ("company_name_word", word, 20) for word in words[1:] if len(word) >= MIN_QUERY_LENGTH
+    )
+    return terms
+
+
+def _vehicle_terms(vehicle) -> list[Term]:
+    return [
+        ("vin", vehicle.vin, 0),
+        ("vin_serial", vehicle.vin[-VIN_SERIAL_LENGTH:], 5),
+        ("unit_number", vehicle.unit_number, 10),
+    ]
+
+
+INDEXED_ENTITIES: dict[str, IndexedEntity] = {
+    "clients.client": IndexedEntity(
+        entity_type=SearchIndexEntry.EntityType.CLIENT,
+        terms=_client_terms,
+        label=lambda client: client.company_name,
+        sublabel=lambda client: _join(
+            client.dot_number and f"DOT {client.dot_number}",
+            client.fein and f"FEIN {client.fein}",
+        ),
+        client_attr="pk",
+    ),
+    "policies.policy": IndexedEntity(
+        entity_type=SearchIndexEntry.EntityType.POLICY,
+        terms=lambda policy: [("policy_number", policy.policy_number, 0)],
+        label=lambda policy: policy.policy_number,
+        sublabel=lambda policy: _join(
+            policy.effective_date, policy.maturity_date and f"to {policy.maturity_date}"
+        ),
+    ),
+    "assets.vehicle": IndexedEntity(
+        entity_type=SearchIndexEntry.EntityType.VEHICLE,
+        terms=_vehicle_terms,
+        label=lambda vehicle: vehicle.vin,
+        sublabel=lambda vehicle: _join(
+            vehicle.unit_number and f"Unit {vehicle.unit_number}",
+            " ".join(str(part) for part in (vehicle.year, vehicle.make, vehicle.model) if part),
+        ),
+    ),
+    "assets.driver": IndexedEntity(
+        entity_type=SearchIndexEntry.EntityType.DRIVER,
+        terms=lambda driver: [("license_number", driver.license_number, 0)],
+        label=lambda driver: f"{driver.first_name} {driver.last_name}".strip(),
+        sublabel=lambda driver: _join(
+            driver.license_state and f"License {driver.license_state} {driver.license_number}"
+        ),
+    ),
+}
+
+
+def build_entries(
+    instances: Iterable[Model], *, entry_model: type[Model] = SearchIndexEntry
+) -> list[Model]:
+    """Return unsaved index entries for the active ``instances`` of one model."""
+
+    entries: list[Model] = []
+    for instance in instances:
+        if not getattr(instance, "is_active", True):
+            continue
+        spec = INDEXED_ENTITIES[instance._meta.label_lower]
+        label = spec.label(instance)[:255]
+        sublabel = spec.sublabel(instance)[:255]
+        client_id = getattr(instance, spec.client_attr)
+        seen: set[str] = set()
+        for field, value, weight in spec.terms(instance):
+            term = normalize(value) if field.startswith("company_name") else identifier(value or "")
+            if len(term) < MIN_QUERY_LENGTH or term in seen:
+                continue
+            seen.add(term)
+            entries.append(
+                entry_model(
+                    entity_type=spec.entity_type,
+                    object_id=instance.pk,
+                    client_id=client_id,
+                    field=field,
+                    term=term[:255],
+                    weight=weight,
+                    label=label,
+                    sublabel=sublabel,
+                )
+            )
+    return entries
+
+
+def reindex_objects(
+    model: type[Model],
+    lookup: str,
+    values: Iterable[Any],
+    *,
+    entry_model: type[Model] = SearchIndexEntry,
+) -> int:
+    """Replace the index entries of ``model`` rows matching ``lookup__in=values``.
+
+    Rows that no longer exist or are inactive simply lose their entries. Returns the
+    number of entries written.
+    """
+
+    values = list(values)
+    spec = INDEXED_ENTITIES[model._meta.label_lower]
+    instances = list(model._default_manager.filter(**{f"{lookup}__in": values}))
+    object_ids = {instance.pk for instance in instances}
+    if lookup == "pk":
+        object_ids.update(values)
+    entry_model._default_manager.filter(
+        entity_type=spec.entity_type, object_id__in=object_ids
+    ).delete()
+    entries = build_entries(instances, entry_model=entry_model)
+    entry_model._default_manager.bulk_create(entries, batch_size=REINDEX_BATCH_SIZE)
+    return len(entries)
+
+
+def rebuild_index(
+    model: type[Model],
+    *,
+    entry_model: type[Model] = SearchIndexEntry,
+    batch_size: int = REINDEX_BATCH_SIZE,
+) -> int:
+    """Drop and rebuild every entry of ``model``; returns the number of entries written."""
+
+    spec = INDEXED_ENTITIES[model._meta.label_lower]
+    entry_model._default_manager.filter(entity_type=spec.entity_type).delete()
+    written = 0
+    batch: list[Model] = []
+    for instance in model._default_manager.filter(is_active=True).iterator(chunk_size=batch_size):
+        batch.append(instance)
+        if len(batch) >= batch_size:
+            written += _write(batch, entry_model, batch_size)
+            batch = []
+    if batch:
+        written += _write(batch, entry_model, batch_size)
+    return written
+
+
+def _write(instances: list[Model], entry_model: type[Model], batch_size: int) -> int:
+    entries = build_entries(instances, entry_model=entry_model)
+    entry_model._default_manager.bulk_create(entries, batch_size=batch_size)
+    return len(entries)
+
+
+def schedule_reindex(label: str, pks: Iterable[Any]) -> None:
+    """Rebuild the index entries of the given ``label`` rows after commit."""
+
+    defer_until_commit(reindex_objects, label, "pk", pks)
+
+
+# Query ----------------------------------------------------------------------------
+
+
+def search(
+    query: str, *, types: Sequence[str] | None = None, limit: int = DEFAULT_LIMIT
+) -> list[dict[str, Any]]:
+    """Return ranked hits for ``query``: exact matches first, then by field weight and term length.
+
+    Each hit carries the owning client's name, resolved in one query for the whole page.
+    """
+
+    variants = {
+        variant
+        for variant in (normalize(query), identifier(query))
+        if len(variant) >= MIN_QUERY_LENGTH
+    }
+    if not variants:
+        return []
+
+    candidates: list[SearchIndexEntry] = []
+    for variant in variants:
+        queryset = SearchIndexEntry.objects.alias(index_term=BinaryCollate("term")).filter(
+            index_term__startswith=variant
+        )
+        if types:
+            queryset = queryset.filter(entity_type__in=types)
+        # Filtering and ordering on the indexed expression reads the prefix range in index
+        # order, so no sort over all matches is needed before the cut.
+        candidates.extend(queryset.order_by("index_term")[:CANDIDATE_LIMIT])
+
+    candidates.sort(
+        key=lambda entry: (entry.term not in variants, entry.weight, len(entry.term), entry.term)
+    )
+
+    hits: list[dict[str, Any]] = []
+    seen: set[tuple[str, Any]] = set()
+    for entry in candidates:
+        key = (entry.entity_type, entry.object_id)
+        if key in seen:
+            continue
+        seen.add(key)
+        hits.append(
+            {
+                "type": entry.entity_type,
+                "id": entry.object_id,
+                "label": entry.label,
+                "sublabel": entry.sublabel,
+                "matched_field": entry.field,
+                "exact": entry.term in variants,
+                "client_id": entry.client_id,
+            }
+        )
+        if len(hits) >= limit:
+            break
+
+    client_ids = {hit["client_id"] for hit in hits if hit["client_id"] and hit["type"] != "client"}
+    names: dict[Any, str] = {}
+    if client_ids:
+        Client = apps.get_model("clients", "Client")
+        names = dict(Client.objects.filter(pk__in=client_ids).values_list("pk", "company_name"))
+    for hit in hits:
+        hit["client_name"] = (
+            hit["label"] if hit["type"] == "client" else names.get(hit["client_id"])
+        )
+    return hits
+
+
+# Signals --------------------------------------------------------------------------
+
+
+def _mark_stale(sender, instance, raw=False, **kwargs) -> None:
+    if raw:
+        return
+    schedule_reindex(sender._meta.label_lower, [instance.pk])
+
+
+def connect_signals() -> None:
+    for label in INDEXED_ENTITIES:
+        model = apps.get_model(label)
+        uid = f"search-index-{label}"
+        post_save.connect(_mark_stale, sender=model, dispatch_uid=f"{uid}-save")
+        post_delete.connect(_mark_stale, sender=model, dispatch_uid=f"{uid}-delete")
@@ -5,6 +5,7 @@ from rest_framework import serializers
 
 from apps.accounts.models import User
 
+from .fieldsets import SparseFieldsetSerializerMixin
 from .models import ActivityLog
 
 
@@ -22,7 +23,7 @@ class UserSummarySerializer(serializers.ModelSerializer):
         return obj.full_name
 
 
-class ActivityLogSerializer(serializers.ModelSerializer):
+class ActivityLogSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for activity log entries (Timeline)."""
 
     action_type_display = serializers.CharField(
@@ -66,6 +67,16 @@ class ActivityLogSerializer(serializers.ModelSerializer):
             "metadata",
         )
         read_only_fields = fields
+        # Relations read by the computed fields, so sparse fieldsets can skip the other joins.
+        fieldset_relations = {
+            "action_type_display": (),
+            "carrier_name": ("policy",),
+            "policy_number": ("policy",),
+            "client_name": ("client",),
+            "vehicle_info": ("vehicle",),
+            "driver_info": ("driver",),
+            "endorsement_name": ("endorsement",),
+        }
 
     def get_client_name(self, obj: ActivityLog) -> str | None:
         if obj.client:
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from django.utils import timezone
 
@@ -13,8 +13,26 @@ if TYPE_CHECKING:
     from apps.endorsements.models import Endorsement
     from apps.policies.models import Policy
 
+from .activity_writer import (
+    MASTER_CERTIFICATE_ATTR,
+    NAME_LOOKUP_ATTR,
+    NameLookup,
+    activity_log_writer,
+)
 from .models import ActivityLog
 
+TIMESTAMP_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+
+
+def format_timestamp(ts: datetime) -> str:
+    """Format ``ts`` the way activity log descriptions show it."""
+    return ts.strftime(TIMESTAMP_FORMAT)
+
+
+def user_display_name(user: User | None) -> str:
+    """Name of the user an activity log description credits; "System" without one."""
+    return user.full_name if user else "System"
+
 
 def log_activity(
     action_type: str,
@@ -30,10 +48,24 @@ def log_activity(
     performed_by: "User | None" = None,
     metadata: dict | None = None,
     timestamp: datetime | None = None,
+    client_id: Any = None,
+    policy_id: Any = None,
+    vehicle_id: Any = None,
+    driver_id: Any = None,
+    master_certificate_id: Any = None,
+    name_lookup: NameLookup | None = None,
 ) -> ActivityLog:
     """
     Create an activity log entry.
 
+    Entries go through ``activity_log_writer``: with ``ACTIVITY_LOG_BUFFERED`` enabled the
+    returned instance is only persisted once the surrounding transaction commits and the
+    buffer is flushed. ``client_id``, ``policy_id``, ``vehicle_id`` and ``driver_id`` may
+    be passed instead of the instances to avoid loading the rows. An entry with a policy
+    but no client gets the policy's client when it is written, and one with only
+    ``master_certificate_id`` gets that certificate's policy. ``name_lookup`` re-renders
+    the text with the name of a related row read for the whole batch.
+
     Example usage:
         log_activity(
             ActivityLog.ActionType.VEHICLE_ASSIGNED,
@@ -47,7 +79,7 @@ def log_activity(
             performed_by=user,
         )
     """
-    return ActivityLog.objects.create(
+    entry = ActivityLog(
         action_type=action_type,
         transaction_name=transaction_name,
         description=description,
@@ -61,6 +93,19 @@ def log_activity(
         metadata=metadata or {},
         timestamp=timestamp or timezone.now(),
     )
+    ids = {
+        "client_id": client_id,
+        "policy_id": policy_id,
+        "vehicle_id": vehicle_id,
+        "driver_id": driver_id,
+    }
+    for attname, value in ids.items():
+        if value is not None and getattr(entry, attname) is None:
+            setattr(entry, attname, value)
+    setattr(entry, MASTER_CERTIFICATE_ATTR, master_certificate_id)
+    setattr(entry, NAME_LOOKUP_ATTR, name_lookup)
+    activity_log_writer.write(entry)
+    return entry
 
 
 def format_log_description(
@@ -80,8 +125,8 @@ def format_log_description(
      Policy Number 238394-001APD-93755 on 09/24/2025 09:37:46 AM by Amir Mambetaliev"
     """
     ts = timestamp or timezone.now()
-    time_str = ts.strftime("%m/%d/%Y %I:%M:%S %p")
-    user_name = user.full_name if user else "System"
+    time_str = format_timestamp(ts)
+    user_name = user_display_name(user)
 
     parts = []
 
@@ -107,27 +152,31 @@ def format_log_description(
 
 def log_client_created(client: "Client", user: "User | None" = None) -> ActivityLog:
     """Log client creation."""
+    now = timezone.now()
     return log_activity(
         ActivityLog.ActionType.CLIENT_CREATED,
         f"Client Created: {client.company_name}",
         description=f"Client {client.company_name} was created on "
-        f"{timezone.now().strftime('%m/%d/%Y %I:%M:%S %p')} by {user.full_name if user else 'System'}",
+        f"{format_timestamp(now)} by {user_display_name(user)}",
         client=client,
         performed_by=user,
+        timestamp=now,
     )
 
 
 def log_policy_created(policy: "Policy", user: "User | None" = None) -> ActivityLog:
     """Log policy creation."""
     carrier = policy.carrier_product.insurance_company_name if policy.carrier_product else "Unknown"
+    now = timezone.now()
     return log_activity(
         ActivityLog.ActionType.POLICY_CREATED,
         f"Policy Created: {policy.policy_number}",
         description=f"Policy {policy.policy_number} ({carrier}) was created on "
-        f"{timezone.now().strftime('%m/%d/%Y %I:%M:%S %p')} by {user.full_name if user else 'System'}",
-        client=policy.client,
+        f"{format_timestamp(now)} by {user_display_name(user)}",
+        client_id=policy.client_id,
         policy=policy,
         performed_by=user,
+        timestamp=now,
     )
 
 
@@ -135,17 +184,18 @@ def log_vehicle_assigned(
     vehicle: "Vehicle", policy: "Policy", user: "User | None" = None
 ) -> ActivityLog:
     """Log vehicle assignment to policy."""
-    carrier = policy.carrier_product.insurance_company_name if policy.carrier_product else "Unknown"
+    now = timezone.now()
     return log_activity(
         ActivityLog.ActionType.VEHICLE_ASSIGNED,
         f"Vehicle Assigned: {vehicle.vin}",
         description=format_log_description(
-            "assigned", vehicle=vehicle, policy=policy, user=user
+            "assigned", vehicle=vehicle, policy=policy, user=user, timestamp=now
         ),
-        client=policy.client,
+        client_id=policy.client_id,
         policy=policy,
         vehicle=vehicle,
         performed_by=user,
+        timestamp=now,
     )
 
 
@@ -153,16 +203,18 @@ def log_driver_assigned(
     driver: "Driver", policy: "Policy", user: "User | None" = None
 ) -> ActivityLog:
     """Log driver assignment to policy."""
+    now = timezone.now()
     return log_activity(
         ActivityLog.ActionType.DRIVER_ASSIGNED,
         f"Driver Assigned: {driver.first_name} {driver.last_name}",
         description=format_log_description(
-            "assigned", driver=driver, policy=policy, user=user
+            "assigned", driver=driver, policy=policy, user=user, timestamp=now
         ),
-        client=policy.client,
+        client_id=policy.client_id,
         policy=policy,
         driver=driver,
         performed_by=user,
+        timestamp=now,
     )
 
 
@@ -171,15 +223,17 @@ def log_endorsement_created(
 ) -> ActivityLog:
     """Log endorsement creation."""
     policy = endorsement.policy
+    now = timezone.now()
     return log_activity(
         ActivityLog.ActionType.ENDORSEMENT_CREATED,
         endorsement.name,
         description=f"Endorsement '{endorsement.name}' was created for policy {policy.policy_number} on "
-        f"{timezone.now().strftime('%m/%d/%Y %I:%M:%S %p')} by {user.full_name if user else 'System'}",
-        client=policy.client,
+        f"{format_timestamp(now)} by {user_display_name(user)}",
+        client_id=policy.client_id,
         policy=policy,
         endorsement=endorsement,
         performed_by=user,
+        timestamp=now,
     )
 
 
@@ -188,15 +242,17 @@ def log_endorsement_completed(
 ) -> ActivityLog:
     """Log endorsement completion."""
     policy = endorsement.policy
+    now = timezone.now()
     return log_activity(
         ActivityLog.ActionType.ENDORSEMENT_COMPLETED,
         f"Endorsement Completed: {endorsement.name}",
         description=f"Endorsement '{endorsement.name}' was completed on "
-        f"{timezone.now().strftime('%m/%d/%Y %I:%M:%S %p')} by {user.full_name if user else 'System'}",
-        client=policy.client,
+        f"{format_timestamp(now)} by {user_display_name(user)}",
+        client_id=policy.client_id,
         policy=policy,
         endorsement=endorsement,
         performed_by=user,
+        timestamp=now,
     )
 
 
@@ -205,15 +261,17 @@ def log_endorsement_cancelled(
 ) -> ActivityLog:
     """Log endorsement cancellation."""
     policy = endorsement.policy
+    now = timezone.now()
     return log_activity(
         ActivityLog.ActionType.ENDORSEMENT_CANCELLED,
         f"Endorsement Cancelled: {endorsement.name}",
         description=f"Endorsement '{endorsement.name}' was cancelled on "
-        f"{timezone.now().strftime('%m/%d/%Y %I:%M:%S %p')} by {user.full_name if user else 'System'}",
+        f"{format_timestamp(now)} by {user_display_name(user)}",
         notes=reason,
-        client=policy.client,
+        client_id=policy.client_id,
         policy=policy,
         endorsement=endorsement,
         performed_by=user,
+        timestamp=now,
     )
 
@@ -0,0 +1,344 @@
+"""Automatic ActivityLog capture for the core business models.
+
+Every tracked instance keeps a snapshot of the field values that can show up in a diff,
+taken in ``post_init`` (i.e. as loaded from the database, or as constructed).
+``post_save`` compares the saved values against that snapshot, so field-level diffs
+need no extra SELECT, stores them in ``metadata["changes"]`` and refreshes the
+snapshot. Entries go through ``activity_log_writer`` and are therefore batch-inserted
+after commit.
+
+Entry contexts and names are built from ``*_id`` columns, own fields and relations
+already cached on the instance. Whatever else an entry needs (a certificate's policy,
+a policy's client, the vehicle or driver behind an assignment) is read by the writer
+for the whole batch.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import timezone
+
+from .activity_writer import NameLookup
+from .middleware import get_current_user
+from .models import ActivityLog
+from .services import format_timestamp, log_activity, user_display_name
+
+SNAPSHOT_ATTR = "_activity_snapshot"
+IGNORED_FIELDS = frozenset(
+    {"created_at", "updated_at", "created_by_id", "updated_by_id", "search_document"}
+)
+
+_capture_disabled: ContextVar[bool] = ContextVar("activity_capture_disabled", default=False)
+
+
+@contextmanager
+def suppress_activity_capture() -> Iterator[None]:
+    """Disable automatic capture, e.g. for bulk jobs that log a single summary entry."""
+
+    token = _capture_disabled.set(True)
+    try:
+        yield
+    finally:
+        _capture_disabled.reset(token)
+
+
+@dataclass(frozen=True)
+class TrackedModel:
+    """Describes how changes to a model are reported on the timeline."""
+
+    label: str
+    created: str
+    updated: str
+    removed: str
+    context: Callable[[Any], dict[str, Any]]
+    # Either the instance's own display name, or the relation naming it and the name of
+    # the related row.
+    name: Callable[[Any], str] | None = None
+    name_from: tuple[str, Callable[[Any], str]] | None = None
+    ignored: frozenset[str] = frozenset()
+    status_actions: dict[str, tuple[str, str]] | None = None
+
+
+def _cached(instance: Model, name: str) -> Model | None:
+    """The related object behind ``name`` if it is already loaded, without a query."""
+
+    field = instance._meta.get_field(name)
+    return field.get_cached_value(instance) if field.is_cached(instance) else None
+
+
+def _policy_context(instance) -> dict[str, Any]:
+    return {"client_id": instance.client_id, "policy": instance}
+
+
+def _context_for_policy(policy_id: Any, policy: Model | None) -> dict[str, Any]:
+    if policy is not None:
+        return {"client_id": policy.client_id, "policy": policy}
+    return {"policy_id": policy_id}
+
+
+def _assignment_context(instance) -> dict[str, Any]:
+    return _context_for_policy(instance.policy_id, _cached(instance, "policy"))
+
+
+def _endorsement_context(instance) -> dict[str, Any]:
+    return {**_assignment_context(instance), "endorsement": instance}
+
+
+def _certificate_context(instance) -> dict[str, Any]:
+    master = _cached(instance, "master_certificate")
+    if master is not None:
+        return _context_for_policy(master.policy_id, _cached(master, "policy"))
+    return {"master_certificate_id": instance.master_certificate_id}
+
+
+def _tracked_models() -> dict[str, TrackedModel]:
+    action = ActivityLog.ActionType
+    return {
+        "clients.client": TrackedModel(
+            label="Client",
+            created=action.CLIENT_CREATED,
+            updated=action.CLIENT_UPDATED,
+            removed=action.CLIENT_UPDATED,
+            name=lambda client: client.company_name,
+            context=lambda client: {"client_id": client.pk},
+        ),
+        "policies.policy": TrackedModel(
+            label="Policy",
+            created=action.POLICY_CREATED,
+            updated=action.POLICY_UPDATED,
+            removed=action.POLICY_UPDATED,
+            name=lambda policy: policy.policy_number,
+            context=_policy_context,
+        ),
+        "assets.policyvehicle": TrackedModel(
+            label="Vehicle",
+            created=action.VEHICLE_ASSIGNED,
+            updated=action.VEHICLE_UPDATED,
+            removed=action.VEHICLE_REMOVED,
+            name_from=("vehicle", lambda vehicle: vehicle.vin),
+            context=lambda assignment: {
+                **_assignment_context(assignment),
+                "vehicle_id": assignment.vehicle_id,
+            },
+        ),
+        "assets.policydriver": TrackedModel(
+            label="Driver",
+            created=action.DRIVER_ASSIGNED,
+            updated=action.DRIVER_UPDATED,
+            removed=action.DRIVER_REMOVED,
+            name_from=("driver", lambda driver: f"{driver.first_name} {driver.last_name}"),
+            context=lambda assignment: {
+                **_assignment_context(assignment),
+                "driver_id": assignment.driver_id,
+            },
+        ),
+        "endorsements.endorsement": TrackedModel(
+            label="Endorsement",
+            created=action.ENDORSEMENT_CREATED,
+            updated=action.ENDORSEMENT_UPDATED,
+            removed=action.ENDORSEMENT_UPDATED,
+            name=lambda endorsement: endorsement.name,
+            context=_endorsement_context,
+            status_actions={
+                "in_progress": (action.ENDORSEMENT_STARTED, "started"),
+                "completed": (action.ENDORSEMENT_COMPLETED, "completed"),
+                "cancelled": (action.ENDORSEMENT_CANCELLED, "cancelled"),
+            },
+        ),
+        "certificates.certificate": TrackedModel(
+            label="Certificate",
+            created=action.CERTIFICATE_CREATED,
+            updated=action.CERTIFICATE_UPDATED,
+            removed=action.CERTIFICATE_UPDATED,
+            name=lambda certificate: certificate.verification_code,
+            context=_certificate_context,
+            # The PDF is rendered in the background after each change; not a user change.
+            ignored=frozenset({"document", "document_status", "document_hash"}),
+        ),
+    }
+
+
+_TRACKED: dict[str, TrackedModel] = {}
+# Attribute names snapshotted per tracked model: the fields ``compute_changes`` diffs.
+_SNAPSHOT_FIELDS: dict[str, tuple[str, ...]] = {}
+
+
+def _config(sender) -> TrackedModel:
+    return _TRACKED[sender._meta.label_lower]
+
+
+def take_snapshot(instance: Model) -> dict[str, Any]:
+    """Return the loaded concrete field values of ``instance`` (deferred fields are skipped)."""
+
+    values = instance.__dict__
+    return {
+        field.attname: values[field.attname]
+        for field in instance._meta.concrete_fields
+        if field.attname in values
+    }
+
+
+def compute_changes(
+    instance: Model,
+    snapshot: dict[str, Any],
+    *,
+    ignored: frozenset[str] = frozenset(),
+    update_fields: frozenset[str] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Return ``{field: {"from": old, "to": new}}`` for fields that differ from ``snapshot``."""
+
+    changes: dict[str, dict[str, Any]] = {}
+    values = instance.__dict__
+    for field in instance._meta.concrete_fields:
+        attname = field.attname
+        if attname in IGNORED_FIELDS or field.name in ignored or field.primary_key:
+            continue
+        if update_fields is not None and field.name not in update_fields:
+            continue
+        if attname not in snapshot or attname not in values:
+            continue
+        old, new = snapshot[attname], values[attname]
+        if old != new:
+            changes[field.name] = {"from": old, "to": new}
+    return _serialize(changes)
+
+
+def _serialize(values: dict[str, Any]) -> dict[str, Any]:
+    # Round-trip through the JSON encoder so dates, decimals and UUIDs fit the JSONField.
+    return json.loads(json.dumps(values, cls=DjangoJSONEncoder))
+
+
+def _log(
+    config: TrackedModel,
+    instance: Model,
+    action_type: str,
+    verb: str,
+    metadata: dict[str, Any],
+    context: dict[str, Any],
+) -> None:
+    user = get_current_user()
+    now = timezone.now()
+
+    credit = f"on {format_timestamp(now)} by {user_display_name(user)}"
+
+    def text(name: str) -> tuple[str, str]:
+        return (
+            f"{config.label} {verb.title()}: {name}",
+            f"{config.label} {name} was {verb} {credit}",
+        )
+
+    name_lookup = None
+    if config.name_from is None:
+        name = config.name(instance)
+    else:
+        relation, related_name = config.name_from
+        related = _cached(instance, relation)
+        if related is not None:
+            name = related_name(related)
+        else:
+            # Named by the related id until the writer reads the row; kept if it is gone.
+            field = instance._meta.get_field(relation)
+            related_pk = getattr(instance, field.attname)
+            name = str(related_pk)
+            name_lookup = NameLookup(field.related_model, related_pk, related_name, text)
+    transaction_name, description = text(name)
+    log_activity(
+        action_type,
+        transaction_name,
+        description=description,
+        performed_by=user,
+        metadata=metadata,
+        timestamp=now,
+        name_lookup=name_lookup,
+        **context,
+    )
+
+
+def _snapshot_fields(model: type[Model], config: TrackedModel) -> tuple[str, ...]:
+    return tuple(
+        field.attname
+        for field in model._meta.concrete_fields
+        if not (
+            field.attname in IGNORED_FIELDS or field.name in config.ignored or field.primary_key
+        )
+    )
+
+
+def capture_snapshot(sender, instance, **kwargs) -> None:
+    values = instance.__dict__
+    attnames = _SNAPSHOT_FIELDS[sender._meta.label_lower]
+    snapshot = {attname: values[attname] for attname in attnames if attname in values}
+    setattr(instance, SNAPSHOT_ATTR, snapshot)
+
+
+def capture_save(sender, instance, created, raw=False, update_fields=None, **kwargs) -> None:
+    if raw or _capture_disabled.get():
+        return
+
+    config = _config(sender)
+    snapshot = getattr(instance, SNAPSHOT_ATTR, {})
+    capture_snapshot(sender, instance)
+
+    if created:
+        _log(
+            config,
+            instance,
+            config.created,
+            "created",
+            {"event": "created"},
+            config.context(instance),
+        )
+        return
+
+    changes = compute_changes(
+        instance,
+        snapshot,
+        ignored=config.ignored,
+        update_fields=frozenset(update_fields) if update_fields is not None else None,
+    )
+    if not changes:
+        return
+
+    metadata = {"event": "updated", "changes": changes}
+    action_type, verb = config.updated, "updated"
+    if changes.get("is_active", {}).get("to") is False:
+        metadata["event"] = "removed"
+        action_type, verb = config.removed, "removed"
+    elif config.status_actions and "status" in changes:
+        action_type, verb = config.status_actions.get(changes["status"]["to"], (action_type, verb))
+    _log(config, instance, action_type, verb, metadata, config.context(instance))
+
+
+def capture_delete(sender, instance, **kwargs) -> None:
+    if _capture_disabled.get():
+        return
+    config = _config(sender)
+    # Hard deletes (admin, cascades) may remove the rows the entry would point at, so the
+    # related ids are kept in metadata rather than as foreign keys.
+    snapshot = {
+        key: value for key, value in take_snapshot(instance).items() if key not in IGNORED_FIELDS
+    }
+    metadata = {"event": "deleted", "snapshot": _serialize(snapshot)}
+    _log(config, instance, config.removed, "deleted", metadata, {})
+
+
+def connect_signals() -> None:
+    from django.apps import apps
+
+    _TRACKED.update(_tracked_models())
+    for label, config in _TRACKED.items():
+        model = apps.get_model(label)
+        _SNAPSHOT_FIELDS[label] = _snapshot_fields(model, config)
+        uid = f"activity-capture-{label}"
+        post_init.connect(capture_snapshot, sender=model, dispatch_uid=f"{uid}-init")
+        post_save.connect(capture_save, sender=model, dispatch_uid=f"{uid}-save")
+        post_delete.connect(capture_delete, sender=model, dispatch_uid=f"{uid}-delete")
@@ -0,0 +1,124 @@
+"""Set-based synchronisation of nested child rows.
+
+Nested serializers (policy coverages, client DBAs, contacts and addresses) receive a
+list of child payloads. ``diff_children`` compares them with the rows already loaded
+and returns the inserts, updates and deletes; ``apply_diff`` writes them with one
+filtered DELETE, one ``bulk_update`` and one ``bulk_create``, so the number of queries
+does not depend on the number of children.
+
+Bulk writes send no model signals: callers refresh whatever depends on the children
+(search documents, for instance) themselves.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.db.models import Model
+from django.utils import timezone
+
+
+@dataclass
+class ChildDiff:
+    """Pending writes for one set of child rows."""
+
+    creates: list[Model] = field(default_factory=list)
+    updates: dict[Any, Model] = field(default_factory=dict)
+    update_fields: set[str] = field(default_factory=set)
+    deletes: list[Model] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.creates or self.updates or self.deletes)
+
+
+def assign_changed(obj: Model, data: dict[str, Any], fields: Iterable[str]) -> set[str]:
+    """Set the ``fields`` present in ``data`` on ``obj``; return the names that changed.
+
+    ``None`` never clears a relation: nested payloads omit lookups they do not change.
+    """
+
+    changed: set[str] = set()
+    for name in fields:
+        if name not in data:
+            continue
+        value = data[name]
+        model_field = obj._meta.get_field(name)
+        if model_field.is_relation:
+            if value is None:
+                continue
+            current = getattr(obj, model_field.attname)
+            new = value.pk if isinstance(value, Model) else value
+        else:
+            current, new = getattr(obj, name), value
+        if current != new:
+            setattr(obj, name, value)
+            changed.add(name)
+    return changed
+
+
+def diff_children(
+    existing: Iterable[Model],
+    items: Sequence[dict[str, Any]],
+    *,
+    fields: Sequence[str],
+    build: Callable[[dict[str, Any], bool], Model],
+    clear_existing: bool,
+    on_update: Callable[[Model, dict[str, Any]], None] | None = None,
+) -> ChildDiff:
+    """Diff the payload ``items`` against the ``existing`` rows.
+
+    * With ``clear_existing`` every existing row is deleted and every item is created.
+    * Otherwise an item whose ``id`` matches an existing row updates the ``fields`` it
+      carries and its ``is_active`` flag (default ``True``); rows that end up unchanged
+      are not written. Any other item is created with ``build(data, is_active)``, which
+      validates the payload and returns an unsaved instance. Rows not mentioned are
+      left alone.
+
+    ``on_update(row, data)`` lets callers handle nested payloads of matched rows.
+    """
+
+    by_id = {str(obj.pk): obj for obj in existing}
+    diff = ChildDiff()
+    if clear_existing:
+        diff.deletes = list(by_id.values())
+        by_id = {}
+
+    for raw in items:
+        data = dict(raw)
+        obj_id = str(data.pop("id", "") or "")
+        is_active = data.pop("is_active", True)
+        obj = by_id.get(obj_id) if obj_id else None
+        if obj is None:
+            diff.creates.append(build(data, is_active))
+            continue
+
+        changed = assign_changed(obj, {**data, "is_active": is_active}, [*fields, "is_active"])
+        if on_update is not None:
+            on_update(obj, data)
+        if changed:
+            diff.updates[obj.pk] = obj
+            diff.update_fields |= changed
+    return diff
+
+
+def bulk_update_changed(model: type[Model], objs: Iterable[Model], fields: Iterable[str]) -> None:
+    """``bulk_update`` that also stamps ``updated_at``, which ``auto_now`` leaves alone here."""
+
+    objs = list(objs)
+    if not objs:
+        return
+    now = timezone.now()
+    for obj in objs:
+        obj.updated_at = now
+    model._default_manager.bulk_update(objs, sorted({*fields, "updated_at"}))
+
+
+def apply_diff(model: type[Model], diff: ChildDiff) -> None:
+    """Write ``diff``: deletes first, so re-created rows cannot hit unique constraints."""
+
+    if diff.deletes:
+        model._default_manager.filter(pk__in=[obj.pk for obj in diff.deletes]).delete()
+    bulk_update_changed(model, diff.updates.values(), diff.update_fields)
+    if diff.creates:
+        model._default_manager.bulk_create(diff.creates)
@@ -0,0 +1,318 @@
+import queue
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.assets.models import PolicyVehicle, Vehicle
+from apps.certificates.models import Certificate, CertificateHolder, MasterCertificate
+from apps.clients.models import Address, Client
+from apps.common.activity_writer import activity_log_writer
+from apps.common.models import ActivityLog
+from apps.common.services import log_activity
+from apps.common.signals import SNAPSHOT_ATTR, suppress_activity_capture
+from apps.endorsements.models import Endorsement
+from apps.lookups.models import BusinessType, InsuranceType, PolicyStatus, PolicyType, VehicleType
+from apps.policies.models import CarrierProduct, GeneralAgent, Policy
+
+pytestmark = pytest.mark.django_db
+
+
+def _log(name: str) -> ActivityLog:
+    return log_activity(ActivityLog.ActionType.USER_ACTION, name)
+
+
+def test_entries_are_written_in_one_batch_on_commit(
+    django_capture_on_commit_callbacks, django_assert_num_queries
+):
+    with activity_log_writer.collect():
+        with django_capture_on_commit_callbacks() as callbacks:
+            for index in range(3):
+                _log(f"entry {index}")
+        for callback in callbacks:
+            callback()
+        assert ActivityLog.objects.count() == 0
+
+        with django_assert_num_queries(1):
+            activity_log_writer.flush()
+    assert ActivityLog.objects.count() == 3
+
+
+def test_entries_outside_a_scope_are_written_once_committed(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks() as callbacks:
+        _log("first")
+        _log("second")
+    assert ActivityLog.objects.count() == 0
+
+    callbacks[0]()
+    assert list(ActivityLog.objects.values_list("transaction_name", flat=True)) == ["first"]
+
+
+def test_failed_flush_is_logged_instead_of_raised(
+    monkeypatch, django_capture_on_commit_callbacks, caplog
+):
+    def failing_persist(entries):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(activity_log_writer, "_persist", failing_persist)
+    before = activity_log_writer.metrics().get("failed", 0)
+    with activity_log_writer.collect():
+        with django_capture_on_commit_callbacks(execute=True):
+            _log("lost")
+
+    assert activity_log_writer.metrics()["failed"] == before + 1
+    assert "Failed to write 1 activity log entries" in caplog.text
+
+
+def test_rolled_back_entries_are_discarded(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        _log("kept")
+        try:
+            with transaction.atomic():
+                _log("discarded")
+                raise RuntimeError("rollback")
+        except RuntimeError:
+            pass
+
+    assert list(ActivityLog.objects.values_list("transaction_name", flat=True)) == ["kept"]
+
+
+def test_collect_scope_flushes_on_exit(django_capture_on_commit_callbacks):
+    with activity_log_writer.collect():
+        with django_capture_on_commit_callbacks(execute=True):
+            _log("first")
+            _log("second")
+        assert ActivityLog.objects.count() == 0
+    assert ActivityLog.objects.count() == 2
+
+
+def test_collect_scope_flushes_early_when_buffer_is_full(
+    settings, django_capture_on_commit_callbacks
+):
+    settings.ACTIVITY_LOG_MAX_BUFFER = 2
+    before = activity_log_writer.metrics().get("early_flushes", 0)
+    with activity_log_writer.collect():
+        with django_capture_on_commit_callbacks(execute=True):
+            for index in range(3):
+                _log(f"entry {index}")
+        assert ActivityLog.objects.count() == 2
+    assert ActivityLog.objects.count() == 3
+    assert activity_log_writer.metrics()["early_flushes"] == before + 1
+
+
+def test_full_queue_falls_back_to_synchronous_write(
+    settings, monkeypatch, django_capture_on_commit_callbacks
+):
+    settings.ACTIVITY_LOG_ASYNC = True
+    full_queue: queue.Queue = queue.Queue(maxsize=1)
+    full_queue.put_nowait([])
+    monkeypatch.setattr(activity_log_writer, "_ensure_worker", lambda: full_queue)
+    before = activity_log_writer.metrics().get("backpressure_sync_writes", 0)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        _log("under load")
+
+    assert ActivityLog.objects.filter(transaction_name="under load").exists()
+    assert activity_log_writer.metrics()["backpressure_sync_writes"] == before + 1
+
+
+def test_unbuffered_mode_writes_immediately(settings):
+    settings.ACTIVITY_LOG_BUFFERED = False
+    _log("immediate")
+    assert ActivityLog.objects.filter(transaction_name="immediate").exists()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(email="auditor@example.com", password="password123")
+
+
+@pytest.fixture
+def client_record(user, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        return Client.objects.create(
+            company_name="Atlas Logistics", created_by=user, updated_by=user
+        )
+
+
+@pytest.fixture
+def policy(client_record, django_capture_on_commit_callbacks):
+    general_agent = GeneralAgent.objects.create(name="Summit GA", agency_commission="5.00")
+    carrier_product = CarrierProduct.objects.create(
+        line_of_business="Auto",
+        general_agent=general_agent,
+        insurance_company_name="Summit Insurance",
+        new_business_commission_pct="8.00",
+        renewal_commission_pct="7.00",
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        return Policy.objects.create(
+            client=client_record,
+            policy_number="POL-AUDIT-001",
+            status=PolicyStatus.objects.filter(is_active=True).first(),
+            business_type=BusinessType.objects.filter(is_active=True).first(),
+            insurance_type=InsuranceType.objects.filter(is_active=True).first(),
+            policy_type=PolicyType.objects.filter(is_active=True).first(),
+            effective_date="2024-01-01",
+            maturity_date="2025-01-01",
+            carrier_product=carrier_product,
+        )
+
+
+def test_client_created_through_api_is_logged_for_request_user(
+    user, django_capture_on_commit_callbacks
+):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(
+            reverse("clients:client-list"), {"company_name": "Summit Freight"}, format="json"
+        )
+    assert response.status_code == 201
+
+    entry = ActivityLog.objects.get(action_type=ActivityLog.ActionType.CLIENT_CREATED)
+    assert str(entry.client_id) == response.json()["id"]
+    assert entry.performed_by == user
+    assert entry.transaction_name == "Client Created: Summit Freight"
+
+
+def test_update_records_field_diff_without_extra_select(
+    client_record, django_capture_on_commit_callbacks
+):
+    record = Client.objects.get(pk=client_record.pk)
+    record.company_name = "Atlas Freight"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as queries:
+            record.save()
+        assert [query["sql"].split()[0] for query in queries] == ["UPDATE"]
+
+    entry = ActivityLog.objects.get(action_type=ActivityLog.ActionType.CLIENT_UPDATED)
+    assert entry.metadata == {
+        "event": "updated",
+        "changes": {"company_name": {"from": "Atlas Logistics", "to": "Atlas Freight"}},
+    }
+
+
+def test_update_of_loaded_row_reads_no_related_rows(policy, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        endorsement = Endorsement.objects.create(policy=policy, name="Add vehicle")
+    endorsement = Endorsement.objects.get(pk=endorsement.pk)
+    endorsement.name = "Add trailer"
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        with CaptureQueriesContext(connection) as queries:
+            endorsement.save()
+        assert [query["sql"].split()[0] for query in queries] == ["UPDATE"]
+    for callback in callbacks:
+        callback()
+
+    entry = ActivityLog.objects.get(action_type=ActivityLog.ActionType.ENDORSEMENT_UPDATED)
+    assert (entry.policy_id, entry.client_id) == (policy.pk, policy.client_id)
+    snapshot = getattr(endorsement, SNAPSHOT_ATTR)
+    assert {"name", "policy_id"} <= set(snapshot)
+    assert not {"id", "created_at", "updated_at"} & set(snapshot)
+
+
+def test_related_context_and_names_are_read_once_per_batch(
+    policy, django_capture_on_commit_callbacks
+):
+    vehicle_type = VehicleType.objects.filter(is_active=True).first()
+    address = Address.objects.create(
+        street_address="1 Hub Rd", city="Dallas", state="TX", zip_code="75201"
+    )
+    holder = CertificateHolder.objects.create(name="Logistics Hub LLC", address=address)
+    with django_capture_on_commit_callbacks(execute=True):
+        master = MasterCertificate.objects.create(policy=policy, name="Fleet Certificate")
+        certificate = Certificate.objects.create(
+            master_certificate=master, certificate_holder=holder
+        )
+        vehicles = [
+            Vehicle.objects.create(
+                client=policy.client, vin=vin, vehicle_type=vehicle_type, year=2024
+            )
+            for vin in ("1XPWD40X1ED000001", "1XPWD40X1ED000002")
+        ]
+        for vehicle in vehicles:
+            PolicyVehicle.objects.create(
+                policy=policy, vehicle=vehicle, garaging_address=address
+            )
+    certificate = Certificate.objects.get(pk=certificate.pk)
+    assignments = list(PolicyVehicle.objects.filter(policy=policy))
+    ActivityLog.objects.all().delete()
+
+    with activity_log_writer.collect(), django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as queries:
+            certificate.is_active = False
+            certificate.save()
+            for assignment in assignments:
+                assignment.status = PolicyVehicle.Status.INACTIVE
+                assignment.save()
+        assert [query["sql"].split()[0] for query in queries] == ["UPDATE"] * 3
+
+    removed = ActivityLog.objects.get(action_type=ActivityLog.ActionType.CERTIFICATE_UPDATED)
+    assert (removed.policy_id, removed.client_id) == (policy.pk, policy.client_id)
+    names = ActivityLog.objects.filter(action_type=ActivityLog.ActionType.VEHICLE_UPDATED)
+    assert sorted(names.values_list("transaction_name", flat=True)) == [
+        f"Vehicle Updated: {vehicle.vin}" for vehicle in vehicles
+    ]
+
+
+def test_save_without_changes_is_not_logged(client_record, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        client_record.save()
+    assert not ActivityLog.objects.filter(
+        action_type=ActivityLog.ActionType.CLIENT_UPDATED
+    ).exists()
+
+
+def test_soft_delete_is_logged_as_removal(policy, django_capture_on_commit_callbacks):
+    policy.is_active = False
+    with django_capture_on_commit_callbacks(execute=True):
+        policy.save(update_fields=["is_active", "updated_at"])
+
+    entry = ActivityLog.objects.get(action_type=ActivityLog.ActionType.POLICY_UPDATED)
+    assert entry.metadata["event"] == "removed"
+    assert entry.policy == policy
+    assert entry.client_id == policy.client_id
+
+
+def test_endorsement_status_change_maps_to_action(user, policy, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        endorsement = Endorsement.objects.create(policy=policy, name="Add vehicle")
+        endorsement.mark_completed(user=user)
+
+    actions = set(
+        ActivityLog.objects.filter(endorsement=endorsement).values_list("action_type", flat=True)
+    )
+    assert actions == {
+        ActivityLog.ActionType.ENDORSEMENT_CREATED,
+        ActivityLog.ActionType.ENDORSEMENT_COMPLETED,
+    }
+    completed = ActivityLog.objects.get(action_type=ActivityLog.ActionType.ENDORSEMENT_COMPLETED)
+    assert completed.metadata["changes"]["status"] == {"from": "draft", "to": "completed"}
+
+
+def test_suppressed_capture_logs_nothing(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True), suppress_activity_capture():
+        Client.objects.create(company_name="Quiet Carrier")
+    assert not ActivityLog.objects.exists()
+
+
+def test_timeline_search_matches_denormalized_document(
+    user, client_record, django_capture_on_commit_callbacks
+):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    with django_capture_on_commit_callbacks(execute=True):
+        log_activity(
+            ActivityLog.ActionType.USER_ACTION, "Called broker", client_id=client_record.pk
+        )
+
+    url = reverse("common:activity-log-list")
+    results = api_client.get(url, {"search": "atlas broker"}).json()["results"]
+    assert [item["transaction_name"] for item in results] == ["Called broker"]
@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+from django.utils import timezone
+
+from apps.common import jobs
+from apps.common.models import BackgroundJob
+
+pytestmark = pytest.mark.django_db
+
+calls: list[dict] = []
+failures: list[str] = []
+
+
+@jobs.task("tests.flaky", max_attempts=2, on_failure=lambda payload, error: failures.append(error))
+def flaky(payload):
+    calls.append(payload)
+    if payload.get("fail"):
+        raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+    failures.clear()
+
+
+def test_enqueue_dedupes_waiting_jobs_and_claim_skips_future_ones():
+    first = jobs.enqueue("tests.flaky", {"n": 1}, unique_key="a")
+    assert jobs.enqueue("tests.flaky", {"n": 2}, unique_key="a") is None
+    jobs.enqueue("tests.flaky", {"n": 3}, run_after=timezone.now() + datetime.timedelta(hours=1))
+
+    claimed = jobs.claim(10, worker="test")
+    assert [job.pk for job in claimed] == [first.pk]
+    assert jobs.claim(10, worker="test") == []
+
+    assert jobs.run_job(claimed[0]) is True
+    first.refresh_from_db()
+    assert (first.status, first.attempts) == (BackgroundJob.Status.SUCCEEDED, 1)
+    assert calls == [{"n": 1}]
+
+
+def test_failed_job_is_retried_with_backoff_then_marked_failed():
+    job = jobs.enqueue("tests.flaky", {"fail": True})
+
+    assert jobs.run_job(jobs.claim(1, worker="test")[0]) is False
+    job.refresh_from_db()
+    assert job.status == BackgroundJob.Status.QUEUED
+    assert job.run_after > timezone.now()
+    assert job.last_error == "RuntimeError: boom"
+    assert failures == []
+
+    BackgroundJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+    assert jobs.run_job(jobs.claim(1, worker="test")[0]) is False
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == (BackgroundJob.Status.FAILED, 2)
+    assert failures == ["RuntimeError: boom"]
+
+
+def test_jobs_of_crashed_workers_are_requeued():
+    job = jobs.enqueue("tests.flaky", {})
+    jobs.claim(1, worker="crashed")
+    BackgroundJob.objects.filter(pk=job.pk).update(
+        locked_at=timezone.now() - datetime.timedelta(hours=1)
+    )
+
+    assert jobs.requeue_stale() == 1
+    assert [claimed.pk for claimed in jobs.claim(1, worker="test")] == [job.pk]
@@ -0,0 +1,132 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.clients.models import Client
+from apps.common.models import ActivityLog
+from apps.common.pagination import SelectablePagination
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(email="pager@example.com", password="password123")
+
+
+@pytest.fixture
+def api_client(user):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(SelectablePagination, "page_size", 2)
+
+
+def _count_queries(queries) -> int:
+    return sum("COUNT(" in query["sql"] for query in queries)
+
+
+def test_count_is_cached_per_filter_signature(api_client, settings, small_pages):
+    settings.PAGINATION_COUNT_CACHE_TTL = 60
+    cache.clear()
+    for index in range(3):
+        Client.objects.create(company_name=f"Carrier {index}")
+    url = reverse("clients:client-list")
+
+    with CaptureQueriesContext(connection) as first:
+        response = api_client.get(url)
+    assert response.json()["count"] == 3
+    assert _count_queries(first) == 1
+    assert 'desc="exact"' in response["Server-Timing"]
+
+    with CaptureQueriesContext(connection) as second:
+        response = api_client.get(url, {"page": 2})
+    assert response.json()["count"] == 3
+    assert _count_queries(second) == 0
+    assert 'desc="cached"' in response["Server-Timing"]
+
+    with CaptureQueriesContext(connection) as filtered:
+        response = api_client.get(url, {"search": "Carrier 1"})
+    assert response.json()["count"] == 1
+    assert _count_queries(filtered) == 1
+
+
+
+def test_estimate_is_only_used_without_any_filter(api_client, settings, monkeypatch):
+    settings.PAGINATION_ESTIMATE_THRESHOLD = 10
+    cache.clear()
+    monkeypatch.setattr(SelectablePagination, "estimate_count", staticmethod(lambda queryset: 5000))
+    Client.objects.create(company_name="Live Carrier")
+    Client.objects.create(company_name="Deleted Carrier", is_active=False)
+    ActivityLog.objects.create(
+        action_type=ActivityLog.ActionType.USER_ACTION, transaction_name="entry"
+    )
+
+    # Soft-delete viewsets always filter on ``is_active``: the estimate would count deleted rows.
+    response = api_client.get(reverse("clients:client-list"))
+    assert response.json()["count"] == 1
+    assert 'desc="exact"' in response["Server-Timing"]
+
+    response = api_client.get(reverse("common:activity-log-list"))
+    assert response.json()["count"] == 5000
+    assert 'desc="estimate"' in response["Server-Timing"]
+
+def test_count_false_reports_has_next_without_counting(api_client, small_pages):
+    Client.objects.bulk_create(Client(company_name=f"Carrier {index}") for index in range(3))
+    url = reverse("clients:client-list")
+
+    with CaptureQueriesContext(connection) as queries:
+        first = api_client.get(url, {"count": "false"})
+    assert _count_queries(queries) == 0
+    body = first.json()
+    assert "count" not in body
+    assert body["has_next"] is True
+    assert body["previous"] is None
+    assert len(body["results"]) == 2
+    assert 'desc="skipped"' in first["Server-Timing"]
+
+    last = api_client.get(body["next"]).json()
+    assert last["has_next"] is False
+    assert last["next"] is None
+    assert len(last["results"]) == 1
+    assert last["previous"] is not None
+
+
+def test_timeline_cursor_pagination_walks_ties_without_count(api_client, small_pages):
+    moment = timezone.now()
+    ActivityLog.objects.bulk_create(
+        ActivityLog(
+            action_type=ActivityLog.ActionType.USER_ACTION,
+            transaction_name=f"entry {index}",
+            timestamp=moment,
+        )
+        for index in range(5)
+    )
+
+    seen, url, pages = [], reverse("common:activity-log-list") + "?pagination=cursor", []
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+        assert response.status_code == 200
+        assert not any("COUNT(" in query["sql"] for query in queries)
+        body = response.json()
+        assert "count" not in body
+        pages.append(body)
+        seen.extend(item["id"] for item in body["results"])
+        url = body["next"]
+
+    assert len(seen) == len(set(seen)) == 5
+    assert [len(page["results"]) for page in pages] == [2, 2, 1]
+    assert pages[0]["previous"] is None
+
+    previous = api_client.get(pages[-1]["previous"]).json()
+    assert [item["id"] for item in previous["results"]] == seen[2:4]
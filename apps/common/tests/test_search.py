@@ -0,0 +1,106 @@
+import datetime
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.assets.models import Driver, Vehicle
+from apps.clients.models import Client
+from apps.common.models import SearchIndexEntry
+from apps.lookups.models import LicenseClass, VehicleType
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_client(db):
+    api_client = APIClient()
+    api_client.force_authenticate(
+        User.objects.create_user(email="search@example.com", password="password123")
+    )
+    return api_client
+
+
+@pytest.fixture
+def indexed(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        client = Client.objects.create(
+            company_name="Road Runner Freight", dot_number="1234567", fein="12-3456789"
+        )
+        other = Client.objects.create(company_name="Runner Up Logistics", dot_number="1234500")
+        vehicle = Vehicle.objects.create(
+            client=client,
+            vin="1FUJGLDR7CSBM4561",
+            unit_number="T-42",
+            vehicle_type=VehicleType.objects.filter(is_active=True).first(),
+            year=2020,
+            make="Freightliner",
+            model="Cascadia",
+        )
+        driver = Driver.objects.create(
+            client=other,
+            first_name="Wile",
+            last_name="Coyote",
+            date_of_birth=datetime.date(1980, 1, 1),
+            license_number="D123-456-789",
+            license_state="AZ",
+            license_class=LicenseClass.objects.filter(is_active=True).first(),
+        )
+    return {"client": client, "other": other, "vehicle": vehicle, "driver": driver}
+
+
+def _search(api_client, **params):
+    response = api_client.get(reverse("common:global-search"), params)
+    assert response.status_code == 200, response.content
+    assert response["Server-Timing"].startswith("search;dur=")
+    return response.data["results"]
+
+
+def test_global_search_matches_identifier_prefixes_across_types(api_client, indexed):
+    results = _search(api_client, q="12345")
+    assert {hit["id"] for hit in results} == {indexed["client"].pk, indexed["other"].pk}
+
+    # Punctuation is ignored and exact matches rank first.
+    results = _search(api_client, q="123456789")
+    assert results[0]["id"] == indexed["client"].pk
+    assert results[0]["matched_field"] == "fein"
+    assert results[0]["exact"] is True
+
+    results = _search(api_client, q="bm4561")
+    assert results[0]["type"] == "vehicle"
+    assert results[0]["matched_field"] == "vin_serial"
+    assert results[0]["client_name"] == "Road Runner Freight"
+
+    results = _search(api_client, q="d123456", types="driver,vehicle")
+    assert [(hit["type"], hit["label"]) for hit in results] == [("driver", "Wile Coyote")]
+    assert results[0]["client_name"] == "Runner Up Logistics"
+
+
+def test_global_search_ranks_names_and_words(api_client, indexed):
+    results = _search(api_client, q="runner")
+    # A whole-word match outranks a name that merely starts with the term.
+    assert [hit["label"] for hit in results] == ["Road Runner Freight", "Runner Up Logistics"]
+    assert [hit["matched_field"] for hit in results] == ["company_name_word", "company_name"]
+
+
+def test_global_search_index_follows_updates_and_soft_deletes(
+    api_client, indexed, django_capture_on_commit_callbacks
+):
+    vehicle = indexed["vehicle"]
+    with django_capture_on_commit_callbacks(execute=True):
+        vehicle.unit_number = "T-99"
+        vehicle.save()
+    assert _search(api_client, q="t42") == []
+    assert _search(api_client, q="t99")[0]["id"] == vehicle.pk
+
+    with django_capture_on_commit_callbacks(execute=True):
+        indexed["driver"].is_active = False
+        indexed["driver"].save()
+    assert not SearchIndexEntry.objects.filter(object_id=indexed["driver"].pk).exists()
+
+
+def test_global_search_requires_a_meaningful_query(api_client):
+    response = api_client.get(reverse("common:global-search"), {"q": "a"})
+    assert response.status_code == 400
+    assert "q" in response.data
@@ -4,7 +4,7 @@ from __future__ import annotations
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import ActivityLogViewSet
+from .views import ActivityLogViewSet, GlobalSearchView
 
 router = DefaultRouter()
 router.register("activity-logs", ActivityLogViewSet, basename="activity-log")
@@ -12,6 +12,7 @@ router.register("activity-logs", ActivityLogViewSet, basename="activity-log")
 app_name = "common"
 
 urlpatterns = [
+    path("search/", GlobalSearchView.as_view(), name="global-search"),
     path("", include(router.urls)),
 ]
 
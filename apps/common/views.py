@@ -1,12 +1,18 @@
 """Shared API views."""
 from __future__ import annotations
 
+import time
+
+from rest_framework import serializers
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
-from .models import ActivityLog
+from . import search_index
+from .fieldsets import SparseFieldsetMixin
+from .models import ActivityLog, SearchIndexEntry
 from .serializers import ActivityLogCreateSerializer, ActivityLogSerializer
 
 
@@ -17,7 +23,7 @@ def health_check(request):  # noqa: D401 - simple health endpoint
     return Response({"status": "ok"})
 
 
-class ActivityLogViewSet(ModelViewSet):
+class ActivityLogViewSet(SparseFieldsetMixin, ModelViewSet):
     """
     ViewSet for activity logs (Timeline).
 
@@ -48,15 +54,17 @@ class ActivityLogViewSet(ModelViewSet):
         "driver__first_name",
         "driver__last_name",
     )
+    search_document_field = "search_document"
     ordering_fields = (
         "timestamp",
         "action_type",
         "transaction_name",
     )
     ordering = ("-timestamp",)
+    cursor_ordering = ("-timestamp", "-id")
 
     def get_queryset(self):
-        return ActivityLog.objects.select_related(
+        queryset = ActivityLog.objects.select_related(
             "client",
             "policy",
             "policy__carrier_product",
@@ -65,6 +73,7 @@ class ActivityLogViewSet(ModelViewSet):
             "driver",
             "performed_by",
         )
+        return self.prune_queryset(queryset)
 
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update"):
@@ -73,3 +82,49 @@ class ActivityLogViewSet(ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(performed_by=self.request.user)
+
+
+class GlobalSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(
+        min_length=search_index.MIN_QUERY_LENGTH, max_length=255, trim_whitespace=True
+    )
+    types = serializers.MultipleChoiceField(
+        choices=SearchIndexEntry.EntityType.choices, required=False
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=search_index.DEFAULT_LIMIT)
+
+
+class GlobalSearchView(APIView):
+    """
+    Type-ahead search across clients, policies, vehicles and drivers.
+
+    Matches prefixes of DOT numbers, FEINs, company names (and their words), policy
+    numbers, VINs, the last six VIN characters, unit numbers and license numbers.
+    Exact matches rank first, then identifiers before names.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params.copy()
+        if "types" in params:
+            # Accept both ``?types=client,policy`` and repeated ``?types=``.
+            params.setlist(
+                "types", [t for value in params.getlist("types") for t in value.split(",") if t]
+            )
+        query = GlobalSearchQuerySerializer(data=params)
+        query.is_valid(raise_exception=True)
+
+        started = time.perf_counter()
+        results = search_index.search(
+            query.validated_data["q"],
+            types=sorted(query.validated_data.get("types") or ()),
+            limit=query.validated_data["limit"],
+        )
+        took_ms = (time.perf_counter() - started) * 1000
+
+        response = Response(
+            {"query": query.validated_data["q"], "took_ms": round(took_ms, 2), "results": results}
+        )
+        response["Server-Timing"] = f"search;dur={took_ms:.2f}"
+        return response
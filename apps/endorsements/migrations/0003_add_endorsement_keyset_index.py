@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('endorsements', '0002_endorsementdocument'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='endorsement',
+            index=models.Index(fields=['-created_at', '-id'], name='endorsement_created_0f4fe6_idx'),
+        ),
+    ]
@@ -6,6 +6,8 @@ from pathlib import PurePosixPath
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Case, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from apps.common.models import BaseModel
@@ -89,6 +91,7 @@ class Endorsement(BaseModel):
 
     class Meta:
         ordering = ("-created_at",)
+        indexes = [models.Index(fields=["-created_at", "-id"])]
 
     def __str__(self) -> str:  # pragma: no cover - display helper
         return f"{self.name} ({self.policy})"
@@ -165,6 +168,30 @@ class EndorsementChange(BaseModel):
         return f"{self.get_change_type_display()} change for {self.endorsement}"
 
 
+def change_type_mask() -> Coalesce:
+    """Per endorsement, a bitmask of its change types (bit ``i``: ``ChangeType`` choice ``i``).
+
+    Each change contributes its type's bit; summing the distinct bits in a correlated
+    subquery yields the set of types without loading the changes.
+    """
+
+    bit = Case(
+        *[
+            When(change_type=value, then=Value(1 << index))
+            for index, value in enumerate(EndorsementChange.ChangeType.values)
+        ],
+        default=Value(0),
+    )
+    masks = (
+        EndorsementChange.objects.filter(endorsement=OuterRef("pk"))
+        .order_by()
+        .values("endorsement")
+        .annotate(mask=Sum(bit, distinct=True))
+        .values("mask")
+    )
+    return Coalesce(Subquery(masks, output_field=IntegerField()), Value(0))
+
+
 def endorsement_document_upload_to(instance: "EndorsementDocument", filename: str) -> str:
     """Organize uploads by client/policy/endorsement for S3 or local storage."""
 
@@ -9,9 +9,10 @@ from django.utils import timezone
 from rest_framework import serializers
 
 from apps.accounts.models import User
-from apps.policies.models import Policy
+from apps.common.fieldsets import SparseFieldsetSerializerMixin
 from apps.lookups.models import DocumentType
-from apps.lookups.serializers import LookupSerializer
+from apps.lookups.serializers import LookupRelatedField, LookupSerializer
+from apps.policies.models import Policy
 
 from .models import Endorsement, EndorsementChange, EndorsementDocument
 
@@ -25,7 +26,7 @@ class UserSummarySerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class EndorsementChangeSerializer(serializers.ModelSerializer):
+class EndorsementChangeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     endorsement = serializers.UUIDField(source="endorsement.id", read_only=True)
     endorsement_id = serializers.PrimaryKeyRelatedField(
         queryset=Endorsement.objects.filter(is_active=True),
@@ -60,7 +61,7 @@ class EndorsementChangeSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "endorsement", "created_by", "created_at", "updated_at", "is_active")
 
 
-class EndorsementDocumentSerializer(serializers.ModelSerializer):
+class EndorsementDocumentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     endorsement = serializers.UUIDField(source="endorsement.id", read_only=True)
     endorsement_id = serializers.PrimaryKeyRelatedField(
         queryset=Endorsement.objects.filter(is_active=True),
@@ -68,8 +69,8 @@ class EndorsementDocumentSerializer(serializers.ModelSerializer):
         write_only=True,
     )
     document_type = LookupSerializer(read_only=True)
-    document_type_id = serializers.PrimaryKeyRelatedField(
-        queryset=DocumentType.objects.filter(is_active=True),
+    document_type_id = LookupRelatedField(
+        DocumentType,
         source="document_type",
         write_only=True,
         allow_null=True,
@@ -105,7 +106,7 @@ class EndorsementDocumentSerializer(serializers.ModelSerializer):
         )
 
 
-class EndorsementSerializer(serializers.ModelSerializer):
+class EndorsementSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     policy = serializers.UUIDField(source="policy.id", read_only=True)
     policy_id = serializers.PrimaryKeyRelatedField(
         queryset=Policy.objects.filter(is_active=True),
@@ -175,8 +176,19 @@ class EndorsementSerializer(serializers.ModelSerializer):
             "updated_at",
             "is_active",
         )
+        # Left out of sparse fieldsets (``?fields=`` / ``?expand=``) unless asked for.
+        expandable_fields = ("changes", "documents")
+        # Without ``changes`` the view annotates ``change_type_mask`` instead.
+        fieldset_relations = {"change_types": ()}
 
     def get_change_types(self, obj: Endorsement) -> list[str]:
+        mask = getattr(obj, "change_type_mask", None)
+        if mask is not None:
+            return [
+                label
+                for bit, label in enumerate(EndorsementChange.ChangeType.labels)
+                if mask & (1 << bit)
+            ]
         ordering = {choice[0]: idx for idx, choice in enumerate(EndorsementChange.ChangeType.choices)}
         labels = {}
         for change in obj.changes.all():
@@ -1,10 +1,13 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from apps.accounts.models import User
 from apps.clients.models import Client
+from apps.endorsements.models import Endorsement, EndorsementChange
 from apps.lookups.models import (
     BusinessType,
     DocumentType,
@@ -118,6 +121,37 @@ def test_record_change_and_list_includes_change_types(api_client, user, policy):
     assert result["documents"] == []
 
 
+@pytest.mark.django_db
+def test_sparse_fieldset_skips_prefetches_and_aggregates_change_types(api_client, user, policy):
+    api_client.force_authenticate(user=user)
+    endorsement = Endorsement.objects.create(policy=policy, name="Fleet update")
+    for change_type in ("premium", "vehicles", "vehicles"):
+        EndorsementChange.objects.create(
+            endorsement=endorsement, stage="vehicles", change_type=change_type, summary="Change"
+        )
+    url = reverse("endorsements:endorsement-list")
+
+    def fetch(params):
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url, params)
+        assert response.status_code == 200, response.content
+        return response.json()["results"][0], len(queries.captured_queries)
+
+    full, full_queries = fetch({})
+    slim, slim_queries = fetch({"fields": "id,name,status,current_stage,change_types"})
+    assert set(slim) == {"id", "name", "status", "current_stage", "change_types"}
+    assert slim["change_types"] == full["change_types"] == ["Vehicles", "Premium"]
+    # Count and page only: changes and documents are not prefetched.
+    assert (full_queries, slim_queries) == (4, 2)
+
+    expanded, _ = fetch({"fields": "id,name", "expand": "changes"})
+    assert set(expanded) == {"id", "name", "changes"}
+    assert len(expanded["changes"]) == 3
+    without_lists, _ = fetch({"expand": ""})
+    assert "changes" not in without_lists and "documents" not in without_lists
+    assert without_lists["change_types"] == ["Vehicles", "Premium"]
+
+
 @pytest.mark.django_db
 def test_complete_endorsement_flow(api_client, user, policy):
     api_client.force_authenticate(user=user)
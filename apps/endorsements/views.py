@@ -8,7 +8,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from .models import Endorsement, EndorsementChange, EndorsementDocument
+from apps.common.fieldsets import SparseFieldsetMixin
+
+from .models import Endorsement, EndorsementChange, EndorsementDocument, change_type_mask
 from .serializers import (
     EndorsementChangeSerializer,
     EndorsementDocumentSerializer,
@@ -16,7 +18,7 @@ from .serializers import (
 )
 
 
-class BaseSoftDeleteViewSet(ModelViewSet):
+class BaseSoftDeleteViewSet(SparseFieldsetMixin, ModelViewSet):
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
@@ -47,6 +49,15 @@ class EndorsementViewSet(BaseSoftDeleteViewSet):
     search_fields = ("name", "policy__policy_number", "policy__client__company_name")
     ordering_fields = ("created_at", "updated_at", "effective_date")
     ordering = ("-created_at",)
+    cursor_ordering = ("-created_at", "-id")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.rendered_fields()
+        if fields is not None and "change_types" in fields and "changes" not in fields:
+            # The changes are not prefetched: derive their types with one aggregate per row.
+            queryset = queryset.annotate(change_type_mask=change_type_mask())
+        return queryset
 
     def perform_create(self, serializer: EndorsementSerializer) -> None:
         user = self.request.user if self.request.user.is_authenticated else None
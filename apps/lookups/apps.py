@@ -5,3 +5,8 @@ class LookupsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.lookups"
     verbose_name = "Lookups"
+
+    def ready(self) -> None:
+        from .signals import connect_signals
+
+        connect_signals()
@@ -0,0 +1,143 @@
+"""Two-tier cache for lookup tables.
+
+Active lookup rows are kept in a per-process dictionary backed by the shared Django
+cache (Redis in deployed environments, local memory otherwise). Each table carries a
+version counter in the shared cache; ``post_save``/``post_delete`` signals bump it, and
+every process reloads its local copy the next time it sees a newer version.
+"""
+from __future__ import annotations
+
+import copy
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import LookupBase
+
+VERSION_KEY = "lookups:{label}:version"
+ROWS_KEY = "lookups:{label}:rows:{version}"
+
+
+@dataclass(frozen=True)
+class _CachedTable:
+    version: int
+    rows: tuple[LookupBase, ...]
+    by_pk: dict[str, LookupBase] = field(repr=False)
+
+
+_local_tables: dict[str, _CachedTable] = {}
+_local_lock = threading.Lock()
+
+
+def lookup_models() -> list[type[LookupBase]]:
+    """Return every concrete lookup model registered in the lookups app."""
+
+    return [
+        model
+        for model in apps.get_app_config("lookups").get_models()
+        if issubclass(model, LookupBase)
+    ]
+
+
+def _label(model: type[LookupBase]) -> str:
+    return model._meta.label_lower
+
+
+def _timeout() -> int:
+    return getattr(settings, "LOOKUP_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def _fresh_version() -> int:
+    # Time-based seed so a version evicted from the shared cache never comes back
+    # with a value some process still holds locally.
+    return int(time.time() * 1000)
+
+
+def get_version(model: type[LookupBase]) -> int:
+    """Return the current shared version counter for ``model``."""
+
+    key = VERSION_KEY.format(label=_label(model))
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return int(version)
+
+
+def get_versions(models: list[type[LookupBase]]) -> dict[str, int]:
+    """Return the version counters of ``models`` keyed by model label in one cache round trip."""
+
+    keys = {VERSION_KEY.format(label=_label(model)): model for model in models}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, model in keys.items():
+        version = found.get(key)
+        versions[_label(model)] = int(version) if version is not None else get_version(model)
+    return versions
+
+
+def bump_version(model: type[LookupBase]) -> None:
+    """Invalidate the cached rows of ``model`` in every process."""
+
+    key = VERSION_KEY.format(label=_label(model))
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def _load_table(model: type[LookupBase]) -> _CachedTable:
+    label = _label(model)
+    # Read the version before the rows so a concurrent bump always wins.
+    version = get_version(model)
+    table = _local_tables.get(label)
+    if table is not None and table.version == version:
+        return table
+
+    rows_key = ROWS_KEY.format(label=label, version=version)
+    rows = cache.get(rows_key)
+    if rows is None:
+        rows = list(model.objects.filter(is_active=True).order_by("name"))
+        cache.set(rows_key, rows, timeout=_timeout())
+
+    table = _CachedTable(
+        version=version,
+        rows=tuple(rows),
+        by_pk={str(row.pk): row for row in rows},
+    )
+    with _local_lock:
+        _local_tables[label] = table
+    return table
+
+
+def get_active_lookups(model: type[LookupBase]) -> tuple[LookupBase, ...]:
+    """Return the active rows of ``model`` ordered by name.
+
+    The returned instances are shared between requests and must be treated as read-only.
+    """
+
+    return _load_table(model).rows
+
+
+def get_lookup(model: type[LookupBase], pk: Any) -> LookupBase | None:
+    """Return a copy of the active ``model`` row with primary key ``pk``, if any."""
+
+    try:
+        key = str(pk if isinstance(pk, uuid.UUID) else uuid.UUID(str(pk)))
+    except (TypeError, ValueError, AttributeError):
+        return None
+    instance = _load_table(model).by_pk.get(key)
+    return copy.copy(instance) if instance is not None else None
+
+
+def clear_local_cache() -> None:
+    """Drop the in-process tier (the shared tier is left untouched)."""
+
+    with _local_lock:
+        _local_tables.clear()
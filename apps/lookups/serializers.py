@@ -3,6 +3,9 @@ from __future__ import annotations
 
 from rest_framework import serializers
 
+from apps.common.fieldsets import SparseFieldsetSerializerMixin
+
+from .cache import get_lookup
 from .models import (
     AddressType,
     BusinessType,
@@ -11,12 +14,30 @@ from .models import (
     FinanceCompany,
     InsuranceType,
     LicenseClass,
+    LookupBase,
     PolicyStatus,
     PolicyType,
     VehicleType,
 )
 
 
+class LookupRelatedField(serializers.PrimaryKeyRelatedField):
+    """Write-side primary key field resolving active lookup rows from the lookup cache."""
+
+    def __init__(self, model: type[LookupBase], **kwargs):
+        self.lookup_model = model
+        kwargs.setdefault("queryset", model.objects.filter(is_active=True))
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        instance = get_lookup(self.lookup_model, data)
+        if instance is None:
+            self.fail("does_not_exist", pk_value=data)
+        return instance
+
+
 class LookupSerializer(serializers.Serializer):
     """Base serializer exposing the common lookup fields."""
 
@@ -25,70 +46,70 @@ class LookupSerializer(serializers.Serializer):
     is_active = serializers.BooleanField(read_only=True)
 
 
-class PolicyStatusSerializer(serializers.ModelSerializer):
+class PolicyStatusSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = PolicyStatus
         fields = ("id", "name", "is_active", "description")
         read_only_fields = fields
 
 
-class BusinessTypeSerializer(serializers.ModelSerializer):
+class BusinessTypeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = BusinessType
         fields = ("id", "name", "is_active")
         read_only_fields = fields
 
 
-class InsuranceTypeSerializer(serializers.ModelSerializer):
+class InsuranceTypeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = InsuranceType
         fields = ("id", "name", "is_active")
         read_only_fields = fields
 
 
-class PolicyTypeSerializer(serializers.ModelSerializer):
+class PolicyTypeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = PolicyType
         fields = ("id", "name", "is_active")
         read_only_fields = fields
 
 
-class FinanceCompanySerializer(serializers.ModelSerializer):
+class FinanceCompanySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = FinanceCompany
         fields = ("id", "name", "is_active")
         read_only_fields = fields
 
 
-class ContactTypeSerializer(serializers.ModelSerializer):
+class ContactTypeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ContactType
         fields = ("id", "name", "is_active")
         read_only_fields = fields
 
 
-class AddressTypeSerializer(serializers.ModelSerializer):
+class AddressTypeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = AddressType
         fields = ("id", "name", "is_active")
         read_only_fields = fields
 
 
-class VehicleTypeSerializer(serializers.ModelSerializer):
+class VehicleTypeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = VehicleType
         fields = ("id", "name", "is_active")
         read_only_fields = fields
 
 
-class LicenseClassSerializer(serializers.ModelSerializer):
+class LicenseClassSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = LicenseClass
         fields = ("id", "name", "is_active")
         read_only_fields = fields
 
 
-class DocumentTypeSerializer(serializers.ModelSerializer):
+class DocumentTypeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = DocumentType
         fields = ("id", "name", "is_active")
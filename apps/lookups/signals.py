@@ -0,0 +1,27 @@
+"""Signal handlers keeping the lookup cache in sync with the database."""
+from __future__ import annotations
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .cache import bump_version, lookup_models
+
+
+def invalidate_lookup_cache(sender, **kwargs) -> None:
+    """Bump the table version now and again once the surrounding transaction commits.
+
+    The second bump discards rows another process may have cached from the
+    not-yet-committed state in between.
+    """
+
+    bump_version(sender)
+    transaction.on_commit(partial(bump_version, sender))
+
+
+def connect_signals() -> None:
+    for model in lookup_models():
+        uid = f"lookup-cache-{model._meta.label_lower}"
+        post_save.connect(invalidate_lookup_cache, sender=model, dispatch_uid=f"{uid}-save")
+        post_delete.connect(invalidate_lookup_cache, sender=model, dispatch_uid=f"{uid}-delete")
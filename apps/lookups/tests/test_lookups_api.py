@@ -1,12 +1,23 @@
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 
+from apps.lookups.cache import clear_local_cache, get_lookup
 from apps.lookups.models import PolicyStatus
 
 
 pytestmark = pytest.mark.django_db
 
 
+@pytest.fixture(autouse=True)
+def lookup_cache():
+    cache.clear()
+    clear_local_cache()
+    yield
+    cache.clear()
+    clear_local_cache()
+
+
 def test_policy_status_seed_data():
     names = set(PolicyStatus.objects.values_list("name", flat=True))
     assert {"Active", "Inactive", "Prospect"}.issubset(names)
@@ -20,3 +31,87 @@ def test_policy_status_endpoint_returns_active_entries(client):
     assert payload["count"] >= 3
     returned_names = {item["name"] for item in payload["results"]}
     assert "Active" in returned_names
+
+
+def test_lookup_endpoint_is_served_from_cache(client, django_assert_num_queries):
+    url = reverse("lookups:lookup-policy-status-list")
+    client.get(url)
+
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response.status_code == 200
+
+    status = PolicyStatus.objects.get(name="Active")
+    detail_url = reverse("lookups:lookup-policy-status-detail", args=[status.id])
+    with django_assert_num_queries(0):
+        response = client.get(detail_url)
+    assert response.json()["name"] == "Active"
+
+
+def test_lookup_list_applies_filter_backends(client):
+    url = reverse("lookups:lookup-policy-status-list")
+    names = [item["name"] for item in client.get(url).json()["results"]]
+    assert names == sorted(names)
+
+    response = client.get(url, {"ordering": "-name"})
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()["results"]] == sorted(names, reverse=True)
+
+
+def test_lookup_cache_invalidated_on_save_and_delete(client):
+    url = reverse("lookups:lookup-policy-status-list")
+    client.get(url)
+
+    status = PolicyStatus.objects.create(name="Pending Renewal")
+    names = {item["name"] for item in client.get(url).json()["results"]}
+    assert "Pending Renewal" in names
+    assert get_lookup(PolicyStatus, status.id).name == "Pending Renewal"
+
+    status.is_active = False
+    status.save()
+    names = {item["name"] for item in client.get(url).json()["results"]}
+    assert "Pending Renewal" not in names
+    assert get_lookup(PolicyStatus, status.id) is None
+
+    active = PolicyStatus.objects.get(name="Prospect")
+    active.delete()
+    assert get_lookup(PolicyStatus, active.id) is None
+
+
+def test_lookup_bundle_returns_all_tables_with_etag(client, django_assert_num_queries):
+    url = reverse("lookups:lookup-bundle")
+    response = client.get(url)
+    assert response.status_code == 200
+    payload = response.json()
+    assert set(payload) == {
+        "policy_statuses",
+        "business_types",
+        "insurance_types",
+        "policy_types",
+        "finance_companies",
+        "contact_types",
+        "address_types",
+        "vehicle_types",
+        "license_classes",
+        "document_types",
+    }
+    assert "Active" in {item["name"] for item in payload["policy_statuses"]}
+    etag = response["ETag"]
+    assert etag.startswith('"')
+    assert "max-age" in response["Cache-Control"]
+
+    with django_assert_num_queries(0):
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == 304
+    assert not_modified["ETag"] == etag
+
+
+def test_lookup_bundle_etag_changes_when_table_changes(client):
+    url = reverse("lookups:lookup-bundle")
+    etag = client.get(url)["ETag"]
+
+    PolicyStatus.objects.create(name="Pending Renewal")
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert "Pending Renewal" in {item["name"] for item in response.json()["policy_statuses"]}
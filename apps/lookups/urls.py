@@ -12,6 +12,7 @@ from .views import (
     FinanceCompanyViewSet,
     InsuranceTypeViewSet,
     LicenseClassViewSet,
+    LookupBundleView,
     PolicyStatusViewSet,
     PolicyTypeViewSet,
     VehicleTypeViewSet,
@@ -33,5 +34,6 @@ router.register("document-types", DocumentTypeViewSet, basename="lookup-document
 app_name = "lookups"
 
 urlpatterns = [
+    path("bundle/", LookupBundleView.as_view(), name="lookup-bundle"),
     path("", include(router.urls)),
 ]
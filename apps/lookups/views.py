@@ -1,9 +1,23 @@
 """API views for lookup endpoints."""
 from __future__ import annotations
 
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from apps.common.fieldsets import SparseFieldsetMixin
+
+from .cache import get_active_lookups, get_lookup, get_versions
 from .models import (
     AddressType,
     BusinessType,
@@ -30,14 +44,39 @@ from .serializers import (
 )
 
 
-class BaseLookupViewSet(ReadOnlyModelViewSet):
-    """Shared read-only configuration for lookup viewsets."""
+class BaseLookupViewSet(SparseFieldsetMixin, ReadOnlyModelViewSet):
+    """Shared read-only configuration for lookup viewsets.
+
+    Reads are served from the lookup cache instead of the database. Lists with
+    filter, search or ordering parameters go through the filter backends instead.
+    """
 
     permission_classes = (AllowAny,)
+    # Query parameters the cached rows (active, ordered by name) can answer.
+    cached_params = frozenset({"page", "page_size", "count", "pagination", "fields", "expand"})
 
     def get_queryset(self):
         return self.queryset.filter(is_active=True).order_by("name")
 
+    def list(self, request, *args, **kwargs):
+        if any(param not in self.cached_params for param in request.query_params):
+            return super().list(request, *args, **kwargs)
+        rows = get_active_lookups(self.queryset.model)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(rows, many=True)
+        return Response(serializer.data)
+
+    def get_object(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = get_lookup(self.queryset.model, self.kwargs[lookup_url_kwarg])
+        if instance is None:
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
 
 class PolicyStatusViewSet(BaseLookupViewSet):
     queryset = PolicyStatus.objects.all()
@@ -87,3 +126,75 @@ class LicenseClassViewSet(BaseLookupViewSet):
 class DocumentTypeViewSet(BaseLookupViewSet):
     queryset = DocumentType.objects.all()
     serializer_class = DocumentTypeSerializer
+
+
+BUNDLE_TABLES = (
+    ("policy_statuses", PolicyStatusViewSet),
+    ("business_types", BusinessTypeViewSet),
+    ("insurance_types", InsuranceTypeViewSet),
+    ("policy_types", PolicyTypeViewSet),
+    ("finance_companies", FinanceCompanyViewSet),
+    ("contact_types", ContactTypeViewSet),
+    ("address_types", AddressTypeViewSet),
+    ("vehicle_types", VehicleTypeViewSet),
+    ("license_classes", LicenseClassViewSet),
+    ("document_types", DocumentTypeViewSet),
+)
+BUNDLE_CACHE_KEY = "lookups:bundle:{signature}"
+
+
+def _bundle_etag() -> str:
+    """Strong ETag derived from each table's latest ``updated_at`` and row count."""
+
+    digest = hashlib.sha256()
+    for key, viewset in BUNDLE_TABLES:
+        stats = viewset.queryset.model.objects.aggregate(last=Max("updated_at"), rows=Count("id"))
+        last = stats["last"].isoformat() if stats["last"] else ""
+        digest.update(f"{key}:{last}:{stats['rows']};".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def get_lookup_bundle() -> tuple[str, dict]:
+    """Return ``(etag, payload)`` for all lookup tables, rebuilding only after a table changes."""
+
+    models = [viewset.queryset.model for _key, viewset in BUNDLE_TABLES]
+    versions = get_versions(models)
+    signature = hashlib.sha1(
+        ";".join(f"{label}:{version}" for label, version in sorted(versions.items())).encode()
+    ).hexdigest()
+    cache_key = BUNDLE_CACHE_KEY.format(signature=signature)
+
+    bundle = cache.get(cache_key)
+    if bundle is None:
+        payload = {
+            key: viewset.serializer_class(
+                get_active_lookups(viewset.queryset.model), many=True
+            ).data
+            for key, viewset in BUNDLE_TABLES
+        }
+        bundle = (_bundle_etag(), payload)
+        cache.set(cache_key, bundle, timeout=settings.LOOKUP_CACHE_TIMEOUT)
+    return bundle
+
+
+class LookupBundleView(APIView):
+    """All lookup tables in one response, validated with a strong ETag."""
+
+    permission_classes = (AllowAny,)
+
+    def get(self, request, *args, **kwargs):
+        etag, payload = get_lookup_bundle()
+
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            etags = [tag.removeprefix("W/") for tag in parse_etags(if_none_match)]
+            if "*" in etags or etag in etags:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                return self._finalize(response, etag)
+
+        return self._finalize(Response(payload), etag)
+
+    def _finalize(self, response: Response, etag: str) -> Response:
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, max_age=settings.LOOKUP_BUNDLE_MAX_AGE)
+        return response
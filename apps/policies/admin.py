@@ -1,9 +1,17 @@
 """Admin configuration for policy domain models."""
 from __future__ import annotations
 
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from .models import CarrierProduct, GeneralAgent, Policy, PolicyFinancial, ReferralCompany
+from .models import (
+    CarrierProduct,
+    GeneralAgent,
+    Policy,
+    PolicyFinancial,
+    ReferralCompany,
+    RenewalRun,
+)
+from .renewal_runs import queue_run
 
 
 @admin.register(GeneralAgent)
@@ -162,3 +170,82 @@ class PolicyFinancialAdmin(admin.ModelAdmin):
             },
         ),
     )
+
+
+@admin.register(RenewalRun)
+class RenewalRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "window_start",
+        "window_end",
+        "status",
+        "processed",
+        "renewed",
+        "skipped",
+        "failed",
+        "throughput_display",
+        "created_at",
+    )
+    list_filter = ("status",)
+    actions = ("start_runs",)
+    readonly_fields = (
+        "status",
+        "checkpoint_maturity_date",
+        "checkpoint_policy_id",
+        "processed",
+        "renewed",
+        "skipped",
+        "failed",
+        "errors",
+        "elapsed_seconds",
+        "throughput_display",
+        "started_at",
+        "finished_at",
+        "created_by",
+    )
+    fieldsets = (
+        (None, {"fields": ("window_start", "window_end", "status")}),
+        (
+            "Options",
+            {"fields": ("roll_forward_premium", "premium_change_pct", "workers", "chunk_size")},
+        ),
+        (
+            "Progress",
+            {
+                "fields": (
+                    "processed",
+                    "renewed",
+                    "skipped",
+                    "failed",
+                    "elapsed_seconds",
+                    "throughput_display",
+                    "checkpoint_maturity_date",
+                    "checkpoint_policy_id",
+                    "errors",
+                    "started_at",
+                    "finished_at",
+                    "created_by",
+                ),
+            },
+        ),
+    )
+
+    @admin.display(description="Policies/sec")
+    def throughput_display(self, obj):
+        return f"{obj.throughput:.1f}"
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description="Start or resume selected renewal runs")
+    def start_runs(self, request, queryset):
+        startable = queryset.filter(
+            status__in=(RenewalRun.Status.PENDING, RenewalRun.Status.FAILED)
+        )
+        queued = sum(queue_run(run) is not None for run in startable)
+        self.message_user(
+            request,
+            f"Queued {queued} renewal run(s) for the job worker; refresh to follow progress.",
+            messages.INFO,
+        )
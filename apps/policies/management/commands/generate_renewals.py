@@ -0,0 +1,89 @@
+"""Generate renewal drafts for every policy maturing in the coming days."""
+from __future__ import annotations
+
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.policies.models import RenewalRun
+from apps.policies.renewal_runs import RenewalRunError, execute_run
+
+
+def _decimal(value: str) -> Decimal:
+    try:
+        return Decimal(value)
+    except InvalidOperation as exc:
+        raise ValueError(value) from exc
+
+
+class Command(BaseCommand):
+    help = (
+        "Renew all active policies whose maturity date falls in the next N days, or resume a run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=30, help="Size of the maturity window, starting today"
+        )
+        parser.add_argument(
+            "--start", type=datetime.date.fromisoformat, help="Window start (default: today)"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Worker processes; 1 renews in this process"
+        )
+        parser.add_argument("--chunk-size", type=int, default=100, help="Policies per chunk")
+        parser.add_argument("--roll-forward-premium", action="store_true")
+        parser.add_argument("--premium-change-pct", type=_decimal, default=Decimal("0"))
+        parser.add_argument(
+            "--resume", metavar="RUN_ID", help="Continue an interrupted run from its checkpoint"
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="With --resume, take over a run still marked as running",
+        )
+
+    def handle(self, *args, **options):
+        if options["resume"]:
+            try:
+                run = RenewalRun.objects.get(pk=options["resume"])
+            except (RenewalRun.DoesNotExist, ValueError) as exc:
+                raise CommandError(f"Unknown renewal run {options['resume']}.") from exc
+        else:
+            if options["days"] < 0 or options["workers"] < 1 or options["chunk_size"] < 1:
+                raise CommandError("--days must be >= 0, --workers and --chunk-size >= 1.")
+            start = options["start"] or timezone.localdate()
+            run = RenewalRun.objects.create(
+                window_start=start,
+                window_end=start + datetime.timedelta(days=options["days"]),
+                workers=options["workers"],
+                chunk_size=options["chunk_size"],
+                roll_forward_premium=options["roll_forward_premium"],
+                premium_change_pct=options["premium_change_pct"],
+            )
+        self.stdout.write(
+            f"Renewal run {run.pk}: maturities {run.window_start} to {run.window_end}"
+        )
+
+        def progress(run: RenewalRun) -> None:
+            self.stdout.write(
+                f"  {run.processed} processed ({run.renewed} renewed, {run.skipped} skipped, "
+                f"{run.failed} failed) - {run.throughput:.1f} policies/sec"
+            )
+
+        try:
+            execute_run(run, force=options["force"], on_progress=progress)
+        except RenewalRunError as exc:
+            raise CommandError(str(exc)) from exc
+        except Exception as exc:
+            raise CommandError(f"Run failed; resume with --resume {run.pk}: {exc}") from exc
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{run.processed} policies in {run.elapsed_seconds:.1f}s "
+                f"({run.throughput:.1f} policies/sec): "
+                f"{run.renewed} renewed, {run.skipped} skipped, {run.failed} failed"
+            )
+        )
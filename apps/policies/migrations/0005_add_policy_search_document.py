@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:19
+
+import re
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 500
+
+
+def _normalize(values):
+    # Frozen copy of apps.common.search.normalize as of this migration.
+    text = " ".join(str(value) for value in values if value not in (None, ""))
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def backfill_search_documents(apps, schema_editor):
+    Policy = apps.get_model("policies", "Policy")
+    policies = Policy.objects.select_related("client", "carrier_product__general_agent")
+    batch = []
+    for policy in policies.iterator(chunk_size=BATCH_SIZE):
+        carrier_product = policy.carrier_product
+        general_agent = carrier_product.general_agent if carrier_product else None
+        values = [
+            policy.policy_number,
+            policy.client.company_name if policy.client else None,
+            carrier_product.insurance_company_name if carrier_product else None,
+            general_agent.name if general_agent else None,
+        ]
+        policy.search_document = _normalize(values)
+        batch.append(policy)
+        if len(batch) >= BATCH_SIZE:
+            Policy.objects.bulk_update(batch, ["search_document"])
+            batch = []
+    Policy.objects.bulk_update(batch, ["search_document"])
+
+
+def add_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS "policies_policy_search_trgm" ON "policies_policy" USING gin ("search_document" gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS "policies_policy_search_trgm"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0004_add_producer_commission_amt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policy',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Denormalized search text maintained by apps.common.search'),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(add_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('policies', '0005_add_policy_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policy',
+            name='renewal_of',
+            field=models.OneToOneField(blank=True, help_text='Expiring policy this policy renews.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='renewal', to='policies.policy'),
+        ),
+    ]
@@ -188,6 +188,20 @@ class Policy(BaseModel):
         null=True,
         blank=True,
     )
+    renewal_of = models.OneToOneField(
+        "self",
+        related_name="renewal",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        help_text="Expiring policy this policy renews.",
+    )
+    search_document = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Denormalized search text maintained by apps.common.search",
+    )
 
     class Meta:
         ordering = ("-effective_date", "policy_number")
@@ -248,3 +262,56 @@ class Coverage(BaseModel):
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.coverage_type} ({self.policy})"
+
+
+class RenewalRun(BaseModel):
+    """Batch generation of renewal drafts for policies maturing in a date window.
+
+    Policies are processed in ``(maturity_date, id)`` order; the key of the last fully
+    processed chunk is checkpointed so an interrupted run resumes where it stopped.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    window_start = models.DateField()
+    window_end = models.DateField()
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    roll_forward_premium = models.BooleanField(default=False)
+    premium_change_pct = models.DecimalField(
+        max_digits=6, decimal_places=2, default=Decimal("0.00")
+    )
+    workers = models.PositiveSmallIntegerField(default=4)
+    chunk_size = models.PositiveIntegerField(default=100)
+    checkpoint_maturity_date = models.DateField(null=True, blank=True)
+    checkpoint_policy_id = models.UUIDField(null=True, blank=True)
+    processed = models.PositiveIntegerField(default=0)
+    renewed = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    elapsed_seconds = models.FloatField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="renewal_runs",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"Renewals {self.window_start} - {self.window_end} ({self.status})"
+
+    @property
+    def throughput(self) -> float:
+        """Policies processed per second of work."""
+
+        return self.processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
@@ -0,0 +1,193 @@
+"""Month-end batch renewals.
+
+A ``RenewalRun`` renews every active, not yet renewed policy maturing in its window.
+Policies are read in ``(maturity_date, id)`` keyset order, ``chunk_size`` keys at a
+time, and each chunk is renewed with ``renew_policy`` in a worker process. Workers are
+spawned fresh and open a single database connection each, which they keep for all the
+chunks they handle.
+
+Chunks are dispatched in waves of ``workers``; once a whole wave has finished the key
+of its last policy is saved on the run together with the counters. A run that crashed
+resumes after that checkpoint, and anything renewed after it is not renewed twice: it
+no longer matches the candidate query, or ``renew_policy`` refuses it.
+
+The admin never executes a run itself: ``queue_run`` hands it to the background job
+queue and a ``process_jobs`` worker picks it up.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import get_context
+from typing import Any
+
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from apps.common.jobs import enqueue
+from apps.common.models import BackgroundJob
+
+from .models import Policy, RenewalRun
+from .renewal_workers import init_worker, renew_chunk
+
+logger = logging.getLogger(__name__)
+
+# Keeps the run row small when a whole window fails for the same reason.
+MAX_RECORDED_ERRORS = 100
+
+EXECUTE_TASK = "policies.execute_renewal_run"
+
+Key = tuple[Any, Any]  # (maturity_date, policy id)
+
+
+class RenewalRunError(Exception):
+    """The run cannot be started (already running or completed)."""
+
+
+def candidates(run: RenewalRun) -> QuerySet:
+    """Policies the run still has to consider, in keyset order."""
+
+    queryset = Policy.objects.filter(
+        is_active=True,
+        maturity_date__gte=run.window_start,
+        maturity_date__lte=run.window_end,
+        renewal__isnull=True,
+        # Renewals created by this run mature a term later; never chain them.
+        created_at__lt=run.created_at,
+    )
+    if run.checkpoint_policy_id is not None:
+        last_date, last_id = run.checkpoint_maturity_date, run.checkpoint_policy_id
+        queryset = queryset.filter(
+            Q(maturity_date__gt=last_date) | Q(maturity_date=last_date, id__gt=last_id)
+        )
+    return queryset.order_by("maturity_date", "id")
+
+
+def iter_chunks(run: RenewalRun) -> Iterator[list[Key]]:
+    """Yield chunks of ``(maturity_date, id)`` keys; each chunk is one indexed range read."""
+
+    after: Key | None = None
+    while True:
+        queryset = candidates(run)
+        if after is not None:
+            queryset = queryset.filter(
+                Q(maturity_date__gt=after[0]) | Q(maturity_date=after[0], id__gt=after[1])
+            )
+        keys = list(queryset.values_list("maturity_date", "id")[: run.chunk_size])
+        if not keys:
+            return
+        yield keys
+        after = keys[-1]
+
+
+def _options(run: RenewalRun) -> dict[str, Any]:
+    return {
+        "roll_forward_premium": run.roll_forward_premium,
+        "premium_change_pct": run.premium_change_pct,
+        "user_id": run.created_by_id,
+    }
+
+
+def _claim(run: RenewalRun, *, force: bool) -> None:
+    claimable = [RenewalRun.Status.PENDING, RenewalRun.Status.FAILED]
+    if force:
+        # A process killed mid-run leaves its run marked as running.
+        claimable.append(RenewalRun.Status.RUNNING)
+    claimed = RenewalRun.objects.filter(pk=run.pk, status__in=claimable).update(
+        status=RenewalRun.Status.RUNNING,
+        started_at=run.started_at or timezone.now(),
+        finished_at=None,
+        updated_at=timezone.now(),
+    )
+    if not claimed:
+        raise RenewalRunError(f"Renewal run {run.pk} is already running or completed.")
+    run.refresh_from_db()
+
+
+def _record(run: RenewalRun, keys: list[Key], results: list[dict[str, Any]]) -> None:
+    for result in results:
+        run.renewed += result["renewed"]
+        run.skipped += result["skipped"]
+        run.failed += result["failed"]
+        room = MAX_RECORDED_ERRORS - len(run.errors)
+        if room > 0:
+            run.errors.extend(result["errors"][:room])
+    run.processed += len(keys)
+    run.checkpoint_maturity_date, run.checkpoint_policy_id = keys[-1]
+
+
+def execute_run(
+    run: RenewalRun,
+    *,
+    force: bool = False,
+    on_progress: Callable[[RenewalRun], None] | None = None,
+) -> RenewalRun:
+    """Process ``run`` from its checkpoint to the end of the window.
+
+    With ``workers`` <= 1 chunks are renewed in this process; otherwise in a pool of
+    ``workers`` spawned processes. ``on_progress`` is called after every checkpoint.
+    """
+
+    _claim(run, force=force)
+    options = _options(run)
+    elapsed_before = run.elapsed_seconds
+    started = time.monotonic()
+
+    def checkpoint(keys: list[Key], results: list[dict[str, Any]]) -> None:
+        _record(run, keys, results)
+        run.elapsed_seconds = elapsed_before + time.monotonic() - started
+        run.save()
+        if on_progress is not None:
+            on_progress(run)
+
+    try:
+        chunks = iter_chunks(run)
+        if run.workers <= 1:
+            for keys in chunks:
+                checkpoint(keys, [renew_chunk([pk for _, pk in keys], options)])
+        else:
+            with ProcessPoolExecutor(
+                max_workers=run.workers,
+                mp_context=get_context("spawn"),
+                initializer=init_worker,
+                initargs=(os.environ["DJANGO_SETTINGS_MODULE"],),
+            ) as pool:
+                while wave := list(islice(chunks, run.workers)):
+                    futures = [
+                        pool.submit(renew_chunk, [pk for _, pk in keys], options) for keys in wave
+                    ]
+                    checkpoint(
+                        [key for keys in wave for key in keys],
+                        [future.result() for future in futures],
+                    )
+    except Exception as exc:
+        run.status = RenewalRun.Status.FAILED
+        failure = {"policy": None, "error": str(exc)}
+        run.errors = [*run.errors[: MAX_RECORDED_ERRORS - 1], failure]
+        run.elapsed_seconds = elapsed_before + time.monotonic() - started
+        run.finished_at = timezone.now()
+        run.save()
+        raise
+
+    run.status = RenewalRun.Status.COMPLETED
+    run.elapsed_seconds = elapsed_before + time.monotonic() - started
+    run.finished_at = timezone.now()
+    run.save()
+    logger.info(
+        "Renewal run %s: %s policies in %.1fs (%.1f policies/sec)",
+        run.pk,
+        run.processed,
+        run.elapsed_seconds,
+        run.throughput,
+    )
+    return run
+
+
+def queue_run(run: RenewalRun) -> BackgroundJob | None:
+    """Queue ``run`` for a job worker; ``None`` if it is already waiting in the queue."""
+
+    return enqueue(EXECUTE_TASK, {"run_id": str(run.pk)}, unique_key=str(run.pk))
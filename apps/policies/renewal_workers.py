@@ -0,0 +1,60 @@
+"""Worker side of batch renewal runs.
+
+Workers are spawned processes that unpickle these functions before Django is set up,
+so this module must not import models at import time.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def init_worker(settings_module: str) -> None:
+    """Pool initializer: set Django up once per worker process."""
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+
+    import django
+
+    django.setup()
+
+    from django.db import connections
+
+    # Nothing is inherited from the parent; the first query opens this worker's connection.
+    connections.close_all()
+
+
+def renew_chunk(policy_ids: list[Any], options: dict[str, Any]) -> dict[str, Any]:
+    """Renew one chunk of policies and return the counters and per-policy errors."""
+
+    from django.contrib.auth import get_user_model
+
+    from .models import Policy
+    from .services import RenewalError, renew_policy
+
+    user = None
+    if options.get("user_id"):
+        user = get_user_model().objects.filter(pk=options["user_id"]).first()
+
+    result: dict[str, Any] = {"renewed": 0, "skipped": 0, "failed": 0, "errors": []}
+    for policy_id in policy_ids:
+        try:
+            renew_policy(
+                Policy(pk=policy_id),
+                roll_forward_premium=options["roll_forward_premium"],
+                premium_change_pct=options["premium_change_pct"],
+                user=user,
+            )
+        except RenewalError as exc:
+            result["skipped"] += 1
+            result["errors"].append({"policy": str(policy_id), "error": str(exc)})
+        except Exception as exc:  # noqa: BLE001 - one bad policy must not stop the run
+            logger.exception("Renewal of policy %s failed", policy_id)
+            result["failed"] += 1
+            result["errors"].append({"policy": str(policy_id), "error": str(exc)})
+        else:
+            result["renewed"] += 1
+    return result
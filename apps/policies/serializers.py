@@ -14,8 +14,10 @@ from apps.lookups.models import (
     PolicyStatus,
     PolicyType,
 )
-from apps.lookups.serializers import LookupSerializer
+from apps.lookups.serializers import LookupRelatedField, LookupSerializer
 from apps.accounts.models import User
+from apps.common.fieldsets import SparseFieldsetSerializerMixin
+from apps.common.sync import apply_diff, diff_children
 
 from .models import CarrierProduct, Coverage, GeneralAgent, Policy, PolicyFinancial, ReferralCompany
 
@@ -38,14 +40,14 @@ class ClientSummarySerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class GeneralAgentSerializer(serializers.ModelSerializer):
+class GeneralAgentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = GeneralAgent
         fields = ("id", "name", "agency_commission", "is_active", "created_at", "updated_at")
         read_only_fields = ("id", "is_active", "created_at", "updated_at")
 
 
-class CarrierProductSerializer(serializers.ModelSerializer):
+class CarrierProductSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     general_agent = GeneralAgentSerializer(read_only=True)
     general_agent_id = serializers.PrimaryKeyRelatedField(
         queryset=GeneralAgent.objects.filter(is_active=True),
@@ -81,7 +83,7 @@ class CarrierProductSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "general_agent", "is_active", "created_at", "updated_at")
 
 
-class ReferralCompanySerializer(serializers.ModelSerializer):
+class ReferralCompanySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ReferralCompany
         fields = ("id", "name", "rate", "is_active", "created_at", "updated_at")
@@ -102,7 +104,7 @@ class CoverageSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "is_active")
 
 
-class PolicySerializer(serializers.ModelSerializer):
+class PolicySerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     client = ClientSummarySerializer(read_only=True)
     client_id = serializers.PrimaryKeyRelatedField(
         queryset=Client.objects.filter(is_active=True),
@@ -110,26 +112,26 @@ class PolicySerializer(serializers.ModelSerializer):
         write_only=True,
     )
     status = LookupSerializer(read_only=True)
-    status_id = serializers.PrimaryKeyRelatedField(
-        queryset=PolicyStatus.objects.filter(is_active=True),
+    status_id = LookupRelatedField(
+        PolicyStatus,
         source="status",
         write_only=True,
     )
     business_type = LookupSerializer(read_only=True)
-    business_type_id = serializers.PrimaryKeyRelatedField(
-        queryset=BusinessType.objects.filter(is_active=True),
+    business_type_id = LookupRelatedField(
+        BusinessType,
         source="business_type",
         write_only=True,
     )
     insurance_type = LookupSerializer(read_only=True)
-    insurance_type_id = serializers.PrimaryKeyRelatedField(
-        queryset=InsuranceType.objects.filter(is_active=True),
+    insurance_type_id = LookupRelatedField(
+        InsuranceType,
         source="insurance_type",
         write_only=True,
     )
     policy_type = LookupSerializer(read_only=True)
-    policy_type_id = serializers.PrimaryKeyRelatedField(
-        queryset=PolicyType.objects.filter(is_active=True),
+    policy_type_id = LookupRelatedField(
+        PolicyType,
         source="policy_type",
         write_only=True,
     )
@@ -140,8 +142,8 @@ class PolicySerializer(serializers.ModelSerializer):
         write_only=True,
     )
     finance_company = LookupSerializer(read_only=True)
-    finance_company_id = serializers.PrimaryKeyRelatedField(
-        queryset=FinanceCompany.objects.filter(is_active=True),
+    finance_company_id = LookupRelatedField(
+        FinanceCompany,
         source="finance_company",
         write_only=True,
         allow_null=True,
@@ -205,6 +207,7 @@ class PolicySerializer(serializers.ModelSerializer):
             "referral_company_id",
             "financials",
             "coverages",
+            "renewal_of",
             "is_active",
             "created_at",
             "updated_at",
@@ -212,6 +215,7 @@ class PolicySerializer(serializers.ModelSerializer):
         read_only_fields = (
             "id",
             "client",
+            "renewal_of",
             "status",
             "business_type",
             "insurance_type",
@@ -225,33 +229,23 @@ class PolicySerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        # Left out of sparse fieldsets (``?fields=`` / ``?expand=``) unless asked for.
+        expandable_fields = ("carrier_product", "financials", "coverages")
 
     def _sync_coverages(self, policy: Policy, items: list[dict[str, Any]], *, clear_existing: bool) -> None:
-        manager = policy.coverages
-        existing = {str(obj.id): obj for obj in manager.all()}
-
-        if clear_existing:
-            for coverage in existing.values():
-                coverage.delete()
-            existing = {}
-
-        for raw in items:
-            data = dict(raw)
-            coverage_id = str(data.pop("id", "") or "")
-            is_active = data.pop("is_active", True)
-
-            if coverage_id and coverage_id in existing and not clear_existing:
-                obj = existing[coverage_id]
-                for field in ["coverage_type", "limits", "deductible"]:
-                    if field in data:
-                        setattr(obj, field, data[field])
-                obj.is_active = is_active
-                obj.save(update_fields=["coverage_type", "limits", "deductible", "is_active", "updated_at"])
-                continue
-
+        def build(data: dict[str, Any], is_active: bool) -> Coverage:
             if not data.get("coverage_type"):
                 raise serializers.ValidationError("coverage_type is required for coverages.")
-            manager.create(is_active=is_active, **data)
+            return Coverage(policy=policy, is_active=is_active, **data)
+
+        diff = diff_children(
+            policy.coverages.all(),
+            items,
+            fields=("coverage_type", "limits", "deductible"),
+            build=build,
+            clear_existing=clear_existing,
+        )
+        apply_diff(Coverage, diff)
 
     def _upsert_financials(self, policy: Policy, payload: dict[str, Any] | None) -> None:
         if payload is None:
@@ -305,3 +299,20 @@ class PolicySerializer(serializers.ModelSerializer):
         if "coverages" in data and value.get("coverages"):
             value["coverages"] = merge_items(data.get("coverages") or [], value["coverages"])
         return value
+
+
+class PolicyRenewalSerializer(serializers.Serializer):
+    """Options of ``POST /policies/{id}/renew/``; every field is optional."""
+
+    policy_number = serializers.CharField(max_length=128, required=False)
+    effective_date = serializers.DateField(required=False)
+    maturity_date = serializers.DateField(required=False)
+    status_id = LookupRelatedField(PolicyStatus, source="status", required=False)
+    roll_forward_premium = serializers.BooleanField(default=False)
+    premium_change_pct = serializers.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        min_value=-100,
+        default=0,
+        help_text="Percentage applied to the rolled-forward premium, e.g. 7.5 for +7.5%.",
+    )
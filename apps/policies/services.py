@@ -0,0 +1,232 @@
+"""Policy renewal.
+
+``renew_policy`` creates the successor of an expiring policy in one transaction and
+with a fixed number of queries, whatever the size of the fleet: the financials,
+coverages and active vehicle/driver assignments are each copied with one SELECT of
+the source rows and one bulk INSERT.
+"""
+from __future__ import annotations
+
+import calendar
+import datetime
+import re
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any
+
+from django.db import IntegrityError, transaction
+from django.db.models import Model, QuerySet
+
+from apps.assets.models import PolicyDriver, PolicyVehicle
+from apps.common.models import ActivityLog
+from apps.common.services import format_timestamp, log_activity, user_display_name
+from apps.common.signals import suppress_activity_capture
+from apps.lookups.cache import get_active_lookups
+from apps.lookups.models import BusinessType
+
+from .models import Coverage, Policy, PolicyFinancial
+
+RENEWAL_BUSINESS_TYPE = "Renewal"
+# Never copied: identity, bookkeeping and values the renewal sets itself.
+_UNCOPIED_FIELDS = frozenset({"id", "created_at", "updated_at", "is_active", "search_document"})
+_RENEWAL_SUFFIX = re.compile(r"-R(\d+)$")
+
+
+class RenewalError(Exception):
+    """The policy cannot be renewed (already renewed, inactive, bad dates...)."""
+
+
+def renewal_policy_number(policy: Policy) -> str:
+    """Default number of the successor: ``POL-1`` -> ``POL-1-R1`` -> ``POL-1-R2``."""
+
+    match = _RENEWAL_SUFFIX.search(policy.policy_number)
+    if match:
+        return f"{policy.policy_number[: match.start()]}-R{int(match.group(1)) + 1}"
+    return f"{policy.policy_number}-R1"
+
+
+def _add_months(value: datetime.date, months: int) -> datetime.date:
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(
+        year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1])
+    )
+
+
+def renewal_term(policy: Policy) -> tuple[datetime.date, datetime.date]:
+    """Return the successor's ``(effective_date, maturity_date)``.
+
+    The new term starts when the old one matures and has the same length, counted in
+    whole months when the old term was (12-month policies stay 12-month across leap
+    years), in days otherwise.
+    """
+
+    start, end = policy.effective_date, policy.maturity_date
+    months = (end.year - start.year) * 12 + end.month - start.month
+    if months > 0 and _add_months(start, months) == end:
+        return end, _add_months(end, months)
+    return end, end + (end - start)
+
+
+def _copy_rows(model: type[Model], source: QuerySet, **overrides: Any) -> list[Model]:
+    """Insert a copy of every ``source`` row with ``overrides`` applied; two queries."""
+
+    fields = [
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.attname not in _UNCOPIED_FIELDS and field.attname not in overrides
+    ]
+    copies = [model(**row, **overrides) for row in source.values(*fields)]
+    model.objects.bulk_create(copies)
+    return copies
+
+
+def _scaled(amount: Decimal | None, factor: Decimal) -> Decimal | None:
+    if amount is None:
+        return None
+    return (amount * factor).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _renewal_financials(
+    source: PolicyFinancial | None,
+    renewal: Policy,
+    *,
+    roll_forward_premium: bool,
+    premium_change_pct: Decimal,
+) -> PolicyFinancial:
+    financials = PolicyFinancial(policy=renewal)
+    if source is None:
+        return financials
+    financials.broker_fee = source.broker_fee
+    financials.agency_fee = source.agency_fee
+    if roll_forward_premium:
+        factor = 1 + premium_change_pct / 100
+        # The renewal starts from the premium the expiring policy ended with.
+        premium = _scaled(source.latest_pure_premium, factor)
+        financials.original_pure_premium = premium
+        financials.latest_pure_premium = premium
+        financials.total_premium = _scaled(source.total_premium, factor)
+    return financials
+
+
+def renew_policy(
+    policy: Policy,
+    *,
+    policy_number: str | None = None,
+    effective_date: datetime.date | None = None,
+    maturity_date: datetime.date | None = None,
+    status=None,
+    roll_forward_premium: bool = False,
+    premium_change_pct: Decimal = Decimal("0"),
+    user=None,
+) -> Policy:
+    """Create the renewal of ``policy`` with its coverages and active assignments.
+
+    * Policy fields are copied; the term follows ``renewal_term`` unless given, and the
+      business type becomes "Renewal" when that lookup exists.
+    * Financials keep the broker and agency fees. With ``roll_forward_premium`` the
+      expiring policy's latest pure premium and total premium are carried over, adjusted
+      by ``premium_change_pct``; other amounts are left for recalculation.
+    * Active coverages are copied, as are active assignments of active vehicles and
+      drivers (vehicle assignments restart at the new effective date).
+
+    A single timeline entry records the renewal instead of one per copied row.
+    """
+
+    renewal_type = next(
+        (row for row in get_active_lookups(BusinessType) if row.name == RENEWAL_BUSINESS_TYPE), None
+    )
+
+    try:
+        with transaction.atomic(), suppress_activity_capture():
+            source = (
+                Policy.objects.select_for_update(of=("self",))
+                .select_related("financials")
+                .get(pk=policy.pk)
+            )
+            if not source.is_active:
+                raise RenewalError("Inactive policies cannot be renewed.")
+            if Policy.objects.filter(renewal_of=source).exists():
+                raise RenewalError("This policy has already been renewed.")
+
+            default_effective, default_maturity = renewal_term(source)
+            effective_date = effective_date or default_effective
+            maturity_date = maturity_date or (
+                default_maturity if effective_date == default_effective else None
+            )
+            if maturity_date is None:
+                raise RenewalError("maturity_date is required when effective_date is changed.")
+            if maturity_date <= effective_date:
+                raise RenewalError("maturity_date must be after effective_date.")
+
+            values = {
+                field.attname: getattr(source, field.attname)
+                for field in Policy._meta.concrete_fields
+                if field.attname not in _UNCOPIED_FIELDS
+            }
+            values.update(
+                policy_number=policy_number or renewal_policy_number(source),
+                effective_date=effective_date,
+                maturity_date=maturity_date,
+                renewal_of_id=source.pk,
+                created_by_id=getattr(user, "pk", None),
+                updated_by_id=getattr(user, "pk", None),
+            )
+            if status is not None:
+                values["status_id"] = status.pk
+            if renewal_type is not None:
+                values["business_type_id"] = renewal_type.pk
+            renewal = Policy.objects.create(**values)
+
+            try:
+                source_financials = source.financials
+            except PolicyFinancial.DoesNotExist:
+                source_financials = None
+            _renewal_financials(
+                source_financials,
+                renewal,
+                roll_forward_premium=roll_forward_premium,
+                premium_change_pct=premium_change_pct,
+            ).save()
+
+            coverages = _copy_rows(
+                Coverage, source.coverages.filter(is_active=True), policy_id=renewal.pk
+            )
+            vehicles = _copy_rows(
+                PolicyVehicle,
+                source.policy_vehicles.filter(
+                    is_active=True, status=PolicyVehicle.Status.ACTIVE, vehicle__is_active=True
+                ),
+                policy_id=renewal.pk,
+                inception_date=effective_date,
+                termination_date=None,
+            )
+            drivers = _copy_rows(
+                PolicyDriver,
+                source.policy_drivers.filter(
+                    is_active=True, status=PolicyDriver.Status.ACTIVE, driver__is_active=True
+                ),
+                policy_id=renewal.pk,
+            )
+    except IntegrityError as exc:
+        raise RenewalError(f"Could not create the renewal: {exc}") from exc
+
+    log_activity(
+        ActivityLog.ActionType.POLICY_CREATED,
+        f"Policy Renewed: {renewal.policy_number}",
+        description=(
+            f"Policy {source.policy_number} was renewed as {renewal.policy_number} "
+            f"on {format_timestamp(renewal.created_at)} by {user_display_name(user)}"
+        ),
+        client_id=renewal.client_id,
+        policy=renewal,
+        performed_by=user,
+        metadata={
+            "event": "renewed",
+            "renewal_of": str(source.pk),
+            "coverages": len(coverages),
+            "vehicles": len(vehicles),
+            "drivers": len(drivers),
+            "premium_rolled_forward": roll_forward_premium,
+        },
+    )
+    return renewal
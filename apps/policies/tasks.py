@@ -0,0 +1,23 @@
+"""Background tasks of the policy domain (run by ``manage.py process_jobs``)."""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from apps.common.jobs import task
+
+from .models import RenewalRun
+from .renewal_runs import EXECUTE_TASK, RenewalRunError, execute_run
+
+logger = logging.getLogger(__name__)
+
+
+# A failed run keeps its checkpoint; it is resumed from the admin, not retried here.
+@task(EXECUTE_TASK, max_attempts=1)
+def execute_renewal_run(payload: dict[str, Any]) -> None:
+    run = RenewalRun.objects.get(pk=payload["run_id"])
+    try:
+        execute_run(run)
+    except RenewalRunError:
+        # Another worker holds the run (or finished it) since it was queued.
+        logger.info("Renewal run %s is already running or completed", run.pk)
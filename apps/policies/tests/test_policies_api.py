@@ -1,19 +1,38 @@
+import datetime
 from decimal import Decimal
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from rest_framework import serializers
 from rest_framework.test import APIClient
 
 from apps.accounts.models import User
-from apps.clients.models import Client
+from apps.assets.models import PolicyVehicle
+from apps.clients.models import Address, Client
+from apps.common.fieldsets import clear_field_map_cache
+from apps.common.jobs import claim, run_job
 from apps.lookups.models import (
     BusinessType,
     FinanceCompany,
     InsuranceType,
     PolicyStatus,
     PolicyType,
+    VehicleType,
 )
-from apps.policies.models import CarrierProduct, Coverage, GeneralAgent, Policy, ReferralCompany
+from apps.policies.models import (
+    CarrierProduct,
+    Coverage,
+    GeneralAgent,
+    Policy,
+    PolicyFinancial,
+    ReferralCompany,
+    RenewalRun,
+)
+from apps.policies.renewal_runs import execute_run, queue_run
+from apps.policies.serializers import PolicySerializer
+from apps.policies.services import renew_policy
 
 
 @pytest.fixture
@@ -199,3 +218,292 @@ def test_soft_delete_policy_marks_related_records_inactive(api_client, user, cli
     policy.refresh_from_db()
     assert policy.is_active is False
     assert policy.coverages.filter(is_active=True).count() == 0
+
+
+@pytest.mark.django_db
+def test_search_policies_follows_carrier_rename(
+    api_client, user, client, carrier_product, lookup_values, django_capture_on_commit_callbacks
+):
+    api_client.force_authenticate(user=user)
+    Policy.objects.create(
+        client=client,
+        policy_number="POL-001",
+        status=lookup_values["status"],
+        business_type=lookup_values["business_type"],
+        insurance_type=lookup_values["insurance_type"],
+        policy_type=lookup_values["policy_type"],
+        effective_date="2024-01-01",
+        maturity_date="2025-01-01",
+        carrier_product=carrier_product,
+        created_by=user,
+        updated_by=user,
+    )
+    url = reverse("policies:policy-list")
+    assert api_client.get(url, {"search": "progressive acme"}).json()["count"] == 1
+
+    carrier_product.insurance_company_name = "Summit Mutual"
+    with django_capture_on_commit_callbacks(execute=True):
+        carrier_product.save()
+
+    assert api_client.get(url, {"search": "summit"}).json()["count"] == 1
+    assert api_client.get(url, {"search": "progressive"}).json()["count"] == 1  # general agent name
+    assert api_client.get(url, {"search": "progressive acme pol-002"}).json()["count"] == 0
+
+
+def _policy_with_fleet(user, client, carrier_product, lookup_values, number, fleet_size):
+    policy = Policy.objects.create(
+        client=client,
+        policy_number=number,
+        status=lookup_values["status"],
+        business_type=lookup_values["business_type"],
+        insurance_type=lookup_values["insurance_type"],
+        policy_type=lookup_values["policy_type"],
+        effective_date="2024-02-29",
+        maturity_date="2025-02-28",
+        carrier_product=carrier_product,
+        created_by=user,
+        updated_by=user,
+    )
+    PolicyFinancial.objects.create(
+        policy=policy,
+        latest_pure_premium="10000.00",
+        total_premium="12000.00",
+        broker_fee="150.00",
+        taxes="80.00",
+    )
+    Coverage.objects.create(policy=policy, coverage_type="Auto Liability", limits="$1,000,000")
+    Coverage.objects.create(policy=policy, coverage_type="Cargo", is_active=False)
+    address = Address.objects.create(
+        street_address="1 Yard", city="Austin", state="TX", zip_code="78701"
+    )
+    vehicle_type = VehicleType.objects.filter(is_active=True).first()
+    for index in range(fleet_size):
+        vehicle = client.vehicles.create(
+            vin=f"4XPWD40X1E{number[-1]}{index:06d}",
+            vehicle_type=vehicle_type,
+            year=2022,
+            make="Volvo",
+            model="VNL",
+        )
+        policy.policy_vehicles.create(
+            vehicle=vehicle,
+            garaging_address=address,
+            inception_date="2024-02-29",
+            status=PolicyVehicle.Status.INACTIVE if index == 0 else PolicyVehicle.Status.ACTIVE,
+        )
+    return policy
+
+
+@pytest.mark.django_db
+def test_renew_policy_copies_coverages_and_active_assignments(
+    api_client, user, client, carrier_product, lookup_values
+):
+    api_client.force_authenticate(user=user)
+    policy = _policy_with_fleet(user, client, carrier_product, lookup_values, "POL-1", 3)
+    url = reverse("policies:policy-renew", args=[policy.id])
+
+    response = api_client.post(
+        url, {"roll_forward_premium": True, "premium_change_pct": "5"}, format="json"
+    )
+
+    assert response.status_code == 201, response.content
+    data = response.json()
+    assert data["policy_number"] == "POL-1-R1"
+    assert data["renewal_of"] == str(policy.pk)
+    # Whole-month terms stay whole months: Feb 28, 2025 -> Feb 28, 2026.
+    assert (data["effective_date"], data["maturity_date"]) == ("2025-02-28", "2026-02-28")
+    renewal = Policy.objects.get(pk=data["id"])
+    assert renewal.business_type.name == "Renewal"
+    assert list(renewal.coverages.values_list("coverage_type", flat=True)) == ["Auto Liability"]
+    assert renewal.policy_vehicles.count() == 2
+    inception_dates = set(renewal.policy_vehicles.values_list("inception_date", flat=True))
+    assert inception_dates == {renewal.effective_date}
+    financials = renewal.financials
+    assert financials.original_pure_premium == Decimal("10500.00")
+    assert financials.total_premium == Decimal("12600.00")
+    assert (financials.broker_fee, financials.taxes) == (Decimal("150.00"), None)
+
+    response = api_client.post(url, {}, format="json")
+    assert response.status_code == 400
+    assert "already been renewed" in response.json()["detail"]
+
+
+@pytest.mark.django_db
+def test_renew_policy_query_count_does_not_grow_with_fleet(
+    user, client, carrier_product, lookup_values
+):
+    small = _policy_with_fleet(user, client, carrier_product, lookup_values, "POL-2", 2)
+    large = _policy_with_fleet(user, client, carrier_product, lookup_values, "POL-3", 12)
+
+    with CaptureQueriesContext(connection) as small_renewal:
+        renew_policy(small, user=user)
+    with CaptureQueriesContext(connection) as large_renewal:
+        renew_policy(large, user=user)
+
+    assert len(large_renewal.captured_queries) == len(small_renewal.captured_queries)
+
+
+@pytest.mark.django_db
+def test_renewal_run_resumes_from_checkpoint_and_skips_out_of_window(
+    user, client, carrier_product, lookup_values
+):
+    policies = [
+        _policy_with_fleet(user, client, carrier_product, lookup_values, f"POL-{index}", 1)
+        for index in range(4)
+    ]
+    Policy.objects.filter(pk=policies[3].pk).update(maturity_date="2025-06-30")
+    window = (datetime.date(2025, 2, 1), datetime.date(2025, 3, 31))
+    first, *rest = sorted(policies[:3], key=lambda policy: policy.pk)
+
+    run = RenewalRun.objects.create(
+        window_start=window[0], window_end=window[1], workers=1, chunk_size=1, created_by=user
+    )
+    # A crash after the first chunk left its checkpoint and status behind.
+    RenewalRun.objects.filter(pk=run.pk).update(
+        status=RenewalRun.Status.FAILED,
+        checkpoint_maturity_date=datetime.date(2025, 2, 28),
+        checkpoint_policy_id=first.pk,
+        processed=1,
+        renewed=1,
+    )
+    run.refresh_from_db()
+
+    execute_run(run)
+
+    run.refresh_from_db()
+    assert run.status == RenewalRun.Status.COMPLETED
+    assert (run.processed, run.renewed, run.skipped, run.failed) == (3, 3, 0, 0)
+    assert run.checkpoint_policy_id == rest[-1].pk
+    assert run.throughput > 0
+    renewals = Policy.objects.filter(renewal_of__isnull=False)
+    renewed = set(renewals.values_list("renewal_of_id", flat=True))
+    assert renewed == {policy.pk for policy in rest}
+    assert renewed.isdisjoint({first.pk, policies[3].pk})
+
+
+@pytest.mark.django_db
+def test_queued_renewal_run_is_executed_by_the_job_worker(
+    user, client, carrier_product, lookup_values
+):
+    policy = _policy_with_fleet(user, client, carrier_product, lookup_values, "POL-1", 1)
+    window = (policy.maturity_date, policy.maturity_date)
+    run = RenewalRun.objects.create(
+        window_start=window[0], window_end=window[1], workers=1, created_by=user
+    )
+
+    job = queue_run(run)
+    assert queue_run(run) is None
+    run.refresh_from_db()
+    assert run.status == RenewalRun.Status.PENDING
+
+    (claimed,) = claim(1, worker="test")
+    assert claimed.pk == job.pk
+    assert run_job(claimed)
+    run.refresh_from_db()
+    assert run.status == RenewalRun.Status.COMPLETED
+    assert Policy.objects.filter(renewal_of=policy).exists()
+
+
+@pytest.mark.django_db
+def test_sparse_policy_list_skips_joins_and_reuses_field_map(
+    api_client, user, client, carrier_product, lookup_values, monkeypatch
+):
+    api_client.force_authenticate(user=user)
+    for number in ("POL-1", "POL-2"):
+        _policy_with_fleet(user, client, carrier_product, lookup_values, number, 0)
+    url = reverse("policies:policy-list")
+    clear_field_map_cache()
+    built = []
+    get_fields = serializers.ModelSerializer.get_fields
+
+    def counting_get_fields(self):
+        built.append(type(self))
+        return get_fields(self)
+
+    monkeypatch.setattr(serializers.ModelSerializer, "get_fields", counting_get_fields)
+
+    def fetch(params):
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url, params)
+        assert response.status_code == 200, response.content
+        page = next(
+            query["sql"]
+            for query in queries
+            if 'FROM "policies_policy"' in query["sql"] and "LIMIT" in query["sql"]
+        )
+        return response, page, len(queries.captured_queries)
+
+    full, full_page, full_queries = fetch({})
+    slim, slim_page, slim_queries = fetch({"fields": "id,policy_number,status"})
+    row = slim.json()["results"][0]
+    assert set(row) == {"id", "policy_number", "status"}
+    assert row["status"]["name"] == lookup_values["status"].name
+    assert len(slim.content) * 5 < len(full.content)
+    # Only the status join is left, and coverages are not prefetched.
+    assert slim_page.count("JOIN") == 1 < full_page.count("JOIN")
+    assert slim_queries == full_queries - 1
+
+    built.clear()
+    fetch({"fields": "id,policy_number,status"})
+    assert PolicySerializer not in built
+
+    expanded = fetch({"fields": "id", "expand": "coverages,financials"})[0].json()["results"][0]
+    assert set(expanded) == {"id", "coverages", "financials"}
+    assert expanded["financials"]["total_premium"] == "12000.00"
+    assert "carrier_product" not in fetch({"expand": ""})[0].json()["results"][0]
+
+
+@pytest.mark.django_db
+def test_sparse_fieldset_does_not_drop_writable_fields(
+    api_client, user, client, carrier_product, lookup_values
+):
+    api_client.force_authenticate(user=user)
+    policy = _policy_with_fleet(user, client, carrier_product, lookup_values, "POL-3", 0)
+    url = reverse("policies:policy-detail", args=[policy.id]) + "?fields=id,policy_number"
+
+    response = api_client.patch(
+        url, {"policy_number": "POL-3A", "financials": {"taxes": "90.00"}}, format="json"
+    )
+
+    assert response.status_code == 200, response.content
+    assert set(response.json()) == {"id", "policy_number"}
+    policy.refresh_from_db()
+    assert (policy.policy_number, policy.financials.taxes) == ("POL-3A", Decimal("90.00"))
+
+
+@pytest.mark.django_db
+def test_partial_coverage_sync_writes_only_changed_rows(
+    api_client, user, client, carrier_product, lookup_values
+):
+    api_client.force_authenticate(user=user)
+    policy = _policy_with_fleet(user, client, carrier_product, lookup_values, "POL-9", 0)
+    liability = policy.coverages.get(coverage_type="Auto Liability")
+    cargo = policy.coverages.get(coverage_type="Cargo")
+    payload = {
+        "coverages": [
+            {"id": str(liability.id), "coverage_type": "Auto Liability", "limits": "$2,000,000"},
+            {"id": str(cargo.id), "coverage_type": "Cargo", "is_active": False},
+            {"coverage_type": "Physical Damage", "deductible": "2500.00"},
+        ]
+    }
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.patch(
+            reverse("policies:policy-detail", args=[policy.id]), payload, format="json"
+        )
+
+    assert response.status_code == 200, response.content
+    coverage_writes = [
+        query["sql"].split(" ", 1)[0]
+        for query in queries
+        if '"policies_coverage"' in query["sql"] and not query["sql"].startswith("SELECT")
+    ]
+    # The unchanged cargo row is not written: one UPDATE for the new limit, one INSERT.
+    assert sorted(coverage_writes) == ["INSERT", "UPDATE"]
+    liability.refresh_from_db()
+    assert liability.limits == "$2,000,000"
+    assert set(policy.coverages.values_list("coverage_type", flat=True)) == {
+        "Auto Liability",
+        "Cargo",
+        "Physical Damage",
+    }
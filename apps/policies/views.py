@@ -1,19 +1,26 @@
 """API viewsets for the policy domain."""
 from __future__ import annotations
 
+from rest_framework import serializers, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from apps.common.fieldsets import SparseFieldsetMixin
+
 from .models import CarrierProduct, GeneralAgent, Policy, PolicyFinancial, ReferralCompany
 from .serializers import (
     CarrierProductSerializer,
     GeneralAgentSerializer,
+    PolicyRenewalSerializer,
     PolicySerializer,
     ReferralCompanySerializer,
 )
+from .services import RenewalError, renew_policy
 
 
-class BaseSoftDeleteViewSet(ModelViewSet):
+class BaseSoftDeleteViewSet(SparseFieldsetMixin, ModelViewSet):
     """Common soft-delete behaviour for policy domain viewsets."""
 
     permission_classes = (IsAuthenticated,)
@@ -68,6 +75,7 @@ class PolicyViewSet(BaseSoftDeleteViewSet):
         "producer",
         "account_manager",
         "referral_company",
+        "financials",
     ).prefetch_related("coverages")
     filterset_fields = {
         "client": ["exact"],
@@ -88,6 +96,7 @@ class PolicyViewSet(BaseSoftDeleteViewSet):
         "carrier_product__insurance_company_name",
         "carrier_product__general_agent__name",
     )
+    search_document_field = "search_document"
     ordering_fields = (
         "policy_number",
         "effective_date",
@@ -97,13 +106,25 @@ class PolicyViewSet(BaseSoftDeleteViewSet):
     )
     ordering = ("-effective_date", "policy_number")
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.distinct()
-
     def perform_create(self, serializer: PolicySerializer) -> None:
         serializer.save(created_by=self.request.user, updated_by=self.request.user)
 
+    @action(detail=True, methods=["post"])
+    def renew(self, request, pk=None):
+        """Create the successor policy with copies of coverages and active assignments."""
+
+        policy = self.get_object()
+        options = PolicyRenewalSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+        try:
+            renewal = renew_policy(policy, user=request.user, **options.validated_data)
+        except RenewalError as exc:
+            raise serializers.ValidationError({"detail": str(exc)}) from exc
+
+        renewal = self.get_queryset().get(pk=renewal.pk)
+        serializer = PolicySerializer(renewal, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def perform_update(self, serializer: PolicySerializer) -> None:
         serializer.save(updated_by=self.request.user)
 
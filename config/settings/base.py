@@ -60,6 +60,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "apps.common.middleware.ActivityLogBufferMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -137,6 +138,30 @@ if DEFAULT_FILE_STORAGE.endswith("FileSystemStorage"):
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Shared cache: Redis when REDIS_URL is configured, per-process memory otherwise.
+REDIS_URL = env.str("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Lookup tables are cached until a save/delete bumps their version counter.
+LOOKUP_CACHE_TIMEOUT = env.int("LOOKUP_CACHE_TIMEOUT", default=60 * 60 * 24)
+# Browser cache lifetime for /api/v1/lookups/bundle/ (revalidated via ETag afterwards).
+LOOKUP_BUNDLE_MAX_AGE = env.int("LOOKUP_BUNDLE_MAX_AGE", default=60 * 60)
+# Lifetime of cached /api/v1/certificates/verify/{code}/ answers (including "not found").
+# Changes to a certificate, its master, policy or holder drop the cached answer earlier.
+CERTIFICATE_VERIFY_CACHE_TIMEOUT = env.int("CERTIFICATE_VERIFY_CACHE_TIMEOUT", default=60 * 60)
+
 AUTH_USER_MODEL = "accounts.User"
 
 REST_FRAMEWORK = {
@@ -148,14 +173,33 @@ REST_FRAMEWORK = {
     ),
     "DEFAULT_FILTER_BACKENDS": (
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
+        "apps.common.filters.SearchDocumentFilter",
         "rest_framework.filters.OrderingFilter",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "apps.common.pagination.SelectablePagination",
     "PAGE_SIZE": env.int("DJANGO_DEFAULT_PAGE_SIZE", default=25),
+    "DEFAULT_THROTTLE_RATES": {
+        # Per client IP on the public /api/v1/certificates/verify/{code}/ endpoint.
+        "certificate_verify": env.str("CERTIFICATE_VERIFY_THROTTLE_RATE", default="60/min"),
+    },
+    # Proxies in front of the app; set so throttling keys on the client IP from X-Forwarded-For.
+    "NUM_PROXIES": env.int("DJANGO_NUM_PROXIES", default=None),
 }
 
+# Paginated list counts: cached per filter signature; unfiltered lists on PostgreSQL
+# above the threshold use the planner's row estimate instead of COUNT(*).
+PAGINATION_COUNT_CACHE_TTL = env.int("PAGINATION_COUNT_CACHE_TTL", default=30)
+PAGINATION_ESTIMATE_THRESHOLD = env.int("PAGINATION_ESTIMATE_THRESHOLD", default=100_000)
+
+# Activity log (Timeline) writes: buffered per request/transaction and bulk inserted.
+ACTIVITY_LOG_BUFFERED = env.bool("ACTIVITY_LOG_BUFFERED", default=True)
+ACTIVITY_LOG_MAX_BUFFER = env.int("ACTIVITY_LOG_MAX_BUFFER", default=500)
+ACTIVITY_LOG_BATCH_SIZE = env.int("ACTIVITY_LOG_BATCH_SIZE", default=500)
+# Hand flushed batches to a background thread; a full queue falls back to synchronous writes.
+ACTIVITY_LOG_ASYNC = env.bool("ACTIVITY_LOG_ASYNC", default=False)
+ACTIVITY_LOG_QUEUE_SIZE = env.int("ACTIVITY_LOG_QUEUE_SIZE", default=100)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -7,6 +7,14 @@ DATABASES["default"] = {  # type: ignore # noqa: F405
     "ENGINE": "django.db.backends.sqlite3",
     "NAME": ":memory:",
 }
+ACTIVITY_LOG_ASYNC = False
+# Tests assert counts right after writes; individual tests opt back in.
+PAGINATION_COUNT_CACHE_TTL = 0
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
 REST_FRAMEWORK["DEFAULT_AUTHENTICATION_CLASSES"] = [  # type: ignore # noqa: F405
     "rest_framework.authentication.SessionAuthentication",
 ]